@@ -2,28 +2,31 @@ import asyncio, typer, pathlib
 from dotenv import load_dotenv
 load_dotenv()                    # ← must be before `import stream.quote_cache` etc.
 
-from src.stream.quote_cache import run as quotes_run
-from src.stream.trade_feed  import run as trades_run, TRADE_Q
+from src.stream.ingest      import run as ingest_run
+from src.stream.trade_feed  import TRADE_Q
+from src.stream.spot_feed   import run as spot_run, replay as spot_replay
 from src.dealer.engine      import run as engine_run
 from src.dealer.engine      import _book              # optional inspect
-from src.persistence        import append_gamma
+from src.persistence        import append_gamma, append_book
 
 app = typer.Typer(add_completion=False, rich_markup_mode="rich")
 
 @app.command()
 def live():
     """
-    Run quote cache, trade feed, and dealer-gamma engine in real time.
+    Run quote/trade ingestion (one socket), spot feed and dealer-gamma engine in real time.
     Snapshots are written to DuckDB every second.
     """
     import os
     from src.data.contract_loader import todays_spx_0dte_contracts
+    from src.utils.contracts import contracts
     
     # Set a unique database file for this run to avoid lock conflicts
     os.environ["OA_GAMMA_DB"] = "data/live.db"
     
-    # Load today's contracts
+    # Load today's contracts; the whole chain gets its contract ids up front
     symbols = todays_spx_0dte_contracts(pathlib.Path("data/snapshots"))
+    contracts.seed_snapshot(pathlib.Path("data/snapshots"))
     
     if not symbols:
         print("Warning: No symbols loaded. Make sure the snapshot file exists.")
@@ -42,14 +45,15 @@ def live():
 
     async def main():
         await asyncio.gather(
-            quotes_run(),
-            trades_run(symbols),
-            engine_run(append_gamma),
+            ingest_run(symbols),
+            spot_run(),
+            engine_run(append_gamma, book_cb=append_book),
         )
     asyncio.run(main())
 
 @app.command()
-def replay(parquet: pathlib.Path):
+def replay(parquet: pathlib.Path,
+           spot: pathlib.Path = typer.Option(None, help="parquet/csv of ts, price for the index")):
     """
     Consume a local Parquet of trade prints for offline back-test.
     """
@@ -85,8 +89,10 @@ def replay(parquet: pathlib.Path):
         print("Replay complete")
             
     async def main():
+        if spot is not None:
+            await spot_replay(spot)
         await asyncio.gather(
-            mock_quotes_run(), feeder(), engine_run(append_gamma)
+            mock_quotes_run(), feeder(), engine_run(append_gamma, book_cb=append_book)
         )
     asyncio.run(main())
 
@@ -98,6 +104,27 @@ def diagnose():
     from src.tools.diagnose import run_diagnostics
     run_diagnostics()
 
+@app.command()
+def compact(day: str = typer.Argument(None, help="YYYY-MM-DD (default: today)")):
+    """
+    End-of-day: merge each sink's rolled parquet files into one file per day.
+    """
+    import datetime as dt
+    from src.stream.sinks import compact as compact_dir
+    day = day or dt.date.today().isoformat()
+    for name in ("quotes.parquet", "trades.parquet"):
+        out = compact_dir(pathlib.Path("data") / day / name)
+        print(f"{name}: {out or 'nothing to compact'}")
+
+@app.command()
+def ticks(day: str = typer.Argument(None, help="YYYY-MM-DD (default: today)")):
+    """
+    End-of-day: load the day's quotes/trades into the partitioned tick store.
+    """
+    from src.stream.tick_store import build_day, TICK_ROOT
+    for kind, n in build_day(day).items():
+        print(f"{kind}: {n:,} rows → {TICK_ROOT / kind}")
+
 @app.command()
 def generate_sample():
     """
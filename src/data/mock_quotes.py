@@ -2,7 +2,7 @@
 Generate mock quotes data for the quote cache during replay testing.
 """
 
-import asyncio
+import time
 from src.stream.quote_cache import quotes
 
 async def load_mock_quotes():
@@ -17,7 +17,7 @@ async def load_mock_quotes():
         "O:SPX240520P05000000",
     ]
     
-    current_time = int(asyncio.get_event_loop().time() * 1e9)  # Current time in nanoseconds
+    current_time = int(time.time() * 1e3)  # unix-ms, same unit as the live feeds
     
     # Generate reasonable bid/ask prices based on strike and option type
     for sym in symbols:
@@ -37,7 +37,7 @@ async def load_mock_quotes():
             bid, ask = 50.0, 55.0  # Generic fallback
         
         # Add to quotes cache
-        quotes[sym] = (bid, ask, current_time)
+        quotes.update(symbol=sym, bid=bid, ask=ask, ts=current_time)
     
     print(f"Loaded {len(symbols)} mock quotes into cache")
     return quotes
\ No newline at end of file
@@ -0,0 +1,360 @@
+"""
+dealer.array_book
+=================
+`StrikeBook` over preallocated NumPy arrays.
+
+Positions live in three (expiry slot × strike index × put/call) arrays:
+contracts bought by customers, contracts sold, and dealer γ.  Strikes and
+expiries map to dense indices through plain dicts, seeded from the day's
+contract list and grown (capacity doubling) when a new strike or expiry
+trades.  Strike profile, cumulative γ and the flip strike are vector
+operations over the used block.
+
+The γ array is frozen at trade time.  Alongside it the book keeps the net
+dealer contracts and the last σ seen per contract, so `revalue(spot)` can
+re-price every live position with one Black-Scholes pass -- cost scales
+with the number of open contracts, not the number of trades.  `ladder(spot)`
+does the same over a whole grid of hypothetical spots (±5 % by default) as a
+single (spots × positions) broadcast, and interpolates the spot at which
+total dealer γ changes sign.
+
+    book = ArrayStrikeBook.from_contracts(todays_spx_0dte_contracts(snap_dir))
+    book.update((5000, True), Side.BUY, 2, 0.0013, expiry=date(2025, 5, 19))
+    strikes, gamma = book.strike_profile()
+    flip = book.gamma_flip(near=spot)
+    total = book.revalued_gamma(spot)            # γ of today's positions at *this* spot
+    lad = book.ladder(spot)                      # lad.spots, lad.gamma, lad.flip
+    st = book.state()                            # copy, e.g. for persistence.append_book
+
+Same update/getter API as `StrikeBook`; `expiry=None` is its own slot.
+"""
+from __future__ import annotations
+import datetime as dt
+from typing import NamedTuple
+import numpy as np
+
+from src.dealer.strike_book import BookRow, BookTotals, Side
+from src.utils.occ import parse_many as parse_occ_many
+from src.utils.greeks import bs_greeks_vec, _MIN_TAU
+
+_DEFAULT_SIGMA = 0.2             # contracts booked without a σ
+LADDER_WIDTH   = 0.05            # ± fraction of spot covered by the ladder
+LADDER_STEPS   = 201             # grid points (0.05 % apart at the defaults)
+_LADDER_CELLS  = 1 << 21         # spots × positions evaluated per chunk
+
+class Positions(NamedTuple):
+    """Live contracts (net dealer position ≠ 0), one row each."""
+    expiry:  list
+    strike:  np.ndarray
+    is_call: np.ndarray
+    net:     np.ndarray          # dealer contracts, + ⇒ dealer long
+    sigma:   np.ndarray          # last σ booked (NaN if none)
+    tau:     np.ndarray          # years, floored at one day
+
+class BookState(NamedTuple):
+    """Copy of the used block of an `ArrayStrikeBook` (axes only ever grow)."""
+    expiries: list
+    strikes:  list
+    long:     np.ndarray         # (expiry × strike × put/call), as in the book
+    short:    np.ndarray
+    gamma:    np.ndarray
+
+class Ladder(NamedTuple):
+    """Total dealer γ across a grid of hypothetical spots."""
+    spots: np.ndarray
+    gamma: np.ndarray
+    flip:  float | None          # spot where total γ changes sign (None if it doesn't)
+
+def dealer_gamma(spot, K, sigma, tau, is_call, net) -> np.ndarray:
+    """Dealer γ per position at *spot*: net contracts × Black-Scholes γ."""
+    _, g, _, _ = bs_greeks_vec(spot, K, sigma, tau, is_call)
+    return np.asarray(net, dtype=float) * g
+
+def spot_grid(spot: float, width: float = LADDER_WIDTH,
+              steps: int = LADDER_STEPS) -> np.ndarray:
+    return spot * np.linspace(1 - width, 1 + width, steps)
+
+def gamma_ladder(spots, K, sigma, tau, is_call, net) -> np.ndarray:
+    """
+    Total dealer γ at each of *spots*, holding σ fixed per position (sticky
+    strike).  Positions with an unusable σ contribute nothing.
+    """
+    # γ does not depend on put/call, so only the d1 / exp terms are evaluated
+    # per (spot, position); everything else is hoisted out of the grid.
+    spots = np.asarray(spots, dtype=float)
+    K, sigma, tau, net = (np.broadcast_to(np.asarray(x, dtype=float), np.shape(K))
+                          for x in (K, sigma, tau, net))
+    ok = np.isfinite(sigma) & (sigma > 0) & (K > 0) & (net != 0)
+    if not ok.any():
+        return np.zeros_like(spots)
+    tau  = np.maximum(tau[ok], _MIN_TAU)
+    vol  = sigma[ok] * np.sqrt(tau)                      # σ√τ
+    base = 0.5 * sigma[ok] ** 2 * tau - np.log(K[ok])    # d1·σ√τ − ln S
+    w    = net[ok] / (vol * np.sqrt(2 * np.pi))
+    ln_s = np.log(spots)
+    step = max(_LADDER_CELLS // vol.size, 1)
+    out  = np.empty_like(spots)
+    for i in range(0, spots.size, step):
+        d1 = (ln_s[i:i + step, None] + base) / vol
+        out[i:i + step] = np.exp(-0.5 * d1 * d1) @ w
+    return out / spots
+
+def ladder(spot: float, K, sigma, tau, is_call, net, *,
+           width: float = LADDER_WIDTH, steps: int = LADDER_STEPS) -> Ladder:
+    """`gamma_ladder` over `spot_grid(spot)`; the flip nearest *spot* wins."""
+    spots = spot_grid(spot, width, steps)
+    gamma = gamma_ladder(spots, K, sigma, tau, is_call, net)
+    return Ladder(spots, gamma, _zero_crossing(spots, gamma, near=spot))
+
+class ArrayStrikeBook:
+    def __init__(self, strikes=(), expiries=(), *,
+                 strike_capacity: int = 256, expiry_capacity: int = 4):
+        self._sidx: dict[float, int] = {}
+        self._eidx: dict[object, int] = {}
+        self._strikes:  list = []
+        self._expiries: list = []
+        self._order: np.ndarray | None = None          # strike sort order, cached
+        self._alloc(max(int(expiry_capacity), 1), max(int(strike_capacity), 1))
+        for e in expiries:
+            self._expiry_index(e)
+        for k in sorted(set(strikes)):
+            self._strike_index(k)
+
+    @classmethod
+    def from_contracts(cls, symbols, **kw) -> "ArrayStrikeBook":
+        """Pre-size the grid from OCC symbols (e.g. `todays_spx_0dte_contracts`)."""
+        occ = parse_occ_many(symbols if hasattr(symbols, "__len__") else list(symbols))
+        strikes  = set(occ.strike.tolist())
+        expiries = np.unique(occ.expiry).astype(object).tolist()
+        kw.setdefault("strike_capacity", max(len(strikes), 1))
+        kw.setdefault("expiry_capacity", max(len(expiries), 1))
+        return cls(strikes, expiries, **kw)
+
+    # ------------------------------------------------------------------ #
+    def _alloc(self, n_exp: int, n_strike: int) -> None:
+        shape = (n_exp, n_strike, 2)                     # [..., 0] put, [..., 1] call
+        self._long  = np.zeros(shape, dtype=np.int64)
+        self._short = np.zeros(shape, dtype=np.int64)
+        self._gamma = np.zeros(shape)
+        self._sigma = np.full(shape, np.nan)
+
+    def _grow(self, n_exp: int, n_strike: int) -> None:
+        E, S, _ = self._gamma.shape
+        if n_exp <= E and n_strike <= S:
+            return
+        while E < n_exp:
+            E *= 2
+        while S < n_strike:
+            S *= 2
+        old = (self._long, self._short, self._gamma, self._sigma)
+        self._alloc(E, S)
+        e, s = len(self._expiries), len(self._strikes)
+        for new, prev in zip((self._long, self._short, self._gamma, self._sigma), old):
+            new[:e, :s] = prev[:e, :s]
+
+    def _strike_index(self, strike) -> int:
+        i = self._sidx.get(strike)
+        if i is None:
+            i = len(self._strikes)
+            self._grow(len(self._expiries), i + 1)
+            self._strikes.append(strike)
+            self._sidx[strike] = i
+            self._order = None
+        return i
+
+    def _expiry_index(self, expiry) -> int:
+        i = self._eidx.get(expiry)
+        if i is None:
+            i = len(self._expiries)
+            self._grow(i + 1, len(self._strikes))
+            self._expiries.append(expiry)
+            self._eidx[expiry] = i
+        return i
+
+    def index(self, key: tuple, expiry=None) -> tuple[int, int, int]:
+        """(expiry slot, strike index, 1 for calls / 0 for puts), allocating if new."""
+        return self._expiry_index(expiry), self._strike_index(key[0]), int(key[1])
+
+    def _used(self, a: np.ndarray) -> np.ndarray:
+        return a[:len(self._expiries), :len(self._strikes)]
+
+    # ---------- writes ----------
+    def update(self, key: tuple, side: str, contracts: int, gamma: float, expiry=None,
+               sigma: float | None = None):
+        e, k, c = self.index(key, expiry)
+        if sigma is not None:
+            self._sigma[e, k, c] = sigma
+        if side == Side.BUY:
+            self._long[e, k, c]  += contracts
+            self._gamma[e, k, c] -= gamma * contracts     # dealer short γ
+        elif side == Side.SELL:
+            self._short[e, k, c] += contracts
+            self._gamma[e, k, c] += gamma * contracts     # dealer long γ
+        else:
+            raise ValueError(side)
+
+    def update_many(self, keys, longs, shorts, gammas, expiries=None, sigmas=None):
+        """Pre-aggregated deltas, as StrikeBook.update_many, applied with one scatter-add each."""
+        if expiries is None:
+            expiries = [None] * len(keys)
+        idx = np.array([self.index(k, e) for k, e in zip(keys, expiries)],
+                       dtype=np.intp).reshape(-1, 3).T
+        ix = tuple(idx)
+        np.add.at(self._long,  ix, np.asarray(longs,  dtype=np.int64))
+        np.add.at(self._short, ix, np.asarray(shorts, dtype=np.int64))
+        np.add.at(self._gamma, ix, np.asarray(gammas, dtype=float))
+        if sigmas is not None:
+            self._sigma[ix] = sigmas
+
+    def reset(self):
+        for a in (self._long, self._short, self._gamma):
+            a.fill(0)
+        self._sigma.fill(np.nan)
+
+    def state(self) -> BookState:
+        """Point-in-time copy of the positions, cheap enough to take every snapshot."""
+        return BookState(list(self._expiries), list(self._strikes),
+                         self._used(self._long).copy(), self._used(self._short).copy(),
+                         self._used(self._gamma).copy())
+
+    # ---------- getters (StrikeBook-compatible) ----------
+    def row(self, key: tuple, expiry=...) -> BookRow:
+        """Position for one contract; summed over expiries unless *expiry* is given."""
+        k = self._sidx.get(key[0])
+        if k is None:
+            return BookRow(0, 0, 0.0)
+        c = int(key[1])
+        if expiry is ...:
+            e = slice(0, len(self._expiries))
+        else:
+            e = self._eidx.get(expiry)
+            if e is None:
+                return BookRow(0, 0, 0.0)
+        return BookRow(int(np.sum(self._long[e, k, c])), int(np.sum(self._short[e, k, c])),
+                       float(np.sum(self._gamma[e, k, c])))
+
+    def total_gamma(self) -> float:
+        return float(self._used(self._gamma).sum())
+
+    def call_gamma(self) -> float:
+        return float(self._used(self._gamma)[..., 1].sum())
+
+    def put_gamma(self) -> float:
+        return float(self._used(self._gamma)[..., 0].sum())
+
+    def net_contracts(self) -> int:
+        return int(self._used(self._long).sum() - self._used(self._short).sum())
+
+    def expiry_gamma(self, expiry) -> float:
+        e = self._eidx.get(expiry)
+        return 0.0 if e is None else float(self._gamma[e, :len(self._strikes)].sum())
+
+    def gamma_by_expiry(self) -> dict:
+        per = self._used(self._gamma).sum(axis=(1, 2))
+        return dict(zip(self._expiries, per.tolist()))
+
+    def totals(self) -> BookTotals:
+        g = self._used(self._gamma)
+        return BookTotals(float(g.sum()), float(g[..., 1].sum()), float(g[..., 0].sum()),
+                          int(self._used(self._long).sum()), int(self._used(self._short).sum()))
+
+    # ---------- vector views ----------
+    def _sorted(self) -> np.ndarray:
+        if self._order is None:
+            self._order = np.argsort(np.asarray(self._strikes, dtype=float), kind="stable")
+        return self._order
+
+    def strike_profile(self, expiry=...) -> tuple[np.ndarray, np.ndarray]:
+        """(strikes ascending, dealer γ per strike) -- calls + puts, all or one expiry."""
+        order = self._sorted()
+        g = self._used(self._gamma)
+        if expiry is not ...:
+            e = self._eidx.get(expiry)
+            g = g[e:e + 1] if e is not None else g[:0]
+        return np.asarray(self._strikes, dtype=float)[order], g.sum(axis=(0, 2))[order]
+
+    def cumulative_gamma(self, expiry=...) -> tuple[np.ndarray, np.ndarray]:
+        strikes, g = self.strike_profile(expiry)
+        return strikes, np.cumsum(g)
+
+    def gamma_flip(self, expiry=..., *, near: float | None = None) -> float | None:
+        """
+        Strike where cumulative dealer γ crosses zero, linearly interpolated
+        between the bracketing strikes.  With several crossings, the one
+        closest to *near* (e.g. spot) wins, else the lowest.  None if no crossing.
+        """
+        strikes, cum = self.cumulative_gamma(expiry)
+        if strikes.size < 2:
+            return None
+        return _zero_crossing(strikes, cum, near)
+
+    # ---------- revaluation ----------
+    def positions(self, asof: dt.date | None = None) -> Positions:
+        """Every contract with a non-zero net dealer position; τ measured from *asof*."""
+        asof = asof or dt.date.today()
+        net = self._used(self._short) - self._used(self._long)
+        e, k, c = np.nonzero(net)
+        days = np.array([(x - asof).days if x is not None else 0 for x in self._expiries],
+                        dtype=float)
+        return Positions([self._expiries[i] for i in e],
+                         np.asarray(self._strikes, dtype=float)[k] if k.size else np.empty(0),
+                         c.astype(bool), net[e, k, c],
+                         self._used(self._sigma)[e, k, c],
+                         np.maximum(days[e] / 365.0, 1 / 365.0) if e.size else np.empty(0))
+
+    def revalue(self, spot: float, asof: dt.date | None = None, *,
+                surface=None) -> tuple[Positions, np.ndarray]:
+        """
+        (positions, dealer γ per position) at *spot*.  σ is the last one booked
+        per contract, or read off *surface*'s smile per expiry when given
+        (a `VolSurface`, i.e. sticky-moneyness).
+        """
+        pos = self.positions(asof)
+        if not pos.net.size:
+            return pos, np.empty(0)
+        sigma = _sigmas(pos, spot, surface)
+        return pos, dealer_gamma(spot, pos.strike, sigma, pos.tau, pos.is_call, pos.net)
+
+    def revalued_gamma(self, spot: float, asof: dt.date | None = None, **kw) -> float:
+        return float(self.revalue(spot, asof, **kw)[1].sum())
+
+    def revalued_profile(self, spot: float, asof: dt.date | None = None, **kw
+                         ) -> tuple[np.ndarray, np.ndarray]:
+        """(strikes ascending, dealer γ per strike at *spot*)."""
+        pos, g = self.revalue(spot, asof, **kw)
+        strikes, inv = np.unique(pos.strike, return_inverse=True)
+        return strikes, np.bincount(inv, weights=g, minlength=len(strikes))
+
+    def ladder(self, spot: float, asof: dt.date | None = None, *, surface=None,
+               width: float = LADDER_WIDTH, steps: int = LADDER_STEPS) -> Ladder:
+        """
+        Total dealer γ of the open positions at every spot in ±*width* around
+        *spot*.  σ is resolved once, at *spot* (as in `revalue`), then held.
+        """
+        pos = self.positions(asof)
+        sigma = _sigmas(pos, spot, surface) if pos.net.size else pos.sigma
+        return ladder(spot, pos.strike, sigma, pos.tau, pos.is_call, pos.net,
+                      width=width, steps=steps)
+
+def _sigmas(pos: Positions, spot: float, surface) -> np.ndarray:
+    """Booked σ per position, or *surface*'s smile per expiry; 0.2 where unusable."""
+    sigma = pos.sigma.copy()
+    if surface is not None:
+        exp = np.array([str(x) for x in pos.expiry])
+        for x in np.unique(exp):
+            g = np.flatnonzero(exp == x)
+            sigma[g] = surface.smile_sigma(spot, pos.strike[g], pos.tau[g],
+                                           expiry=pos.expiry[g[0]])
+    return np.where(np.isfinite(sigma) & (sigma > 0), sigma, _DEFAULT_SIGMA)
+
+def _zero_crossing(x: np.ndarray, y: np.ndarray, near: float | None = None) -> float | None:
+    """x where y changes sign (linear interpolation); nearest to *near* if several."""
+    nz = y != 0                                      # flat zero stretches are not crossings
+    x, y = x[nz], y[nz]
+    i = np.flatnonzero(np.signbit(y[:-1]) != np.signbit(y[1:]))
+    if not i.size:
+        return None
+    xs = x[i] - y[i] * (x[i + 1] - x[i]) / (y[i + 1] - y[i])
+    if near is None:
+        return float(xs[0])
+    return float(xs[np.argmin(np.abs(xs - near))])
@@ -9,21 +9,65 @@ Public coroutine
 ----------------
 run(snapshot_cb: Callable[[float, float], None], *,
     eps: float = 0.05,   # aggressor threshold $
-    snapshot_interval: float = 1.0) -> None
+    snapshot_interval: float = 1.0,
+    book_cb: Callable[[float, BookState], None] | None = None,   # per-strike state
+    batch: int = ENGINE_BATCH,              # 0 ⇒ one trade at a time
+    batch_window_us: float = ENGINE_BATCH_US) -> None
+
+Batch mode drains up to `batch` trades (or for `batch_window_us`) from
+TRADE_Q, classifies them against the quote arrays in one pass, prices γ once
+per contract with the vectorized kernel and applies one aggregated update
+per strike.
+
+gamma_ladder() -> Ladder | None   total dealer γ of the live book across ±5 %
+                                  of spot, with the interpolated flip level
 """
 from __future__ import annotations
-import asyncio, time, math, datetime as dt
+import asyncio, os, time, math, datetime as dt
+from logging import DEBUG, INFO, WARNING
 from typing import Callable
+import numpy as np
 
 from src.stream.trade_feed import TRADE_Q
 from src.stream.quote_cache import quotes            # live NBBO cache
+from src.stream.spot_feed import get_spot            # live index value
 from src.greeks.surface import VolSurface
 from src.utils.occ import parse as parse_occ
+from src.utils.contracts import contracts           # symbol → int id + strike/expiry/cp
 from src.dealer.strike_book import StrikeBook, Side
+from src.dealer.array_book import ArrayStrikeBook, BookState, Ladder
 from src.utils.greeks import gamma as bs_gamma     # scalar γ
+from src.utils.greeks import bs_greeks_vec         # batched γ
+from src.dealer.telemetry import Telemetry, EventLog, configure as configure_logging, event_log
 
 _surface = VolSurface()          # single cache instance
+_FALLBACK_SPOT = 5000.0          # used until the spot feed delivers a value
 _book    = StrikeBook()          # module-level so agents can inspect
+_positions = ArrayStrikeBook()   # same trades as contracts + σ, for revaluation at live spot
+# quotes older than this (relative to the trade) are not used to classify it
+MAX_QUOTE_AGE_MS = float(os.getenv("MAX_QUOTE_AGE_MS", "2000"))
+ENGINE_BATCH     = int(os.getenv("ENGINE_BATCH", "0"))          # trades per batch, 0 = off
+ENGINE_BATCH_US  = float(os.getenv("ENGINE_BATCH_US", "500"))   # max wait to fill a batch
+# s, relative to the last trade's timestamp (so replays age spot by event time);
+# older spot ⇒ snapshot falls back to trade-time γ
+SPOT_MAX_AGE     = float(os.getenv("SPOT_MAX_AGE", "5.0"))
+_last_trade_ms: float | None = None    # event clock: newest trade `t` seen, in ms
+_tm    = Telemetry("dealer.engine")     # level-gated, sampled; see dealer.telemetry
+_evlog = event_log()                    # binary per-trade log, None unless ENGINE_EVENT_LOG
+
+def _to_ms(t: float) -> float:
+    """Polygon stamps trades in ms (websocket) or ns (REST); normalise to ms."""
+    return t / 1e6 if t > 1e14 else t
+
+def _advance_clock(t_ms: float) -> None:
+    global _last_trade_ms
+    if _last_trade_ms is None or t_ms > _last_trade_ms:
+        _last_trade_ms = t_ms
+
+def _fresh_spot() -> float | None:
+    """Spot no older than SPOT_MAX_AGE at the event clock (wall clock before any trade)."""
+    now = None if _last_trade_ms is None else _last_trade_ms / 1e3
+    return get_spot(max_age=SPOT_MAX_AGE, now=now)
 
 async def _process_trade(msg: dict, *, eps: float) -> None:
     """Classify aggressor side, compute γ, update book.
@@ -31,66 +75,39 @@ async def _process_trade(msg: dict, *, eps: float) -> None:
     """
     # Handle status messages - skip them entirely
     if "status" in msg:
-        print(f"[engine] Skipping status message: {msg.get('status')} - {msg.get('message', '')}")
+        _tm.event(INFO, "status", sampled=False,
+                  status=msg.get("status"), message=msg.get("message", ""))
         return
-        
-    # For Polygon websocket format (different from original expected format)
-    # Map Polygon fields to our internal format if needed
-    if "ev" in msg:
-        # Check if this is a valid trade message
-        if msg.get("ev") == "OT" and all(k in msg for k in ["sym", "p", "s", "t"]):
-            # This is a Polygon options trade message
-            try:
-                # Extract data from Polygon format
-                sym = msg.get("sym")  # Option symbol
-                price = msg.get("p")  # Price
-                size = msg.get("s")   # Size
-                timestamp = msg.get("t")  # Timestamp in nanoseconds
-                
-                # Log trade for debugging
-                print(f"[engine] Processing trade: {sym} {size}@{price}")
-                
-                # Create standardized message
-                trade_msg = {
-                    "sym": sym,
-                    "p": price,
-                    "s": size,
-                    "t": timestamp
-                }
-                msg = trade_msg
-            except KeyError as e:
-                print(f"[engine] Missing field in trade message: {e}")
-                return
-        else:
-            # This is a different message type - log and skip
-            print(f"[engine] Skipping message with event type '{msg.get('ev')}', fields: {msg.keys()}")
-            return
-    
+
+    # Polygon websocket frames carry "ev"; only trades are of interest
+    if "ev" in msg and msg["ev"] not in ("T", "OT"):
+        _tm.event(DEBUG, "skip", ev=msg.get("ev"))
+        return
+
     # Verify we have all required fields
     if not {"sym", "p", "s", "t"}.issubset(msg):
-        # Debug print to see what fields we received
-        print(f"[engine] Incomplete trade message, fields: {msg.keys()}")
+        _tm.event(DEBUG, "incomplete", fields=list(msg))
         return
 
     sym = msg["sym"]
     price = float(msg["p"])
     size = int(msg["s"])
+    _advance_clock(_to_ms(msg["t"]))
 
-    # Check if we have NBBO for this symbol
-    bid, ask, _ = quotes.get(sym, (None, None, None))
+    # Check if we have a fresh-enough NBBO for this symbol
+    bid, ask, _ = quotes.get(sym, (None, None, None),
+                             max_age_ms=MAX_QUOTE_AGE_MS, now_ms=_to_ms(msg["t"]))
     if bid is None:
-        print(f"[engine] No NBBO for {sym}")
+        _tm.event(DEBUG, "no_nbbo", sym=sym)
         return
 
     # Classify trade as BUY or SELL based on price relative to NBBO
     if price >= ask - eps:
         side = Side.BUY
-        print(f"[engine] Classified as BUY: {price} >= {ask}-{eps}")
     elif price <= bid + eps:
         side = Side.SELL
-        print(f"[engine] Classified as SELL: {price} <= {bid}+{eps}")
     else:
-        print(f"[engine] Mid-trade ignored: {bid}+{eps} < {price} < {ask}-{eps}")
+        _tm.event(DEBUG, "mid_trade", sym=sym, px=price, bid=bid, ask=ask)
         return  # mid-trade ⇒ ignore
 
     try:
@@ -98,26 +115,26 @@ async def _process_trade(msg: dict, *, eps: float) -> None:
         occ = parse_occ(sym)
         
         # Calculate time to expiry properly
-        trade_d = dt.datetime.utcfromtimestamp(msg["t"] / 1e9).date()
+        trade_d = dt.datetime.utcfromtimestamp(_to_ms(msg["t"]) / 1e3).date()
         tau_days = (occ.expiry - trade_d).days
         tau = max(tau_days / 365.0, 1/365.0)  # Ensure minimum time to expiry
-        
-        if tau <= 0:
-            print(f"[engine] Option expired: {occ.expiry} <= {trade_d}")
-            return
 
-        # Get current SPX price (hard-coded for now, should fetch from real-time feed)
-        spx_price = 5000  # Replace with actual SPX price lookup
+        # Current SPX price from the in-process spot cache
+        spx_price = get_spot(_FALLBACK_SPOT)
         
         # Calculate mid price for IV calculation and Greeks
         mid = (bid + ask) * 0.5
         
-        # Get implied volatility using mid price (not trade price)
-        sigma = _surface.get_sigma(sym, mid, S=spx_price, K=occ.strike, tau=tau)
+        # Get implied volatility using mid price (not trade price);
+        # crossed or one-sided quotes are read off the smile without a root-find
+        if bid <= 0 or ask <= bid:
+            sigma = _surface.smile_sigma(spx_price, occ.strike, tau, expiry=occ.expiry)
+        else:
+            sigma = _surface.get_sigma(sym, mid, S=spx_price, K=occ.strike, tau=tau,
+                                       expiry=occ.expiry, is_call=occ.is_call)
         
         if math.isnan(sigma) or sigma <= 0:
-            print(f"[engine] Invalid sigma for {sym}: {sigma}")
-            # Use a reasonable fallback value instead of returning
+            _tm.event(DEBUG, "bad_sigma", sym=sym, sigma=sigma)
             sigma = 0.2  # 20% volatility as fallback
         
         # Calculate gamma
@@ -125,34 +142,199 @@ async def _process_trade(msg: dict, *, eps: float) -> None:
         γ = bs_gamma(spx_price, occ.strike, sigma, tau, option_type)  # per-contract
         
         if math.isnan(γ) or γ <= 0:
-            print(f"[engine] Invalid gamma for {sym}: {γ}")
+            _tm.event(DEBUG, "bad_gamma", sym=sym, gamma=γ)
             return
             
         # Update the dealer book
-        print(f"[engine] Updating book: strike={occ.strike}, is_call={occ.is_call}, side={side}, size={size}, gamma={γ}")
-        _book.update((occ.strike, occ.is_call), side, size, γ)
-        
-        # Log the total gamma after update
-        print(f"[engine] Current total gamma: {_book.total_gamma()}")
-        
+        _book.update((occ.strike, occ.is_call), side, size, γ, expiry=occ.expiry)
+        _positions.update((occ.strike, occ.is_call), side, size, γ, expiry=occ.expiry,
+                          sigma=sigma)
+        _tm.event(DEBUG, "trade", sym=sym, side=side, size=size, px=price, gamma=γ)
+        if _evlog is not None:
+            _evlog.write(EventLog.TRADE_CALL if occ.is_call else EventLog.TRADE_PUT,
+                         msg["t"], 1 if side == Side.BUY else -1, size, occ.strike, price, γ)
+
     except Exception as e:
-        print(f"[engine] Error processing trade: {type(e).__name__}: {e}")
+        _tm.event(WARNING, "trade_error", sampled=False, sym=sym,
+                  error=f"{type(e).__name__}: {e}")
         # Continue processing other trades
 
+# --------------------------------------------------------------------------- #
+# batch mode
+def _decode(msgs: list) -> tuple[list, list, list, list]:
+    """Trade dicts → parallel (sym, p, s, t) lists; non-trade frames are skipped."""
+    sym, px, sz, ts = [], [], [], []
+    for m in msgs:
+        if "status" in m or m.get("ev", "T") not in ("T", "OT"):
+            continue
+        try:
+            s, p, z, t = m["sym"], float(m["p"]), int(m["s"]), m["t"]
+        except (KeyError, TypeError, ValueError):
+            continue
+        sym.append(s); px.append(p); sz.append(z); ts.append(t)
+    return sym, px, sz, ts
+
+def _nbbo(syms: list, t_ms: np.ndarray, rows: np.ndarray | None = None):
+    """
+    (bid, ask, ok) per trade from the quote arrays; ok ⇔ quote known and fresh.
+    *rows* (quote-cache row per trade, -1 if unknown) skips the symbol lookups.
+    """
+    arr  = quotes.arrays()
+    n    = len(arr.symbols)
+    if rows is None:
+        rows = np.fromiter((-1 if (i := quotes.id_of(s)) is None else i for s in syms),
+                           dtype=np.intp, count=len(syms))
+    ok   = (rows >= 0) & (rows < n)
+    r    = np.where(ok, rows, 0)
+    bid, ask, q_ts, seq = arr.bid[r], arr.ask[r], arr.ts[r], arr.seq[r]
+    ok  &= seq > 0
+    torn = np.flatnonzero(ok & (seq & 1 == 1))       # mid-write: re-read through the seqlock
+    if torn.size:
+        bid, ask, q_ts = bid.copy(), ask.copy(), q_ts.copy()
+        for i in torn:
+            q = quotes.get(syms[i])
+            if q is None:
+                ok[i] = False
+            else:
+                bid[i], ask[i], q_ts[i] = q
+    ok &= (q_ts == 0) | (t_ms - q_ts <= MAX_QUOTE_AGE_MS)
+    return bid, ask, ok
+
+def _process_batch(msgs: list, *, eps: float) -> int:
+    """Classify, price and book a batch of trades; returns trades applied."""
+    syms, px, sz, ts = _decode(msgs)
+    if not syms:
+        return 0
+    px, sz, ts = np.asarray(px), np.asarray(sz), np.asarray(ts, dtype=float)
+
+    # strings are hashed once per trade (→ contract id); everything after is int-indexed
+    cid = contracts.ids(syms, strict=False)          # -1 ⇒ not an OCC symbol
+    _, first, inv = np.unique(cid, return_index=True, return_inverse=True)
+    u_row = np.fromiter((-1 if (i := quotes.id_of(syms[j])) is None else i for j in first),
+                        dtype=np.intp, count=len(first))
+    t_ms = np.where(ts > 1e14, ts / 1e6, ts)          # as _to_ms: ws ms / REST ns
+    _advance_clock(float(t_ms.max()))
+    bid, ask, ok = _nbbo(syms, t_ms, u_row[inv])
+    ok &= cid >= 0
+
+    buy  = ok & (px >= ask - eps)
+    sell = ok & ~buy & (px <= bid + eps)
+    take = np.flatnonzero(buy | sell)
+    if not take.size:
+        return 0
+
+    # one row per contract in the batch
+    u_cid, first, inv = np.unique(cid[take], return_index=True, return_inverse=True)
+    u_syms = contracts.symbols(u_cid)
+    K, call = contracts.strike[u_cid], contracts.is_call[u_cid]
+    exp_64 = contracts.expiry[u_cid]
+    exp   = exp_64.astype(np.int64)                  # days since the epoch
+    exp_d = exp_64.astype(object)                    # datetime.date, for book keys
+    sel  = take[first]
+    days = exp - np.floor(t_ms[sel] / 86_400_000)    # trade date, as _process_trade
+    tau  = np.maximum(days / 365.0, 1 / 365.0)
+    b, a = bid[sel], ask[sel]
+    spx_price = get_spot(_FALLBACK_SPOT)
+
+    sigma = np.empty(len(u_syms))
+    crossed = (b <= 0) | (a <= b)
+    for e in np.unique(exp):
+        g = np.flatnonzero(exp == e)
+        expiry = exp_d[g[0]]
+        live, dead = g[~crossed[g]], g[crossed[g]]
+        if live.size:
+            sigma[live] = _surface.refresh_many(
+                [u_syms[i] for i in live], (b[live] + a[live]) * 0.5, spx_price,
+                K[live], tau[live], is_call=call[live], expiry=expiry)
+        if dead.size:
+            sigma[dead] = _surface.smile_sigma(spx_price, K[dead], tau[dead], expiry=expiry)
+    sigma = np.where(np.isfinite(sigma) & (sigma > 0), sigma, 0.2)
+
+    _, γ, _, _ = bs_greeks_vec(spx_price, K, sigma, tau, call)
+    good = np.isfinite(γ) & (γ > 0)
+
+    n_u    = len(u_syms)
+    longs  = np.bincount(inv, weights=sz[take] * buy[take], minlength=n_u)
+    shorts = np.bincount(inv, weights=sz[take] * sell[take], minlength=n_u)
+    dgamma = γ * (shorts - longs)                    # BUY ⇒ dealer short γ
+    g      = np.flatnonzero(good)
+    keys   = list(zip(K[g].tolist(), call[g].tolist()))   # float: 4200.5 stays apart
+    _book.update_many(keys, longs[g], shorts[g], dgamma[g], exp_d[g])
+    _positions.update_many(keys, longs[g], shorts[g], dgamma[g], exp_d[g], sigma[g])
+    n = int(np.isin(inv, g).sum())
+    _tm.event(DEBUG, "batch", trades=len(msgs), applied=n, contracts=len(g),
+              dgamma=float(dgamma[g].sum()))
+    if _evlog is not None:
+        _evlog.write(EventLog.BATCH, time.time_ns(), 0, n, float(dgamma[g].sum()))
+    return n
+
+def _snapshot_gamma() -> float:
+    """
+    Book γ revalued at the live spot (one vectorized pass over open contracts);
+    the trade-time total if the spot feed is stale or silent.
+    """
+    spot = _fresh_spot()
+    if spot is None:
+        return _book.total_gamma()
+    return _positions.revalued_gamma(spot)
+
+def gamma_ladder(**kw) -> Ladder | None:
+    """Gamma-by-spot ladder of the live book (see `ArrayStrikeBook.ladder`); None without a fresh spot."""
+    spot = _fresh_spot()
+    return None if spot is None else _positions.ladder(spot, **kw)
+
+async def _drain(first, n: int, window_s: float) -> list:
+    """*first* plus whatever else arrives on TRADE_Q, up to *n* items / *window_s*."""
+    msgs = [first]
+    deadline = time.perf_counter() + window_s
+    while len(msgs) < n:
+        try:
+            msgs.append(TRADE_Q.get_nowait())
+        except asyncio.QueueEmpty:
+            if time.perf_counter() >= deadline:
+                break
+            await asyncio.sleep(0)                   # let producers run
+    return msgs
+
+# --------------------------------------------------------------------------- #
 async def run(snapshot_cb: Callable[[float, float], None], *, 
-              eps: float = 0.05, snapshot_interval: float = 1.0) -> None:
+              eps: float = 0.05, snapshot_interval: float = 1.0,
+              book_cb: Callable[[float, BookState], None] | None = None,
+              batch: int = ENGINE_BATCH, batch_window_us: float = ENGINE_BATCH_US) -> None:
     """
     snapshot_cb(ts: float, total_gamma: float)  called every `snapshot_interval` seconds.
+    book_cb(ts, BookState)                      same cadence, with a copy of the positions.
+    batch > 0 switches to micro-batch mode (see module docstring).
     """
+    configure_logging()
     last = time.time()
+    lost = 0                     # TRADE_Q dropped + coalesced at last report
     while True:
         try:
             msg = await asyncio.wait_for(TRADE_Q.get(), timeout=0.2)
-            await _process_trade(msg, eps=eps)
+            if batch > 0:
+                _process_batch(await _drain(msg, batch, batch_window_us * 1e-6), eps=eps)
+            else:
+                await _process_trade(msg, eps=eps)
         except asyncio.TimeoutError:
             pass
 
         now = time.time()
         if now - last >= snapshot_interval:
-            snapshot_cb(now, _book.total_gamma())
-            last = now
\ No newline at end of file
+            total = _snapshot_gamma()
+            snapshot_cb(now, total)
+            if book_cb is not None:
+                book_cb(now, _positions.state())
+            last = now
+            if _tm.enabled(DEBUG):
+                lad = gamma_ladder()
+                _tm.event(DEBUG, "snapshot", sampled=False, total_gamma=total,
+                          flip=None if lad is None else lad.flip)
+            if _evlog is not None:
+                _evlog.write(EventLog.SNAPSHOT, time.time_ns(), a=total)
+            st = TRADE_Q.stats()
+            if st.dropped + st.coalesced != lost:
+                lost = st.dropped + st.coalesced
+                _tm.event(WARNING, "queue_pressure", sampled=False, depth=st.depth,
+                          maxsize=st.maxsize, dropped=st.dropped,
+                          coalesced=st.coalesced, lag_ms=round(st.lag_ms))
\ No newline at end of file
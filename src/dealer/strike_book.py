@@ -10,27 +10,101 @@ class BookRow(NamedTuple):
     open_short: int
     net_gamma:  float   # dealer γ ( + ⇒ long γ, – ⇒ short γ )
 
+class BookTotals(NamedTuple):
+    gamma:       float  # dealer γ over the whole book
+    call_gamma:  float
+    put_gamma:   float
+    long:        int    # contracts bought by customers
+    short:       int    # contracts sold by customers
+
 class StrikeBook:
-    """Keeps intraday open-position counts and dealer γ per (strike, is_call)."""
+    """
+    Keeps intraday open-position counts and dealer γ per (strike, is_call).
+
+    Book-wide aggregates (total / call / put γ, contract counts, γ per
+    expiry) are maintained incrementally in update(), so every getter is
+    O(1) no matter how many strikes have traded.
+    """
 
     def __init__(self):
         self._long  = defaultdict(int)
         self._short = defaultdict(int)
         self._gamma = defaultdict(float)
+        self._reset_totals()
 
-    def update(self, key: tuple[int, bool], side: str, contracts: int, gamma: float):
+    def _reset_totals(self):
+        self._tot_gamma  = 0.0
+        self._call_gamma = 0.0
+        self._put_gamma  = 0.0
+        self._tot_long   = 0
+        self._tot_short  = 0
+        self._exp_gamma  = defaultdict(float)
+
+    def _apply(self, key, dl: int, ds: int, dg: float, expiry) -> None:
+        if dl:
+            self._long[key]  += dl
+            self._tot_long   += dl
+        if ds:
+            self._short[key] += ds
+            self._tot_short  += ds
+        self._gamma[key] += dg
+        self._tot_gamma  += dg
+        if key[1]:
+            self._call_gamma += dg
+        else:
+            self._put_gamma  += dg
+        if expiry is not None:
+            self._exp_gamma[expiry] += dg
+
+    def update(self, key: tuple[int, bool], side: str, contracts: int, gamma: float,
+               expiry=None):
         if side == Side.BUY:
-            self._long[key]  += contracts
-            self._gamma[key] -= gamma * contracts   # dealer short γ
+            self._apply(key, contracts, 0, -gamma * contracts, expiry)   # dealer short γ
         elif side == Side.SELL:
-            self._short[key] += contracts
-            self._gamma[key] += gamma * contracts   # dealer long γ
+            self._apply(key, 0, contracts, gamma * contracts, expiry)    # dealer long γ
         else:
             raise ValueError(side)
 
+    def update_many(self, keys, longs, shorts, gammas, expiries=None):
+        """
+        Apply pre-aggregated deltas from a batch of trades: per key, contracts
+        bought / sold by customers and the net dealer γ change.
+        """
+        if expiries is None:
+            expiries = [None] * len(keys)
+        for key, l, s, g, e in zip(keys, longs, shorts, gammas, expiries):
+            self._apply(key, int(l), int(s), float(g), e)
+
+    def reset(self):
+        self._long.clear()
+        self._short.clear()
+        self._gamma.clear()
+        self._reset_totals()
+
     # ---------- public getters ----------
     def row(self, key: tuple[int, bool]) -> BookRow:
-        return BookRow(self._long[key], self._short[key], self._gamma[key])
+        return BookRow(self._long.get(key, 0), self._short.get(key, 0),
+                       self._gamma.get(key, 0.0))
 
     def total_gamma(self) -> float:
-        return sum(self._gamma.values())
\ No newline at end of file
+        return self._tot_gamma
+
+    def call_gamma(self) -> float:
+        return self._call_gamma
+
+    def put_gamma(self) -> float:
+        return self._put_gamma
+
+    def net_contracts(self) -> int:
+        """Customer contracts bought minus sold (dealer is short this many)."""
+        return self._tot_long - self._tot_short
+
+    def expiry_gamma(self, expiry) -> float:
+        return self._exp_gamma.get(expiry, 0.0)
+
+    def gamma_by_expiry(self) -> dict:
+        return dict(self._exp_gamma)
+
+    def totals(self) -> BookTotals:
+        return BookTotals(self._tot_gamma, self._call_gamma, self._put_gamma,
+                          self._tot_long, self._tot_short)
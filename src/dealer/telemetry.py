@@ -0,0 +1,152 @@
+"""
+dealer.telemetry
+================
+Cheap, structured logging for the engine hot path.
+
+* `Telemetry.event(level, name, **fields)` is level-gated first (one cached
+  `isEnabledFor` check) and optionally sampled per event name, so a disabled
+  or sampled-out event costs a function call and nothing else.
+* Messages are formatted lazily, on the listener thread: `configure()` puts
+  a QueueHandler in front of the real handler, so the event loop only
+  appends a LogRecord to a queue -- no string building, no terminal I/O.
+* `EventLog` is an optional fixed-width binary log (numpy-readable) for
+  per-trade forensics without any text formatting at all.
+
+Env:
+    ENGINE_LOG_LEVEL   DEBUG | INFO | WARNING …   (default INFO)
+    ENGINE_LOG_SAMPLE  log 1 in N occurrences of each sampled event (default 1)
+    ENGINE_EVENT_LOG   path of the binary event log (unset ⇒ off)
+"""
+from __future__ import annotations
+import atexit, logging, logging.handlers, os, pathlib, queue, struct, sys, threading
+import numpy as np
+
+LOG_LEVEL  = os.getenv("ENGINE_LOG_LEVEL", "INFO").upper()
+LOG_SAMPLE = int(os.getenv("ENGINE_LOG_SAMPLE", "1"))
+EVENT_LOG  = os.getenv("ENGINE_EVENT_LOG")
+
+# --------------------------------------------------------------------------- #
+class _Fields:
+    """key=value rendering, deferred until a handler actually formats the record."""
+    __slots__ = ("f",)
+
+    def __init__(self, f: dict):
+        self.f = f
+
+    def __str__(self) -> str:
+        return " ".join(f"{k}={v}" for k, v in self.f.items())
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    # the stock QueueHandler formats in the caller; leave that to the listener
+    def prepare(self, record):
+        return record
+
+_listener: logging.handlers.QueueListener | None = None
+
+def configure(level: str | int = LOG_LEVEL, *, stream=None, name: str = "dealer") -> None:
+    """
+    Route the *name* logger through a background QueueListener (idempotent).
+    Does nothing if that logger already has handlers of its own.
+    """
+    global _listener
+    log = logging.getLogger(name)
+    log.setLevel(level)
+    if _listener is not None or log.handlers:
+        return
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    sink = logging.StreamHandler(stream or sys.stderr)
+    sink.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s"))
+    _listener = logging.handlers.QueueListener(q, sink)
+    _listener.start()
+    log.addHandler(_LazyQueueHandler(q))
+    log.propagate = False
+    atexit.register(_listener.stop)
+
+# --------------------------------------------------------------------------- #
+class Telemetry:
+    """
+    Named event emitter.  `sample=N` keeps 1 in N of each *sampled* event
+    name (pass sampled=False for rare events that must always be logged).
+    """
+
+    def __init__(self, name: str, *, sample: int = LOG_SAMPLE):
+        self.log    = logging.getLogger(name)
+        self.sample = max(int(sample), 1)
+        self._seen: dict[str, int] = {}
+
+    def enabled(self, level: int = logging.DEBUG) -> bool:
+        return self.log.isEnabledFor(level)
+
+    def event(self, level: int, name: str, *, sampled: bool = True, **fields) -> None:
+        if not self.log.isEnabledFor(level):
+            return
+        if sampled and self.sample > 1:
+            n = self._seen.get(name, 0)
+            self._seen[name] = n + 1
+            if n % self.sample:
+                return
+        self.log.log(level, "%s %s", name, _Fields(fields))
+
+# --------------------------------------------------------------------------- #
+class EventLog:
+    """
+    Append-only binary log of fixed 40-byte records, written by a daemon thread.
+
+        ts  int64   trade/event time (caller's unit)
+        code uint16 event type (EventLog.TRADE_CALL, …)
+        flag int16  e.g. +1 BUY / -1 SELL
+        n   int32   e.g. contracts
+        a, b, c float64 payload (strike, price, γ for trades)
+
+    Read back with `EventLog.read(path)` → NumPy structured array.
+    """
+    TRADE_CALL, TRADE_PUT, SNAPSHOT, BATCH = 1, 2, 3, 4
+    _REC   = struct.Struct("<qHhiddd")
+    DTYPE  = np.dtype([("ts", "<i8"), ("code", "<u2"), ("flag", "<i2"), ("n", "<i4"),
+                       ("a", "<f8"), ("b", "<f8"), ("c", "<f8")])
+    _FLUSH = 64 * 1024                           # bytes buffered before hand-off
+
+    def __init__(self, path: str | pathlib.Path):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._buf = bytearray()
+        self._q: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._writer, name="event-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, code: int, ts: int = 0, flag: int = 0, n: int = 0,
+              a: float = 0.0, b: float = 0.0, c: float = 0.0) -> None:
+        self._buf += self._REC.pack(int(ts), code, flag, n, a, b, c)
+        if len(self._buf) >= self._FLUSH:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buf:
+            self._q.put(bytes(self._buf))
+            self._buf.clear()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self.flush()
+            self._q.put(None)
+            self._thread.join()
+
+    def _writer(self) -> None:
+        with open(self.path, "ab") as fh:
+            while (chunk := self._q.get()) is not None:
+                fh.write(chunk)
+                fh.flush()
+
+    @classmethod
+    def read(cls, path) -> np.ndarray:
+        return np.fromfile(path, dtype=cls.DTYPE)
+
+_event_log: EventLog | None = None
+
+def event_log() -> EventLog | None:
+    """The process-wide binary log if ENGINE_EVENT_LOG is set."""
+    global _event_log
+    if _event_log is None and EVENT_LOG:
+        _event_log = EventLog(EVENT_LOG)
+    return _event_log
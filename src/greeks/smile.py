@@ -0,0 +1,148 @@
+# src/greeks/smile.py
+"""
+Raw-SVI smile per expiry.
+
+    w(k) = a + b · ( ρ·(k − m) + √((k − m)² + s²) )
+
+with k = ln(K/S) and w = σ²·τ (total implied variance).
+
+Fitting uses the quasi-explicit method: for a fixed (m, s) the remaining
+parameters are linear, so a small (m, s) grid is scanned with one batched
+least-squares solve and the best fit kept.  Evaluating σ(K) is O(1).
+
+Usage
+-----
+params = fit_svi(k, w)                      # None if too few points
+sigma  = svi_sigma(params, K, S, tau)
+
+sl = SmileSlice()                           # incremental, one per expiry
+sl.observe(sym, K, S, tau, sigma)           # refits every `refit_every` points
+sigma = sl.sigma(K, S, tau)                 # None until first fit
+"""
+
+from __future__ import annotations
+from typing import NamedTuple
+import numpy as np
+
+_MIN_POINTS = 5                  # five free parameters
+_M_GRID     = 9
+_S_GRID     = 8
+
+class SVIParams(NamedTuple):
+    a:   float
+    b:   float
+    rho: float
+    m:   float
+    s:   float
+
+def svi_variance(p: SVIParams, k):
+    """Total implied variance w(k) (scalar or array)."""
+    x = np.asarray(k, dtype=float) - p.m
+    return p.a + p.b * (p.rho * x + np.sqrt(x * x + p.s * p.s))
+
+def svi_sigma(p: SVIParams, K, S, tau):
+    """Implied vol σ(K) from a fitted slice (scalar or array)."""
+    w = svi_variance(p, np.log(np.asarray(K, dtype=float) / S))
+    return np.sqrt(np.maximum(w, 1e-12) / tau)
+
+def _scan(k, w, m_grid, s_grid):
+    """Best-fitting params over an (m, s) grid; linear part solved in one batch."""
+    m, s = np.meshgrid(m_grid, s_grid, indexing="ij")
+    m, s = m.ravel()[:, None], s.ravel()[:, None]            # (g, 1)
+
+    # linear part for every grid point at once:  w ≈ a + d·y + c·z
+    y = (k[None, :] - m) / s                                  # (g, n)
+    z = np.sqrt(y * y + 1.0)
+    X = np.stack([np.ones_like(y), y, z], axis=-1)            # (g, n, 3)
+    Xt = X.transpose(0, 2, 1)
+    beta = np.linalg.solve(Xt @ X + 1e-12 * np.eye(3), (Xt @ w)[..., None])[..., 0]
+
+    a, d, c = beta[:, 0], beta[:, 1], beta[:, 2]
+    c = np.maximum(c, 1e-12)                                  # b ≥ 0
+    d = np.clip(d, -c, c)                                     # |ρ| ≤ 1
+    a = np.maximum(a, -c * np.sqrt(1 - (d / c) ** 2))         # min variance ≥ 0
+    resid = a[:, None] + d[:, None] * y + c[:, None] * z - w
+    sse   = np.einsum("gn,gn->g", resid, resid)
+    i     = int(np.argmin(sse))
+
+    s_i = float(s[i, 0])
+    return SVIParams(a=float(a[i]), b=float(c[i] / s_i),
+                     rho=float(d[i] / c[i]), m=float(m[i, 0]), s=s_i)
+
+def fit_svi(k, w) -> SVIParams | None:
+    """
+    Least-squares raw-SVI fit of total variance *w* against log-moneyness *k*.
+    A coarse (m, s) scan is followed by one finer scan around the best cell.
+    Returns None when there are too few finite points to fit.
+    """
+    k = np.asarray(k, dtype=float)
+    w = np.asarray(w, dtype=float)
+    good = np.isfinite(k) & np.isfinite(w) & (w > 0)
+    k, w = k[good], w[good]
+    if k.size < _MIN_POINTS:
+        return None
+
+    lo, hi = k.min(), k.max()
+    span   = max(hi - lo, 1e-3)
+    s_grid = span * np.geomspace(0.01, 1.0, _S_GRID)
+    p      = _scan(k, w, np.linspace(lo, hi, _M_GRID), s_grid)
+
+    dm = span / (_M_GRID - 1)
+    ds = s_grid[1] / s_grid[0]
+    return _scan(k, w, np.linspace(p.m - dm, p.m + dm, _M_GRID),
+                 p.s * np.geomspace(1 / ds, ds, _S_GRID))
+
+class SmileSlice:
+    """
+    Latest (k, w) observation per symbol for one expiry, refit incrementally.
+    """
+
+    def __init__(self, *, refit_every: int = 8):
+        self.refit_every = refit_every
+        self.params: SVIParams | None = None
+        self._slot: dict[str, int] = {}
+        self._k: list[float] = []
+        self._w: list[float] = []
+        self._pending = 0
+
+    def observe(self, sym: str, K: float, S: float, tau: float, sigma: float) -> None:
+        k, w = float(np.log(K / S)), float(sigma * sigma * tau)
+        i = self._slot.get(sym)
+        if i is None:
+            self._slot[sym] = len(self._k)
+            self._k.append(k)
+            self._w.append(w)
+        else:
+            self._k[i], self._w[i] = k, w
+        self._pending += 1
+        if self._pending >= self.refit_every or self.params is None:
+            self.refit()
+
+    def observe_many(self, syms, K, S, tau, sigma) -> None:
+        n = len(syms)
+        K, tau, sigma = (np.broadcast_to(np.asarray(x, dtype=float), (n,))
+                         for x in (K, tau, sigma))
+        k = np.log(K / S)
+        w = sigma * sigma * tau
+        for sym, ki, wi in zip(syms, k.tolist(), w.tolist()):
+            i = self._slot.get(sym)
+            if i is None:
+                self._slot[sym] = len(self._k)
+                self._k.append(ki)
+                self._w.append(wi)
+            else:
+                self._k[i], self._w[i] = ki, wi
+        self._pending += n
+        self.refit()
+
+    def refit(self) -> None:
+        params = fit_svi(self._k, self._w)
+        if params is not None:
+            self.params = params
+            self._pending = 0
+
+    def sigma(self, K, S, tau):
+        """σ(K) from the current fit, or None if the slice is not fitted yet."""
+        if self.params is None:
+            return None
+        return svi_sigma(self.params, K, S, tau)
@@ -4,90 +4,204 @@ VolSurface
 ----------
 Cache implied vols for intraday quotes.
 
+Rows live in contiguous NumPy arrays (sigma, mid_ref, ts) addressed through
+a symbol → index map, so a burst of quote updates can be re-solved as one
+batch instead of one root-find per symbol.
+
+Every successful solve also feeds a raw-SVI smile for its expiry
+(`src.greeks.smile`).  Failed solves and contracts without a usable market
+are priced off that smile in O(1) instead of root-finding.
+
 Usage
 -----
 vs = VolSurface(eps=0.02, ttl=60.0)
-sigma = vs.get_sigma(sym, mid_price, S, K, tau)   # returns cached or recalculated σ
+sigma  = vs.get_sigma(sym, mid_price, S, K, tau, is_call=False)   # cached or re-solved σ
+sigmas = vs.refresh_many(syms, mids, S, strikes, taus)  # one batched solve for all stale rows
+sigma  = vs.smile_sigma(S, K, tau)                      # smile only, no root-find
 """
 
 from __future__ import annotations
 import time
-from dataclasses import dataclass
+import numpy as np
 
+from src.greeks.smile import SmileSlice
 from src.utils.greeks import implied_vol_call as iv_call
+from src.utils.greeks import implied_vol_put as iv_put
+from src.utils.greeks import implied_vol_vec as iv_batch
+from src.utils.greeks import estimate_vol_from_moneyness
 
-@dataclass
-class _CacheRow:
-    sigma: float
-    mid_ref: float
-    ts: float          # UNIX seconds
+_DEFAULT_SIGMA = 0.2             # used when nothing better is known
+
+def _expiry_key(tau, expiry):
+    """Smile slices are keyed by expiry, or by τ when no expiry is given."""
+    return expiry if expiry is not None else round(float(tau), 4)
 
 class VolSurface:
-    def __init__(self, *, eps: float = 0.02, ttl: float = 60.0):
+    def __init__(self, *, eps: float = 0.02, ttl: float = 60.0, capacity: int = 1024):
         """
-        eps : fractional mid-price move that triggers a new IV solve (e.g. 0.02 → 2 %).
-        ttl : seconds after which σ expires regardless of price drift.
+        eps      : fractional mid-price move that triggers a new IV solve (e.g. 0.02 → 2 %).
+        ttl      : seconds after which σ expires regardless of price drift.
+        capacity : initial number of rows; arrays double when full.
         """
         self.eps  = eps
         self.ttl  = ttl
-        self._map: dict[str, _CacheRow] = {}
+        self._idx: dict[str, int] = {}
+        self._smiles: dict[object, SmileSlice] = {}
+        self._alloc(max(int(capacity), 1))
+
+    # ------------------------------------------------------------------
+    def _alloc(self, capacity: int) -> None:
+        self._sigma   = np.full(capacity, np.nan)
+        self._mid_ref = np.full(capacity, np.nan)
+        self._ts      = np.full(capacity, -np.inf)    # UNIX seconds
+
+    def _grow(self, need: int) -> None:
+        cap = len(self._sigma)
+        if need <= cap:
+            return
+        while cap < need:
+            cap *= 2
+        old = (self._sigma, self._mid_ref, self._ts)
+        self._alloc(cap)
+        n = len(self._idx)
+        for new, prev in zip((self._sigma, self._mid_ref, self._ts), old):
+            new[:n] = prev[:n]
+
+    def _index(self, sym: str) -> int:
+        i = self._idx.get(sym)
+        if i is None:
+            i = len(self._idx)
+            self._grow(i + 1)
+            self._idx[sym] = i
+        return i
+
+    def _indices(self, symbols) -> np.ndarray:
+        return np.fromiter((self._index(s) for s in symbols), dtype=np.intp,
+                           count=len(symbols))
+
+    def _store(self, i, sigma, mid, now) -> None:
+        self._sigma[i]   = sigma
+        self._mid_ref[i] = mid
+        self._ts[i]      = now
+
+    def _slice(self, key) -> SmileSlice:
+        sl = self._smiles.get(key)
+        if sl is None:
+            sl = self._smiles[key] = SmileSlice()
+        return sl
+
+    def _smile(self, key, S, K, tau):
+        sl = self._smiles.get(key)
+        sigma = sl.sigma(K, S, tau) if sl is not None else None
+        if sigma is None:
+            sigma = estimate_vol_from_moneyness(np.abs(np.asarray(K, dtype=float) / S - 1.0))
+        return sigma if np.ndim(sigma) else float(sigma)
 
     # ------------------------------------------------------------------
+    def smile_sigma(self, S, K, tau, *, expiry=None):
+        """
+        σ(K) from the fitted smile for this expiry -- no root-find.
+        Falls back to `estimate_vol_from_moneyness` until a slice is fitted.
+        """
+        return self._smile(_expiry_key(np.ravel(tau)[0], expiry), S, K, tau)
+
     def get_sigma(self, sym: str, mid: float, S: float,
-                  K: float, tau: float, r: float = 0.0, q: float = 0.0) -> float:
+                  K: float, tau: float, r: float = 0.0, q: float = 0.0,
+                  *, expiry=None, is_call: bool = True) -> float:
         """
-        Return implied vol for *sym* given the latest mid-price.
+        Return implied vol for *sym* given the latest mid-price (solved as a
+        put when *is_call* is False).
         Recalculate if (|mid – mid_ref| / mid_ref) > eps  or  age > ttl.
         """
         now = time.time()
-        row = self._map.get(sym)
-        
+        i   = self._idx.get(sym)
+        known = i is not None and not np.isnan(self._sigma[i])
+
         # Check if we need to recalculate
-        needs_recalc = False
-        
-        if row is None:
-            needs_recalc = True
-        elif row.mid_ref is None:  # Handle case when mid_ref is None
-            needs_recalc = True
-        elif abs(mid - row.mid_ref) / (row.mid_ref or 1.0) > self.eps:  # Avoid division by zero
-            needs_recalc = True
-        elif (now - row.ts) > self.ttl:
-            needs_recalc = True
-            
+        needs_recalc = True
+        if known:
+            mid_ref = self._mid_ref[i]
+            needs_recalc = (
+                np.isnan(mid_ref)
+                or abs(mid - mid_ref) / (mid_ref or 1.0) > self.eps  # Avoid division by zero
+                or (now - self._ts[i]) > self.ttl
+            )
+
         if needs_recalc:
             try:
                 # Protect against invalid inputs
                 if not (S > 0 and K > 0 and tau > 0 and mid >= 0):
                     # If inputs are invalid, use a reasonable default or last known value
-                    if row is not None:
-                        return row.sigma
-                    return 0.2  # Default 20% volatility
-                    
+                    return float(self._sigma[i]) if known else _DEFAULT_SIGMA
+
                 # Calculate implied volatility
-                sigma = iv_call(mid, S, K, tau, r, q)
-                
-                # If calculation succeeded, update cache
-                if sigma is not None and sigma > 0:
-                    self._map[sym] = _CacheRow(sigma, mid, now)
-                    return sigma
+                sigma = (iv_call if is_call else iv_put)(mid, S, K, tau, r, q)
+
+                # If calculation failed, read the smile instead
+                if sigma is None or not sigma > 0:
+                    sigma = self.smile_sigma(S, K, tau, expiry=expiry)
                 else:
-                    # If calculation failed, use moneyness-based estimate
-                    moneyness = abs(K / S - 1.0)
-                    # Simple volatility smile approximation
-                    est_vol = 0.2 + 0.15 * moneyness  # Base vol + skew
-                    self._map[sym] = _CacheRow(est_vol, mid, now)
-                    return est_vol
+                    self._slice(_expiry_key(tau, expiry)).observe(sym, K, S, tau, sigma)
+                self._store(self._index(sym), sigma, mid, now)
+                return sigma
             except Exception as e:
                 # Log exception (in a real system)
                 print(f"[surface] Error calculating IV for {sym}: {e}")
                 # Return default or last known value
-                if row is not None:
-                    return row.sigma
-                return 0.2  # Default 20% volatility
-                
+                return float(self._sigma[i]) if known else _DEFAULT_SIGMA
+
         # Return cached value
-        return row.sigma
+        return float(self._sigma[i])
+
+    def refresh_many(self, symbols, mids, S, K, tau, *, is_call=True,
+                     expiry=None) -> np.ndarray:
+        """
+        Bulk version of get_sigma (all *symbols* share one expiry).
+
+        Finds every stale row (new, mid moved > eps, or older than ttl) with one
+        vectorized mask and re-solves them in a single batched IV call.
+        Rows with no market (mid <= 0 or NaN) and failed solves are read off
+        the smile.  Returns σ for all *symbols*, in order.
+        """
+        symbols = list(symbols)
+        n   = len(symbols)
+        now = time.time()
+        idx = self._indices(symbols)
+        mids, S, K, tau = (np.broadcast_to(np.asarray(x, dtype=float), (n,))
+                           for x in (mids, S, K, tau))
+        is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), (n,))
+        key = _expiry_key(tau[0], expiry) if n else None
+
+        mid_ref = self._mid_ref[idx]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            moved = np.abs(mids - mid_ref) / np.where(mid_ref == 0, 1.0, mid_ref) > self.eps
+        stale = (np.isnan(self._sigma[idx]) | np.isnan(mid_ref) | moved
+                 | ((now - self._ts[idx]) > self.ttl))
+        stale &= (S > 0) & (K > 0) & (tau > 0)
+        quoted = stale & (mids > 0)
+
+        sigma = np.full(n, np.nan)
+        ok    = np.zeros(n, dtype=bool)
+        if quoted.any():
+            sel = np.flatnonzero(quoted)
+            sigma[sel], ok[sel] = iv_batch(mids[sel], S[sel], K[sel], tau[sel], is_call[sel])
+            ok &= sigma > 0
+            if ok.any():
+                good = np.flatnonzero(ok)
+                self._slice(key).observe_many(
+                    [symbols[i] for i in good], K[good], S[good], tau[good], sigma[good])
+
+        miss = stale & ~ok
+        if miss.any():
+            sigma[miss] = self._smile(key, S[miss], K[miss], tau[miss])
+        if stale.any():
+            self._store(idx[stale], sigma[stale], mids[stale], now)
+
+        out = self._sigma[idx]
+        return np.where(np.isnan(out), _DEFAULT_SIGMA, out)
 
     # convenience
     def clear(self) -> None:
-        self._map.clear()
\ No newline at end of file
+        self._idx.clear()
+        self._smiles.clear()
+        self._alloc(len(self._sigma))
@@ -5,13 +5,15 @@ and store it here:
 data/parquet/spx/date=YYYY-MM-DD/HH_MM_SS.parquet
 """
 
-import datetime, os, pathlib, pandas as pd, math, sys
+import datetime, os, pathlib, pandas as pd, numpy as np, sys
 import dotenv
 from polygon import RESTClient
 
 # Add project root to path to allow importing from src
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
-from src.utils.greeks import bs_greeks, implied_vol, estimate_vol_from_moneyness, bs_greeks_dict
+from src.utils.greeks import bs_greeks_vec, implied_vol_vec, estimate_vol_from_moneyness
+from src.greeks.smile import fit_svi, svi_sigma
+from src.stream.spot_feed import get_spot
 
 dotenv.load_dotenv()
 client = RESTClient(os.getenv("POLYGON_KEY"))
@@ -19,6 +21,39 @@ client = RESTClient(os.getenv("POLYGON_KEY"))
 def _nan_if_none(x):
     return float("nan") if x is None else float(x)
 
+def _rest_spot() -> float:
+    """SPX price from REST -- try multiple API approaches."""
+    try:
+        # Method 1: Try previous close (reliable data point)
+        prev_close = client.get_previous_close("I:SPX")
+        print(f"Using SPX previous close: {prev_close.close}")
+        return prev_close.close
+    except Exception as e1:
+        try:
+            # Method 2: Try daily OHLC
+            daily = client.get_daily_open_close("I:SPX", datetime.date.today().isoformat())
+            print(f"Using SPX daily close: {daily.close}")
+            return daily.close
+        except Exception as e2:
+            try:
+                # Method 3: Try aggregates for today
+                from_date = datetime.date.today().isoformat()
+                to_date = from_date
+                aggs = client.get_aggs("I:SPX", 1, "day", from_date, to_date, limit=10)
+                if aggs:
+                    print(f"Using SPX aggregate close: {aggs[0].close}")
+                    return aggs[0].close
+                else:
+                    raise RuntimeError("No aggregate data available for I:SPX")
+            except Exception as e3:
+                # Fail with detailed error information
+                raise RuntimeError(
+                    f"Unable to get SPX price from any endpoint. "
+                    f"Previous close error: {e1}, "
+                    f"Daily OHLC error: {e2}, "
+                    f"Aggregates error: {e3}"
+                )
+
 def fetch_chain() -> pd.DataFrame:
     today = datetime.date.today().isoformat()
 
@@ -50,42 +85,14 @@ def fetch_chain() -> pd.DataFrame:
         raise RuntimeError(f"Failed to retrieve options chain: {e}")
     # ------------------------------------------------------------------
 
-# 2. INDEX PRICE - try multiple API approaches ───────────────────────
-    try:
-        # Method 1: Try previous close (reliable data point)
-        prev_close = client.get_previous_close("I:SPX")
-        under_px = prev_close.close
-        print(f"Using SPX previous close: {under_px}")
-    except Exception as e1:
-        try:
-            # Method 2: Try daily OHLC
-            daily = client.get_daily_open_close("I:SPX", datetime.date.today().isoformat())
-            under_px = daily.close
-            print(f"Using SPX daily close: {under_px}")
-        except Exception as e2:
-            try:
-                # Method 3: Try aggregates for today
-                from_date = datetime.date.today().isoformat()
-                to_date = from_date
-                aggs = client.get_aggs("I:SPX", 1, "day", from_date, to_date, limit=10)
-                if aggs:
-                    under_px = aggs[0].close
-                    print(f"Using SPX aggregate close: {under_px}")
-                else:
-                    raise RuntimeError("No aggregate data available for I:SPX")
-            except Exception as e3:
-                # Fail with detailed error information
-                raise RuntimeError(
-                    f"Unable to get SPX price from any endpoint. "
-                    f"Previous close error: {e1}, "
-                    f"Daily OHLC error: {e2}, "
-                    f"Aggregates error: {e3}"
-                )
+# 2. INDEX PRICE - in-process spot cache first, then REST fallbacks ──
+    under_px = get_spot()
+    if under_px is not None:
+        print(f"Using SPX spot from cache: {under_px}")
+    else:
+        under_px = _rest_spot()
     # ──────────────────────────────────────────────────────────────
 
-    # Calculate Greeks for options with missing data
-    risk_free_rate = 0.05  # 5% risk-free rate (can be adjusted)
-    today_dt = datetime.date.today()
     now = datetime.datetime.now()
     
     # Pre-calculate days to expiration for today's options
@@ -93,112 +100,61 @@ def fetch_chain() -> pd.DataFrame:
     expiry_dt = datetime.datetime.combine(expiry_date, datetime.time(16, 0))  # 4 PM expiry
     tau = max((expiry_dt - now).total_seconds() / 31536000, 1/365)  # seconds to years, clamped
     
-    print("Calculating Greeks for all options to ensure no NULLs...")
-    num_calculated = 0
-    
-    for opt_list in (calls, puts):
-        for opt in opt_list:
-            # Process every option to ensure complete Greeks data
-            # We're only using options that expire today, so tau is already calculated above
-            
-            # Determine option type
-            opt_type = "call" if opt.details.contract_type == "call" else "put"
-            
-            # Get implied volatility from API or calculate it
-            iv = getattr(opt.greeks, "iv", None) or getattr(opt.greeks, "implied_volatility", None)
-            
-            # If IV is missing, try to calculate it from option price
-            if iv is None or math.isnan(float(iv if iv is not None else "nan")) or (iv is not None and iv <= 0):
-                # Calculate mid price if bid and ask are available
-                bid = getattr(opt.last_quote, "bid", None)
-                ask = getattr(opt.last_quote, "ask", None)
-                
-                if bid is not None and ask is not None and bid > 0 and ask > 0:
-                    mid_price = (bid + ask) / 2
-                    try:
-                        # Calculate implied volatility using Brent's method
-                        iv = implied_vol(
-                            opt_type, 
-                            under_px, 
-                            opt.details.strike_price, 
-                            tau, 
-                            risk_free_rate, 
-                            mid_price
-                        )
-                    except Exception:
-                        iv = None
-                
-                # If IV calculation failed, estimate based on moneyness
-                if iv is None or math.isnan(float(iv if iv is not None else "nan")) or iv <= 0:
-                    moneyness = abs(opt.details.strike_price / under_px - 1)
-                    iv = estimate_vol_from_moneyness(moneyness)
-            
-            # Calculate Greeks with our improved bs_greeks function
-            opt.calculated_greeks = bs_greeks_dict(
-                opt_type,
-                under_px,
-                opt.details.strike_price,
-                tau,
-                risk_free_rate,
-                float(iv)
-            )
-            
-            num_calculated += 1
-    
-    print(f"Calculated Greeks for {num_calculated} options")
+    # Only today's contracts end up in the snapshot
+    opts    = [opt for opt in calls + puts if opt.details.expiration_date == today]
+    is_call = np.array([opt.details.contract_type == "call" for opt in opts], dtype=bool)
+    strike  = np.array([opt.details.strike_price for opt in opts], dtype=float)
+    bid     = [getattr(opt.last_quote, "bid", None) for opt in opts]
+    ask     = [getattr(opt.last_quote, "ask", None) for opt in opts]
+    mid     = np.array([(b + a) / 2 if b and a else np.nan
+                        for b, a in zip(bid, ask)], dtype=float)
+    iv      = np.array([
+        _nan_if_none(getattr(opt.greeks, "iv", None)
+                     or getattr(opt.greeks, "implied_volatility", None))
+        for opt in opts
+    ], dtype=float)
 
-    rows = []
-    for side, opt_list in (("C", calls), ("P", puts)):
-        for opt in opt_list:
-            if opt.details.expiration_date != today:
-                continue
-                
-            # Get option details
-            strike = opt.details.strike_price
-            bid = getattr(opt.last_quote, "bid", None)
-            ask = getattr(opt.last_quote, "ask", None)
-            
-            # Calculate mid price if both bid and ask are available
-            mid = (bid + ask) / 2 if (bid is not None and ask is not None) else None
-            
-            # Get iv from API response or calculate it
-            iv = getattr(opt.greeks, "iv", None)
-            
-            # Back-solve IV if Polygon didn't supply it or it's invalid
-            if iv is None or iv <= 0:
-                if mid:
-                    iv = implied_vol(mid, under_px, strike, tau, side)
-                if iv is None:  # still failed
-                    iv = 0.20  # ← minimal fallback
-            
-            # Calculate Greeks using simplified function
-            gamma, vega, theta = bs_greeks(under_px, strike, iv, tau, side)
-            
-            # Ensure gamma is never zero (for DuckDB casting purposes)
-            gamma = max(gamma, 1e-10) if not math.isnan(gamma) else 1e-10
-            
-            rows.append({
-                "type":   side,
-                "strike": strike,
-                "expiry": opt.details.expiration_date,
-                "bid":  bid,
-                "ask":  ask,
-                "volume": getattr(opt.day, "volume", 0),
-                # For testing, use a realistic open interest (10-100 contracts)
-                "open_interest": (getattr(opt.day, "open_interest", None) or 
-                                 getattr(opt.details, "open_interest", None) or 
-                                 (10 + int(50 * abs(strike/under_px - 1)))), # Higher OI for far OTM options
-                "iv":     iv,
-                "gamma":  gamma,
-                "vega":   vega,
-                "theta":  theta,
-                # Use API delta since we don't calculate it in our simplified function
-                "delta":  _nan_if_none(getattr(opt.calculated_greeks, "delta", None)) if hasattr(opt, "calculated_greeks") else
-                         _nan_if_none(getattr(opt.greeks, "delta", None)),
-                "under_px": under_px
-            })
-
-    return pd.DataFrame(rows)
+    # Back-solve IV where Polygon didn't supply a usable one
+    print(f"Calculating Greeks for {len(opts)} options in one pass...")
+    need = ~(iv > 0) & np.isfinite(mid)
+    if need.any():
+        sol, ok = implied_vol_vec(mid[need], under_px, strike[need], tau, is_call[need])
+        iv[need] = np.where(ok, sol, iv[need])
+
+    # Whatever is still unsolved is read off a smile fitted to the rest
+    miss = ~(iv > 0)
+    if miss.any():
+        params = fit_svi(np.log(strike[~miss] / under_px), iv[~miss] ** 2 * tau)
+        iv[miss] = (svi_sigma(params, strike[miss], under_px, tau) if params is not None
+                    else estimate_vol_from_moneyness(np.abs(strike[miss] / under_px - 1)))
+
+    # Whole chain re-greeked in a single kernel call
+    delta, gamma, vega, theta = bs_greeks_vec(under_px, strike, iv, tau, is_call)
+
+    # Ensure gamma is never zero (for DuckDB casting purposes)
+    gamma = np.where(np.isnan(gamma), 1e-10, np.maximum(gamma, 1e-10))
+
+    # For testing, use a realistic open interest (10-100 contracts) when missing
+    oi = [(getattr(opt.day, "open_interest", None) or 
+           getattr(opt.details, "open_interest", None) or 
+           (10 + int(50 * abs(k / under_px - 1))))  # Higher OI for far OTM options
+          for opt, k in zip(opts, strike)]
+
+    return pd.DataFrame({
+        "type":   np.where(is_call, "C", "P"),
+        "strike": [opt.details.strike_price for opt in opts],
+        "expiry": [opt.details.expiration_date for opt in opts],
+        "bid":    bid,
+        "ask":    ask,
+        "volume": [getattr(opt.day, "volume", 0) for opt in opts],
+        "open_interest": oi,
+        "iv":     iv,
+        "gamma":  gamma,
+        "vega":   vega,
+        "theta":  theta,
+        "delta":  delta,
+        "under_px": under_px,
+    })
 
 # ---- file-writer with explicit data type handling ----
 def write_parquet(df: pd.DataFrame):
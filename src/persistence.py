@@ -1,13 +1,89 @@
 """
 Persistence utilities for dealer gamma snapshots.
 Stores snapshots in DuckDB for querying and visualization.
+
+`append_gamma` never touches DuckDB: it drops the snapshot into a bounded
+in-memory buffer and returns.  A writer thread (own cursor on the same
+database) commits the buffer as one Arrow-table INSERT every
+OA_GAMMA_COMMIT_SECS, or as soon as OA_GAMMA_COMMIT_ROWS are waiting, so
+the engine can snapshot at 10-100 Hz without waiting on the database.  If
+the writer falls OA_GAMMA_BUFFER rows behind, new snapshots are dropped and
+counted (`writer().dropped`) rather than blocking the event loop.
+`flush_gamma()` waits until everything appended so far is committed.
+
+Per-strike history: `append_book(ts, book.state())` queues the whole
+`ArrayStrikeBook`, and the writer stores only the (expiry, strike, call/put)
+cells that changed since the previous snapshot in `intraday_strike_gamma`.
+Every OA_BOOK_KEYFRAME_SECS (and on the first snapshot of a process) it
+writes every open cell instead and marks the time in
+`intraday_book_keyframes`, so "book as of T" only has to scan back to the
+last keyframe:
+
+    get_book_asof(ts)                     # open positions per strike at ts
+    get_strike_history(5000, is_call=True, start=t0, end=t1)   # that strike's changes
+
+Env:
+    OA_GAMMA_DB            database file           (default data/intraday.db)
+    OA_GAMMA_COMMIT_ROWS   commit at this backlog  (default 500)
+    OA_GAMMA_COMMIT_SECS   … or this often         (default 1)
+    OA_GAMMA_BUFFER        max buffered snapshots  (default 100000)
+    OA_BOOK_BUFFER         max buffered books      (default 1000)
+    OA_BOOK_KEYFRAME_SECS  full-book interval      (default 300)
+    OA_GAMMA_READERS       pooled read cursors     (default 4)
+    OA_GAMMA_CACHE_TTL     read cache lifetime, s  (default 0.5)
+
+Reads never touch the writer's cursor or `_LOCK`.  `get_*` run on a small
+pool of cursors over the same database (DuckDB reads a committed snapshot,
+so they don't wait for the writer), and results are cached for
+OA_GAMMA_CACHE_TTL seconds -- a dashboard polled by many clients costs one
+query per TTL.  Every commit clears the cache, so a read after
+`flush_gamma()` sees the new rows.
 """
 
-import os, duckdb, pathlib, threading, atexit, datetime as dt
+import os, duckdb, pathlib, threading, atexit, logging, queue, time, datetime as dt
+from array import array
+import numpy as np
+import pandas as pd
+import pyarrow as pa
 
 _DB = pathlib.Path(os.getenv("OA_GAMMA_DB", "data/intraday.db"))
+_COMMIT_ROWS = int(os.getenv("OA_GAMMA_COMMIT_ROWS", "500"))
+_COMMIT_SECS = float(os.getenv("OA_GAMMA_COMMIT_SECS", "1"))
+_BUFFER_ROWS = int(os.getenv("OA_GAMMA_BUFFER", "100000"))
+_BOOK_BUFFER = int(os.getenv("OA_BOOK_BUFFER", "1000"))
+_KEYFRAME_SECS = float(os.getenv("OA_BOOK_KEYFRAME_SECS", "300"))
+_READERS     = int(os.getenv("OA_GAMMA_READERS", "4"))
+_CACHE_TTL   = float(os.getenv("OA_GAMMA_CACHE_TTL", "0.5"))
 _CONN = None  # We'll initialize the connection on first use
+_WRITER = None
+_READER = None
 _LOCK = threading.Lock()
+_LOG = logging.getLogger("persistence")
+
+def _init_schema(conn) -> None:
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS intraday_gamma (
+        ts DOUBLE,
+        dealer_gamma DOUBLE
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS intraday_strike_gamma (
+        ts DOUBLE,
+        expiry DATE,
+        strike DOUBLE,
+        is_call BOOLEAN,
+        long BIGINT,
+        short BIGINT,
+        dealer_gamma DOUBLE
+    )
+    """)
+    conn.execute("CREATE TABLE IF NOT EXISTS intraday_book_keyframes (ts DOUBLE)")
+    # no secondary index: rows arrive in ts order, so the per-row-group zone
+    # maps on ts prune time ranges, and strike filters are pushed into the
+    # same scan (DuckDB's ART index is only used for point lookups, never for
+    # the range scans the readers issue).  Drop the one older files carry.
+    conn.execute("DROP INDEX IF EXISTS strike_gamma_by_strike")
 
 def _get_connection():
     """Get or create a connection to the database"""
@@ -15,42 +91,289 @@ def _get_connection():
     if _CONN is None:
         _DB.parent.mkdir(parents=True, exist_ok=True)
         _CONN = duckdb.connect(str(_DB), read_only=False, config={'access_mode':'AUTOMATIC'})
-        _CONN.execute("""
-        CREATE TABLE IF NOT EXISTS intraday_gamma (
-            ts DOUBLE,
-            dealer_gamma DOUBLE
-        )
-        """)
+        _init_schema(_CONN)
         # Register function to close connection at exit
         atexit.register(lambda: _CONN.close() if _CONN else None)
     return _CONN
 
+class GammaWriter:
+    """
+    Buffers (ts, gamma) snapshots and book states and bulk-inserts them from
+    a background thread.  `conn` is only used to open the thread's own cursor.
+    """
+    def __init__(self, conn, *, commit_rows: int = _COMMIT_ROWS,
+                 commit_secs: float = _COMMIT_SECS, buffer_rows: int = _BUFFER_ROWS,
+                 book_buffer: int = _BOOK_BUFFER, keyframe_secs: float = _KEYFRAME_SECS,
+                 on_commit=None):
+        self.commit_rows = max(int(commit_rows), 1)
+        self.commit_secs = float(commit_secs)
+        self.buffer_rows = max(int(buffer_rows), 1)
+        self.book_buffer = max(int(book_buffer), 1)
+        self.keyframe_secs = float(keyframe_secs)
+        self.on_commit = on_commit            # called after each successful commit
+        self.dropped = 0                      # snapshots / books refused: buffer full
+        self.errors  = 0                      # failed commits (logged, rows lost)
+        self._ts, self._gamma = array("d"), array("d")
+        self._books: list = []                # (ts, BookState)
+        self._prev = None                     # last BookState written (writer thread)
+        self._key_ts = float("-inf")
+        self._added = self._done = 0          # rows accepted / taken by the writer
+        self._closed = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._cv   = threading.Condition()
+        self._cur  = conn.cursor()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="gamma-writer")
+        self._thread.start()
+
+    def add(self, ts: float, gamma: float) -> bool:
+        """Buffer one snapshot; False (and `dropped` += 1) if the buffer is full."""
+        with self._lock:
+            if len(self._ts) >= self.buffer_rows:
+                self.dropped += 1
+                return False
+            self._ts.append(ts)
+            self._gamma.append(gamma)
+            self._added += 1
+            due = len(self._ts) >= self.commit_rows
+        if due:
+            self._wake.set()
+        return True
+
+    def add_book(self, ts: float, state) -> bool:
+        """Buffer an `ArrayStrikeBook.state()`; False if the book buffer is full."""
+        with self._lock:
+            if len(self._books) >= self.book_buffer:
+                self.dropped += 1
+                return False
+            self._books.append((ts, state))
+            self._added += 1
+            due = len(self._books) >= self.commit_rows
+        if due:
+            self._wake.set()
+        return True
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every snapshot added so far is committed (True) or *timeout*."""
+        with self._lock:
+            target = self._added
+        self._wake.set()
+        with self._cv:
+            return self._cv.wait_for(
+                lambda: self._done >= target or not self._thread.is_alive(), timeout)
+
+    def close(self) -> None:
+        """Commit what is buffered and stop the thread (idempotent)."""
+        with self._lock:
+            self._closed = True
+        self._wake.set()
+        self._thread.join()
+
+    def __len__(self) -> int:
+        return len(self._ts) + len(self._books)
+
+    # ---------- writer thread ----------
+    def _run(self) -> None:
+        try:
+            while True:
+                self._wake.wait(self.commit_secs)
+                self._wake.clear()
+                with self._lock:
+                    ts, gamma, books = self._ts, self._gamma, self._books
+                    self._ts, self._gamma, self._books = array("d"), array("d"), []
+                    closed = self._closed
+                if ts or books:
+                    self._commit(ts, gamma, books)
+                with self._cv:
+                    self._done += len(ts) + len(books)
+                    self._cv.notify_all()
+                if closed:
+                    break
+        finally:
+            self._cur.close()
+
+    def _commit(self, ts: array, gamma: array, books: list) -> None:
+        cur = self._cur
+        try:
+            tables = []
+            if ts:
+                tables.append(("intraday_gamma", pa.table({
+                    "ts": np.frombuffer(ts, np.float64),
+                    "dealer_gamma": np.frombuffer(gamma, np.float64)})))
+            if books:
+                deltas, keys = zip(*(self._delta(t, st) for t, st in books))
+                tables.append(("intraday_strike_gamma", pa.concat_tables(deltas)))
+                keys = [t for t in keys if t is not None]
+                if keys:
+                    tables.append(("intraday_book_keyframes",
+                                   pa.table({"ts": pa.array(keys, pa.float64())})))
+            cur.begin()
+            for name, tbl in tables:
+                cur.register("_batch", tbl)
+                try:
+                    cur.execute(f"INSERT INTO {name} BY NAME SELECT * FROM _batch")
+                finally:
+                    cur.unregister("_batch")
+            cur.commit()
+        except Exception:
+            self.errors += 1
+            self._prev = None                 # deltas were lost: next book is a keyframe
+            _LOG.exception("gamma commit failed (%d snapshots, %d books lost)",
+                           len(ts), len(books))
+            try:
+                cur.rollback()
+            except Exception:
+                pass
+            return
+        if self.on_commit is not None:
+            self.on_commit()
+
+    def _delta(self, ts: float, st) -> tuple[pa.Table, float | None]:
+        """Rows of *st* that differ from the previous book (all open rows on a keyframe)."""
+        prev, shape = self._prev, st.gamma.shape
+        key = (prev is None or ts - self._key_ts >= self.keyframe_secs
+               or any(p > n for p, n in zip(prev.gamma.shape, shape)))
+        if key:
+            changed = (st.long != 0) | (st.short != 0) | (st.gamma != 0)
+            self._key_ts = ts
+        else:
+            changed = np.zeros(shape, bool)
+            E, S, _ = prev.gamma.shape
+            for cur, old in ((st.long, prev.long), (st.short, prev.short), (st.gamma, prev.gamma)):
+                pad = np.zeros_like(cur)
+                pad[:E, :S] = old
+                changed |= cur != pad
+        self._prev = st
+        e, k, c = np.nonzero(changed)
+        expiry = np.array(st.expiries, dtype="datetime64[D]")[e]     # None → NaT → NULL
+        tbl = pa.table({
+            "ts":           pa.array(np.full(e.size, ts)),
+            "expiry":       pa.array(expiry, pa.date32(), from_pandas=True),
+            "strike":       pa.array(np.asarray(st.strikes, dtype=float)[k]),
+            "is_call":      pa.array(c.astype(bool)),
+            "long":         pa.array(st.long[e, k, c]),
+            "short":        pa.array(st.short[e, k, c]),
+            "dealer_gamma": pa.array(st.gamma[e, k, c]),
+        })
+        return tbl, ts if key else None
+
+def writer() -> GammaWriter:
+    """The process-wide writer, started on first use and drained at exit."""
+    global _WRITER
+    if _WRITER is None:
+        invalidate = reader().invalidate         # before taking _LOCK (reader() takes it)
+        with _LOCK:
+            if _WRITER is None:
+                _WRITER = GammaWriter(_get_connection(), on_commit=invalidate)
+                atexit.register(_WRITER.close)   # runs before the connection closes
+    return _WRITER
+
 def append_gamma(ts: float, gamma: float) -> None:
     """
-    Thread-safe append of a gamma snapshot to the database.
+    Queue a gamma snapshot for the database; returns immediately.
     
     Args:
         ts: Unix timestamp (seconds since epoch)
         gamma: Total dealer gamma value
     """
-    with _LOCK:
-        conn = _get_connection()
-        conn.execute(
-            "INSERT INTO intraday_gamma VALUES (?, ?)",
-            (ts, gamma),
-        )
+    writer().add(ts, gamma)
+
+def append_book(ts: float, state) -> None:
+    """
+    Queue a per-strike book state (`ArrayStrikeBook.state()`); only the
+    rows that changed since the previous one are stored.
+    """
+    writer().add_book(ts, state)
+
+def flush_gamma(timeout: float | None = None) -> bool:
+    """Wait until every appended snapshot is committed."""
+    return _WRITER.flush(timeout) if _WRITER is not None else True
+
+class Reader:
+    """
+    Pool of cursors on `conn` for the read API plus a short-TTL result cache.
+    The pool only ever runs the `get_*` queries; writes go through GammaWriter.
+    """
+    def __init__(self, conn, *, size: int = _READERS, ttl: float = _CACHE_TTL,
+                 max_entries: int = 256):
+        self.ttl = float(ttl)
+        self.max_entries = max(int(max_entries), 1)
+        self.hits = self.misses = 0
+        self._conn = conn
+        self._pool: queue.LifoQueue = queue.LifoQueue()
+        self._free = max(int(size), 1)        # cursors that may still be opened
+        self._lock = threading.Lock()
+        self._cache: dict = {}                # key → (expires, generation, result)
+        self._gen = 0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._gen += 1
+            self._cache.clear()
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._free:
+                self._free -= 1
+                return self._conn.cursor()
+        return self._pool.get()               # all cursors busy: wait for one
+
+    def query(self, sql: str, params: dict | None = None, *, one: bool = False):
+        """fetchone() (one=True) or fetchdf() of *sql*, served from cache while fresh."""
+        key = (sql, one, tuple(sorted((params or {}).items())))
+        now = time.monotonic()
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None and hit[0] > now:
+                self.hits += 1
+                return hit[2].copy() if isinstance(hit[2], pd.DataFrame) else hit[2]
+            self.misses += 1
+            gen = self._gen
+        cur = self._acquire()
+        try:
+            res = cur.execute(sql, params or {})
+            out = res.fetchone() if one else res.fetchdf()
+        finally:
+            self._pool.put(cur)
+        if self.ttl > 0:
+            with self._lock:
+                if gen == self._gen:          # no commit landed while we read
+                    if len(self._cache) >= self.max_entries:
+                        self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+                    self._cache[key] = (now + self.ttl, gen, out)
+        return out.copy() if isinstance(out, pd.DataFrame) else out
+
+def reader() -> Reader:
+    """The process-wide read pool, on the writer's database."""
+    global _READER
+    if _READER is None:
+        with _LOCK:
+            if _READER is None:
+                _READER = Reader(_get_connection())
+    return _READER
+
+def _local_time(ts) -> np.ndarray:
+    """Unix seconds → 'YYYY-MM-DD HH:MM:SS' in local time, one offset lookup per quarter hour."""
+    ts = np.asarray(ts, dtype=float)
+    q, inv = np.unique(np.floor(ts / 900) * 900, return_inverse=True)
+    off = np.array([dt.datetime.fromtimestamp(x).astimezone().utcoffset().total_seconds()
+                    for x in q.tolist()])
+    local = pd.to_datetime(ts + off[inv.ravel()], unit="s")
+    return local.strftime("%Y-%m-%d %H:%M:%S").to_numpy()
 
 def get_latest_gamma():
     """Get the latest gamma snapshot"""
-    with _LOCK:
-        conn = _get_connection()
-        result = conn.execute("""
-        SELECT ts, dealer_gamma
-        FROM intraday_gamma
-        ORDER BY ts DESC
-        LIMIT 1
-        """).fetchone()
-        
+    result = reader().query("""
+    SELECT ts, dealer_gamma
+    FROM intraday_gamma
+    ORDER BY ts DESC
+    LIMIT 1
+    """, one=True)
+
     if result:
         ts = result[0]
         return {
@@ -62,17 +385,52 @@ def get_latest_gamma():
 
 def get_gamma_history(limit=100):
     """Get historical gamma values"""
-    with _LOCK:
-        conn = _get_connection()
-        df = conn.execute(f"""
-        SELECT ts, dealer_gamma
-        FROM intraday_gamma
-        ORDER BY ts DESC
-        LIMIT {limit}
-        """).fetchdf()
-    
+    df = reader().query("""
+    SELECT ts, dealer_gamma
+    FROM intraday_gamma
+    ORDER BY ts DESC
+    LIMIT $limit
+    """, {"limit": int(limit)})
+
     if not df.empty:
         # Convert ts to readable time
-        df['time'] = df['ts'].apply(lambda x: dt.datetime.fromtimestamp(x).strftime('%Y-%m-%d %H:%M:%S'))
-    
-    return df
\ No newline at end of file
+        df['time'] = _local_time(df['ts'].to_numpy())
+
+    return df
+
+def get_book_asof(ts: float):
+    """
+    Open positions per (expiry, strike, call/put) as of *ts*: the latest
+    row of each cell since the last keyframe at or before *ts*.
+    """
+    return reader().query("""
+    WITH k AS (SELECT max(ts) AS t0 FROM intraday_book_keyframes WHERE ts <= $ts),
+    cells AS (
+        SELECT expiry, strike, is_call, max(s.ts) AS ts,
+               arg_max(long, s.ts) AS long, arg_max(short, s.ts) AS short,
+               arg_max(dealer_gamma, s.ts) AS dealer_gamma
+        FROM intraday_strike_gamma s, k
+        WHERE s.ts >= k.t0 AND s.ts <= $ts
+        GROUP BY expiry, strike, is_call
+    )
+    SELECT * FROM cells
+    WHERE long <> 0 OR short <> 0 OR dealer_gamma <> 0
+    ORDER BY strike, is_call, expiry
+    """, {"ts": ts})
+
+def get_strike_history(strike: float, *, is_call: bool | None = None, expiry=None,
+                       start: float | None = None, end: float | None = None):
+    """
+    Changes of one strike over time (a step series: each row holds until the
+    next one for the same expiry / call-put), oldest first.
+    """
+    return reader().query("""
+    SELECT ts, expiry, is_call, long, short, dealer_gamma
+    FROM intraday_strike_gamma
+    WHERE strike = $strike
+      AND ($is_call IS NULL OR is_call = $is_call)
+      AND ($expiry IS NULL OR expiry = $expiry)
+      AND ts >= coalesce($start, '-inf'::DOUBLE) AND ts <= coalesce($end, 'inf'::DOUBLE)
+    ORDER BY ts, expiry, is_call
+    """, {"strike": float(strike), "is_call": is_call, "expiry": expiry,
+          "start": start, "end": end})
@@ -0,0 +1,112 @@
+# ---------- src/stream/bounded_queue.py ----------
+"""
+asyncio.Queue with an explicit overflow policy and cheap metrics.
+
+    q = BoundedQueue(50_000, policy="drop_oldest")
+    q.put_nowait(msg)            # never raises QueueFull unless policy="block"
+    q.stats()                    # QueueStats(depth=…, dropped=…, lag_ms=…)
+
+Policies (what happens to a put when the queue is full):
+  block        – the producer waits (plain asyncio.Queue behaviour)
+  drop_oldest  – the oldest pending item is discarded to make room
+  coalesce     – the item is merged into a pending item with the same key
+                 (`merge(pending, new)` mutates *pending*); if there is none,
+                 falls back to drop_oldest
+
+Lag is measured per item from enqueue to dequeue with time.monotonic().
+"""
+
+from __future__ import annotations
+import asyncio, time
+from collections import deque
+from typing import Any, Callable, NamedTuple
+
+POLICIES = ("block", "drop_oldest", "coalesce")
+
+class QueueStats(NamedTuple):
+    depth:      int
+    maxsize:    int
+    high_water: int          # deepest the queue has been
+    put:        int          # items accepted (including coalesced)
+    got:        int
+    dropped:    int
+    coalesced:  int
+    lag_ms:     float        # age of the oldest pending item
+    max_lag_ms: float        # worst enqueue→dequeue delay seen
+
+class BoundedQueue(asyncio.Queue):
+    def __init__(self, maxsize: int, *, policy: str = "block",
+                 key: Callable[[Any], Any] | None = None,
+                 merge: Callable[[Any, Any], None] | None = None) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}, got {policy!r}")
+        if policy == "coalesce" and (key is None or merge is None):
+            raise ValueError("policy='coalesce' needs key= and merge=")
+        if maxsize <= 0 and policy != "block":
+            raise ValueError(f"policy={policy!r} needs a positive maxsize")
+        super().__init__(maxsize)
+        self.policy = policy
+        self._key   = key if policy == "coalesce" else None   # only coalesce indexes by key
+        self._merge = merge
+        self._high_water = self._n_put = self._n_got = 0
+        self._dropped = self._coalesced = 0
+        self._max_lag = 0.0
+
+    # asyncio.Queue storage hooks ------------------------------------------ #
+    def _init(self, maxsize):
+        self._queue:   deque = deque()
+        self._enq_t:   deque = deque()           # monotonic enqueue time, parallel to _queue
+        self._pending: dict  = {}                # key → queued item (coalesce only)
+
+    def _put(self, item):
+        self._queue.append(item)
+        self._enq_t.append(time.monotonic())
+        if self._key is not None:
+            self._pending[self._key(item)] = item
+        self._n_put += 1
+        if len(self._queue) > self._high_water:
+            self._high_water = len(self._queue)
+
+    def _get(self):
+        item = self._pop()
+        lag = time.monotonic() - self._last_t
+        if lag > self._max_lag:
+            self._max_lag = lag
+        self._n_got += 1
+        return item
+
+    def _pop(self):
+        item = self._queue.popleft()
+        self._last_t = self._enq_t.popleft()
+        if self._key is not None:
+            k = self._key(item)
+            if self._pending.get(k) is item:
+                del self._pending[k]
+        return item
+
+    # overflow --------------------------------------------------------------- #
+    def put_nowait(self, item) -> None:
+        if self.policy != "block" and self.full():
+            if self.policy == "coalesce":
+                pending = self._pending.get(self._key(item))
+                if pending is not None:
+                    self._merge(pending, item)
+                    self._coalesced += 1
+                    self._n_put += 1
+                    return
+            self._pop()
+            self.task_done()                     # the dropped item will never be processed
+            self._dropped += 1
+        super().put_nowait(item)
+
+    async def put(self, item) -> None:
+        if self.policy == "block":
+            return await super().put(item)
+        self.put_nowait(item)
+
+    # metrics ---------------------------------------------------------------- #
+    def stats(self) -> QueueStats:
+        lag = time.monotonic() - self._enq_t[0] if self._enq_t else 0.0
+        return QueueStats(self.qsize(), self.maxsize, self._high_water,
+                          self._n_put, self._n_got, self._dropped, self._coalesced,
+                          lag * 1e3, self._max_lag * 1e3)
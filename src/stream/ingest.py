@@ -0,0 +1,92 @@
+# ---------- src/stream/ingest.py ----------
+"""
+asyncio ingestion: one Polygon options websocket, quotes and trades multiplexed.
+
+    from src.stream.ingest import run as ingest_run
+    await ingest_run(symbols)            # Q.<sym> + T.<sym> on one socket
+
+Quotes go straight into `quote_cache` (no await on the hot path); trades are
+side-classified, written to the trade sink and pushed onto `TRADE_Q`, which
+the dealer engine consumes in the same event loop.  No threads, no blocking
+sockets: keep-alive is aiohttp's heartbeat and reconnects back off
+exponentially.  A frame whose handler raises (malformed message, sink
+error) is logged, counted in `errors` and skipped; it never costs the
+socket.  Because this loop is the only quote writer it also runs the
+periodic stale-symbol sweep.
+"""
+
+from __future__ import annotations
+import asyncio, logging, os, time
+
+from .polygon_client import iter_messages
+from .quote_cache    import quote_cache
+from .nbbo_feed      import _handle as _on_quote
+from .trade_feed     import _handle as _on_trade
+from src.utils.contracts import contracts
+
+_LOG = logging.getLogger("ingest")
+
+WS_URL      = "wss://socket.polygon.io/options"
+DELAYED_URL = "wss://delayed.polygon.io/options"
+
+BACKOFF_MIN    = 1.0             # seconds; doubled after every failed connect
+BACKOFF_MAX    = 30.0
+SWEEP_EVERY    = 30.0            # seconds between stale-symbol sweeps
+EVICT_AFTER_MS = float(os.getenv("QUOTE_EVICT_MS", "600000"))   # 10 min without a quote
+
+_TRADE_KEYS = frozenset(("sym", "p", "s", "t"))
+
+errors = 0                       # frames whose handler raised (skipped, socket kept)
+
+def subscription(symbols=None, *, quotes: bool = True, trades: bool = True) -> str:
+    """Polygon `params` string: per-symbol channels, or the firehose if no symbols."""
+    chans = []
+    if quotes:
+        chans += [f"Q.{s}" for s in symbols] if symbols else [os.getenv("NBBO_SUBS", "Q.*")]
+    if trades:
+        chans += [f"T.{s}" for s in symbols] if symbols else ["T.*"]
+    return ",".join(chans)
+
+async def run(symbols=None, *, quotes: bool = True, trades: bool = True,
+              delayed: bool = False) -> None:
+    """Stream forever; reconnects with exponential back-off."""
+    global errors
+    if symbols:
+        contracts.ids(symbols, strict=False)     # ids fixed at subscription time
+    url     = DELAYED_URL if delayed else WS_URL
+    params  = subscription(symbols, quotes=quotes, trades=trades)
+    backoff = BACKOFF_MIN
+    last_sweep = time.monotonic()
+    _LOG.info("ingest: %s (%d channels)", url, params.count(",") + 1)
+
+    while True:
+        try:
+            async for msg in iter_messages(url, params):
+                backoff = BACKOFF_MIN
+                ev = msg.get("ev")
+                try:
+                    if ev == "Q":
+                        if quotes:
+                            _on_quote(msg)
+                    elif ev == "T" or (ev is None and _TRADE_KEYS <= msg.keys()):
+                        if trades:
+                            await _on_trade(msg)
+                except Exception as exc:
+                    errors += 1
+                    if errors & (errors - 1) == 0:       # 1, 2, 4, 8, … : no log flood
+                        _LOG.warning("skipped %s frame (%s: %s); %d bad frames so far",
+                                     ev, type(exc).__name__, exc, errors)
+
+                if quotes and time.monotonic() - last_sweep >= SWEEP_EVERY:
+                    dead = quote_cache.sweep(EVICT_AFTER_MS, evict=True)
+                    if dead:
+                        _LOG.info("evicted %d symbols with no quote for %.0f s",
+                                  len(dead), EVICT_AFTER_MS / 1e3)
+                    last_sweep = time.monotonic()
+            _LOG.warning("ingest WS closed — reconnecting in %.0f s", backoff)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            _LOG.error("ingest WS crashed: %s — reconnecting in %.0f s", exc, backoff)
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, BACKOFF_MAX)
@@ -1,18 +1,20 @@
-import os, aiohttp, asyncio, json, websocket, ssl, time, logging  # websocket-client pkg
-from typing import Any
-
-def _first_dict(msg):
-    """Polygon wraps every control frame in a 1-element list; unwrap it."""
-    if isinstance(msg, list):
-        return msg[0] if msg else {}
-    return msg
+from __future__ import annotations
+import os, aiohttp, json
 
 _BASE = "https://api.polygon.io/v3/quotes/{}"
-_API_KEY = os.environ["POLYGON_KEY"]
+
+def _api_key() -> str:
+    key = (
+        os.getenv("POLYGON_API_KEY")    # most common var name
+        or os.getenv("POLYGON_KEY")     # legacy name used elsewhere
+    )
+    if not key:
+        raise RuntimeError("POLYGON_API_KEY env-var not set")
+    return key
 
 async def fetch_quote(sess: aiohttp.ClientSession, occ_ticker: str):
     url = _BASE.format(occ_ticker)
-    params = {"limit": 1, "apiKey": _API_KEY}
+    params = {"limit": 1, "apiKey": _api_key()}
     async with sess.get(url, params=params, timeout=10) as r:
         r.raise_for_status()
         js = await r.json()
@@ -20,30 +22,38 @@ async def fetch_quote(sess: aiohttp.ClientSession, occ_ticker: str):
 
 
 # --------------------------------------------------------------------------- #
-def make_ws(url: str):
-    ws = websocket.create_connection(url, ping_interval=30)
-
-    # 1️⃣  initial "connected" frame ----------------------------------------
-    raw = ws.recv()
-    print("RAW FRAME-1:", raw)          #  <<––-- add this
-    frame = _first_dict(json.loads(raw))
-    if frame.get("status") != "connected":
-        raise RuntimeError(f"Polygon WS handshake failed: {frame}")
-
-    # 2️⃣  send auth --------------------------------------------------------
-    api_key = (
-        os.getenv("POLYGON_API_KEY")    # most common var name
-        or os.getenv("POLYGON_KEY")     # legacy name used elsewhere
-    )
-    if not api_key:
-        raise RuntimeError("POLYGON_API_KEY env-var not set")
-    ws.send(json.dumps({"action": "auth", "params": api_key}))
-
-    # 3️⃣  expect auth_success ---------------------------------------------
-    raw = ws.recv()
-    print("RAW FRAME-2:", raw)          #  <<––-- add this
-    frame = _first_dict(json.loads(raw))
-    if frame.get("status") != "auth_success":
-        raise RuntimeError(f"Polygon WS auth failed: {frame}")
-
-    return ws
\ No newline at end of file
+async def iter_messages(url: str, params: str, *, session: aiohttp.ClientSession | None = None,
+                        heartbeat: float = 25.0):
+    """
+    Async generator over Polygon data messages (dicts) from one aiohttp websocket.
+
+    The handshake is driven by Polygon's own status frames: "connected" →
+    send auth, "auth_success" → send subscribe(*params*).  Every non-status
+    message is yielded as-is.  Keep-alive is aiohttp's websocket heartbeat,
+    so no ping thread is needed.  Returns when the socket closes.
+    """
+    own = session is None
+    if own:
+        session = aiohttp.ClientSession()
+    try:
+        async with session.ws_connect(url, heartbeat=heartbeat) as ws:
+            async for raw in ws:
+                if raw.type == aiohttp.WSMsgType.ERROR:
+                    raise RuntimeError(f"websocket error: {ws.exception()}")
+                if raw.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                frames = json.loads(raw.data)
+                for msg in (frames if isinstance(frames, list) else [frames]):
+                    if msg.get("ev") != "status":
+                        yield msg
+                        continue
+                    status = msg.get("status")
+                    if status == "connected":
+                        await ws.send_str(json.dumps({"action": "auth", "params": _api_key()}))
+                    elif status == "auth_success":
+                        await ws.send_str(json.dumps({"action": "subscribe", "params": params}))
+                    elif status == "auth_failed":
+                        raise RuntimeError(f"Polygon WS auth failed: {msg}")
+    finally:
+        if own:
+            await session.close()
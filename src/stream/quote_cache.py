@@ -1,40 +1,294 @@
 # ---------- src/stream/quote_cache.py ----------
 """
-Thread-safe in-memory cache for NBBO quotes.
+Columnar in-memory cache for NBBO quotes -- the ONE quote store.
+
+Every feed (nbbo_feed, ws_client, rest_simulator, mock quotes) writes into
+`quote_cache` and every consumer (engine, trade side inference, intraday
+snapshots) reads from it.  `quotes` is the same object under the name the
+dict-era modules used; it still behaves like a mapping of
+symbol → Quote(bid, ask, ts).
+
+Each symbol is interned to a dense row id; bid/ask/sizes/ts live in
+preallocated typed columns that NumPy can view without copying.  A tick is a handful of scalar stores -- no dict
+is allocated per quote.
+
+Concurrency: one writer (the feed), any number of readers.  Every row has a
+sequence counter (seqlock): the writer bumps it to odd before writing and to
+even afterwards; readers retry if the counter was odd or changed under them.
+Readers never take a lock.  Growing the columns swaps in a new `_Columns`
+object in one reference assignment, so readers always see a consistent set.
+
+Staleness: the `ts` column doubles as the age index.  `get(..., max_age_ms=)`
+refuses quotes older than the caller's horizon, `ages()`/`age_histogram()`
+describe the whole book in one vectorized pass, and `sweep()` flags or
+evicts dead symbols in bulk; evicted rows go on a free list and are reused
+by the next new symbol.  Eviction is a writer-side operation.
 """
 
-import threading
-from typing import Dict, Any
+from __future__ import annotations
+import threading, time
+from operator import index as _index
+from array import array
+from typing import Iterator, NamedTuple, Protocol
+import numpy as np
+
+# default age buckets (ms) for age_histogram(); last bucket is open-ended
+AGE_EDGES_MS = (0, 50, 100, 250, 500, 1_000, 5_000, 30_000, 300_000, np.inf)
+
+def _now_ms() -> float:
+    return time.time() * 1e3
+
+class Quote(NamedTuple):
+    """Top of book as seen by readers; unpacks as (bid, ask, ts)."""
+    bid: float
+    ask: float
+    ts:  int                 # unix-ms (0 if the writer did not supply one)
+
+class QuoteArrays(NamedTuple):
+    """Zero-copy, read-only views over the live rows (row i ↔ symbols[i])."""
+    symbols:  list           # None for evicted rows
+    bid:      np.ndarray
+    ask:      np.ndarray
+    bid_size: np.ndarray
+    ask_size: np.ndarray
+    ts:       np.ndarray     # unix-ms
+    seq:      np.ndarray     # 0 ⇒ row free, or interned but never written
+
+class QuoteStore(Protocol):
+    """What feeds write to and consumers read from."""
+    def update(self, *, symbol: str, bid: float, ask: float,
+               bid_size: int = 0, ask_size: int = 0, ts: int = 0) -> None: ...
+    def get(self, symbol: str, default=None, *, max_age_ms: float | None = None,
+            now_ms: float | None = None) -> Quote | None: ...
+    def snapshot(self) -> dict[str, Quote]: ...
+    def arrays(self) -> QuoteArrays: ...
+    def sweep(self, max_age_ms: float, now_ms: float | None = None, *,
+              evict: bool = False) -> list[str]: ...
+
+class _Columns:
+    """
+    Fixed-capacity columns.  Backed by `array.array` (cheap scalar stores from
+    Python) and exposed to NumPy through `np.frombuffer` (zero-copy).
+    """
+    __slots__ = ("seq", "bid", "ask", "bid_size", "ask_size", "ts")
+    _TYPES = {"seq": "Q", "bid": "d", "ask": "d", "bid_size": "q", "ask_size": "q", "ts": "q"}
+
+    def __init__(self, capacity: int, prev: "_Columns | None" = None, n: int = 0):
+        for name, code in self._TYPES.items():
+            col = array(code, bytes(capacity * array(code).itemsize))
+            if prev is not None:
+                col[:n] = getattr(prev, name)[:n]
+            setattr(self, name, col)
+
+    def __len__(self) -> int:
+        return len(self.seq)
+
+    def view(self, name: str, n: int) -> np.ndarray:
+        v = np.frombuffer(getattr(self, name), dtype=np.dtype(self._TYPES[name]))[:n]
+        v.flags.writeable = False
+        return v
 
 class QuoteCache:
-    def __init__(self) -> None:
-        self._lock   = threading.RLock()
-        self._quotes: Dict[str, Dict[str, Any]] = {}
+    def __init__(self, capacity: int = 4096) -> None:
+        self._ids:  dict[str, int] = {}
+        self._syms: list[str] = []
+        self._cols  = _Columns(max(int(capacity), 1))
+        self._free: list[int] = []                # rows released by sweep(evict=True)
+        self._intern_lock = threading.Lock()      # only taken for a brand-new symbol
 
     # --------------------------------------------------------------------- #
-    # called by nbbo_feed.py
-    def update(self, *, symbol: str, bid: float, bid_size: int,
-               ask: float, ask_size: int, ts: int) -> None:
-        with self._lock:
-            self._quotes[symbol] = {
-                "bid":       bid,
-                "bid_size":  bid_size,
-                "ask":       ask,
-                "ask_size":  ask_size,
-                "ts":        ts,        # unix-ms
-            }
+    def intern(self, symbol: str) -> int:
+        """Return the row id for *symbol*, allocating one if needed."""
+        i = self._ids.get(symbol)
+        if i is not None:
+            return i
+        with self._intern_lock:
+            i = self._ids.get(symbol)
+            if i is None:
+                if self._free:
+                    i = self._free.pop()
+                    self._syms[i] = symbol
+                else:
+                    i = len(self._syms)
+                    cols = self._cols
+                    if i >= len(cols):
+                        self._cols = _Columns(2 * len(cols), cols, i)
+                    self._syms.append(symbol)
+                self._ids[symbol] = i
+        return i
+
+    def id_of(self, symbol: str) -> int | None:
+        return self._ids.get(symbol)
+
+    # --------------------------------------------------------------------- #
+    # called by every feed
+    def update(self, *, symbol: str, bid: float, ask: float,
+               bid_size: int = 0, ask_size: int = 0, ts: int = 0) -> None:
+        i = self._ids.get(symbol)
+        if i is None:
+            i = self.intern(symbol)
+        # convert first: a bad value must raise before the row goes odd, or
+        # readers would spin on it forever
+        bid, ask = float(bid), float(ask)
+        bid_size, ask_size, ts = _index(bid_size), _index(ask_size), _index(ts)
+        c = self._cols
+        c.seq[i] += 1                    # odd ⇒ write in progress
+        c.bid[i]      = bid
+        c.ask[i]      = ask
+        c.bid_size[i] = bid_size
+        c.ask_size[i] = ask_size
+        c.ts[i]       = ts               # unix-ms
+        c.seq[i] += 1                    # even ⇒ stable
 
     # --------------------------------------------------------------------- #
-    # used by trade_feed.py / cli
-    def get(self, symbol: str):
-        with self._lock:
-            return self._quotes.get(symbol)
+    def _read(self, i: int):
+        while True:
+            c  = self._cols
+            s0 = c.seq[i]
+            if s0 == 0:
+                return None              # free, or interned but never written
+            if s0 & 1:
+                time.sleep(0)            # let the writer finish
+                continue
+            row = (c.bid[i], c.bid_size[i], c.ask[i], c.ask_size[i], c.ts[i])
+            if c.seq[i] == s0 and c is self._cols:
+                return row
+
+    # used by trade_feed.py / engine / snapshots
+    def get(self, symbol: str, default=None, *, max_age_ms: float | None = None,
+            now_ms: float | None = None) -> Quote | None:
+        """
+        Latest quote for *symbol*, or *default*.  With *max_age_ms* a quote
+        older than that (relative to *now_ms*, default wall clock) counts as
+        missing.  Quotes written without a timestamp (ts == 0) never expire.
+        """
+        i = self._ids.get(symbol)
+        row = None if i is None else self._read(i)
+        if row is None:
+            return default
+        ts = row[4]
+        if max_age_ms is not None and ts and \
+                (_now_ms() if now_ms is None else now_ms) - ts > max_age_ms:
+            return default
+        return Quote(row[0], row[2], ts)
 
-    # optional helper
-    def snapshot(self):
-        with self._lock:
-            return dict(self._quotes)
+    def fresh(self, symbol: str, max_age_ms: float, now_ms: float | None = None) -> bool:
+        return self.get(symbol, max_age_ms=max_age_ms, now_ms=now_ms) is not None
+
+    def depth(self, symbol: str) -> dict | None:
+        """Full row including sizes: {bid, bid_size, ask, ask_size, ts}."""
+        i = self._ids.get(symbol)
+        row = None if i is None else self._read(i)
+        if row is None:
+            return None
+        bid, bid_size, ask, ask_size, ts = row
+        return {"bid": bid, "bid_size": bid_size, "ask": ask,
+                "ask_size": ask_size, "ts": ts}
+
+    def snapshot(self) -> dict[str, Quote]:
+        out = {}
+        for sym, i in list(self._ids.items()):
+            row = self._read(i)
+            if row is not None:
+                out[sym] = Quote(row[0], row[2], row[4])
+        return out
+
+    def arrays(self) -> QuoteArrays:
+        """
+        Zero-copy views for vectorized consumers.  Rows may be updated while
+        you hold the views; compare `seq` before/after if you need a torn-read
+        check.
+        """
+        c, n = self._cols, len(self._syms)
+        return QuoteArrays(self._syms[:n], *(c.view(name, n) for name in
+                           ("bid", "ask", "bid_size", "ask_size", "ts", "seq")))
+
+    # staleness ------------------------------------------------------------ #
+    def ages(self, now_ms: float | None = None) -> tuple[list, np.ndarray]:
+        """(symbols, age_ms) for every written, timestamped row."""
+        a   = self.arrays()
+        now = _now_ms() if now_ms is None else now_ms
+        rows = np.flatnonzero((a.seq > 0) & (a.ts > 0))
+        return [a.symbols[i] for i in rows], now - a.ts[rows]
+
+    def age_histogram(self, edges_ms=AGE_EDGES_MS, now_ms: float | None = None
+                      ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        How stale the book is: counts[j] = number of symbols whose last quote
+        is between edges[j] and edges[j+1] ms old.
+        """
+        _, age = self.ages(now_ms)
+        edges  = np.asarray(edges_ms, dtype=float)
+        counts, _ = np.histogram(np.maximum(age, 0), bins=edges)
+        return edges, counts
+
+    def sweep(self, max_age_ms: float, now_ms: float | None = None, *,
+              evict: bool = False) -> list[str]:
+        """
+        Symbols whose quote is older than *max_age_ms*, oldest first.
+        evict=True also drops them and frees their rows for reuse (writer only).
+        """
+        a   = self.arrays()
+        now = _now_ms() if now_ms is None else now_ms
+        age = now - a.ts
+        rows = np.flatnonzero((a.seq > 0) & (a.ts > 0) & (age > max_age_ms))
+        rows = rows[np.argsort(-age[rows], kind="stable")]
+        stale = [a.symbols[i] for i in rows]
+        if evict and stale:
+            with self._intern_lock:
+                c = self._cols
+                for i, sym in zip(rows.tolist(), stale):
+                    del self._ids[sym]
+                    self._syms[i] = None
+                    c.seq[i] = 0         # readers mid-read see the change and retry
+                    self._free.append(i)
+        return stale
+
+    # mapping protocol (what the dict-based modules used) ----------------- #
+    def __setitem__(self, symbol: str, quote) -> None:
+        """quotes[sym] = (bid, ask) or (bid, ask, ts)."""
+        bid, ask, *rest = quote
+        self.update(symbol=symbol, bid=bid, ask=ask, ts=rest[0] if rest else 0)
+
+    def __getitem__(self, symbol: str) -> Quote:
+        q = self.get(symbol)
+        if q is None:
+            raise KeyError(symbol)
+        return q
+
+    def __contains__(self, symbol) -> bool:
+        i = self._ids.get(symbol)
+        return i is not None and self._cols.seq[i] != 0
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.snapshot())
+
+    def keys(self):
+        return self.snapshot().keys()
+
+    def values(self):
+        return self.snapshot().values()
+
+    def items(self):
+        return self.snapshot().items()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def clear(self) -> None:
+        """Drop every row (tests / replay restarts); not safe against a live writer."""
+        with self._intern_lock:
+            self._cols = _Columns(len(self._cols))
+            self._ids  = {}
+            self._syms = []
+            self._free = []
 
 # ------------------------------------------------------------------------- #
 # **THIS** is what the other modules import
-quote_cache = QuoteCache()
\ No newline at end of file
+quote_cache = QuoteCache()
+quotes      = quote_cache          # legacy name used by engine / ws_client / mock data
+
+async def run(symbols=None, *, delayed: bool = False) -> None:
+    """Fill `quote_cache` from the Polygon websocket forever (see stream.ingest)."""
+    from .nbbo_feed import run as nbbo_run
+    await nbbo_run(symbols, delayed=delayed)
@@ -8,11 +8,12 @@ import requests
 from dotenv import load_dotenv
 from collections import defaultdict
 
+from src.stream.quote_cache import quotes      # shared NBBO store
+
 load_dotenv()
 API_KEY = os.getenv("POLYGON_KEY")
 
-# Global data stores (same as websocket client)
-quotes = {}
+# Position books (same as websocket client)
 pos_long = defaultdict(int)
 pos_short = defaultdict(int)
 
@@ -68,7 +69,7 @@ async def simulate_trading_activity():
                 ask = mid_price + spread/2
                 
                 # Store the quote
-                quotes[ticker] = (bid, ask)
+                quotes.update(symbol=ticker, bid=bid, ask=ask, ts=int(time.time() * 1e3))
                 counter["quotes"] += 1
                 
                 # Log progress
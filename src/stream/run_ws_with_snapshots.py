@@ -119,7 +119,7 @@ async def stream_with_snapshots():
                 # Show a few samples if we have any
                 if quotes:
                     print("\nSample quotes:")
-                    for i, (sym, (bid, ask)) in enumerate(list(quotes.items())[:3]):
+                    for i, (sym, (bid, ask, _)) in enumerate(list(quotes.items())[:3]):
                         print(f"  {sym}: bid={bid}, ask={ask}")
                         
                 if pos_long or pos_short:
@@ -151,7 +151,9 @@ async def stream_with_snapshots():
                         
                         # Handle quote message
                         if ev == "Q":  # Basic quote
-                            quotes[m["sym"]] = (m.get("bp", 0), m.get("ap", 0))
+                            quotes.update(symbol=m["sym"], bid=m.get("bp", 0), ask=m.get("ap", 0),
+                                          bid_size=m.get("bs", 0), ask_size=m.get("as", 0),
+                                          ts=m.get("t", 0))
                         
                         # Handle trade message and update positions
                         elif ev == "T":  # Basic trade
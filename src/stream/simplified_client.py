@@ -17,7 +17,6 @@ AUTH_MSG = json.dumps({"action": "auth", "params": API_KEY})
 STOCKS_SUB = json.dumps({"action": "subscribe", "params": "T.AAPL"})  # Just subscribe to AAPL trades
 
 # Data stores
-quotes = {}
 pos_long = defaultdict(int)
 pos_short = defaultdict(int)
 
@@ -1,46 +1,349 @@
 # src/stream/sinks.py
-import atexit, datetime as _dt, pathlib as _pa
+"""
+Append-only parquet sinks for raw quotes and trades.
+
+Rows are buffered column by column in typed `array.array`s -- 8 bytes per
+number, 4 per string (strings are interned to int32 codes per sink) -- and
+turned into one `pa.RecordBatch` per flush without ever building a dict or
+a Python row object.
+
+No disk I/O happens on the feed loop.  A full buffer (or one older than
+SINK_FLUSH_SECS) is swapped for an empty one and handed to the sink's
+writer thread through a bounded queue; the thread builds the batch,
+compresses and writes while the feed keeps filling the fresh buffer.  If
+the writer falls SINK_QUEUE flushes behind, the feed blocks rather than
+dropping ticks.  `close()` (registered at exit) drains everything.
+
+On disk each sink is a directory (`data/<date>/quotes.parquet/`) of a few
+large files rather than one file per flush: the writer keeps one
+`ParquetWriter` open, appends a row group every SINK_ROW_GROUP rows
+(`symbol`/`side` dictionary-encoded, min/max statistics on), and rolls to a
+new `part-HHMMSS-NNNN.parquet` after SINK_ROLL_MB or SINK_ROLL_SECS.  The
+file being written is named `.part-….parquet.inprogress` -- hidden from
+pyarrow/pandas/DuckDB directory reads and from `*.parquet` globs -- and is
+renamed to its final name once its footer is written, so the directory is
+always readable; `flush(wait=True)` rolls.
+`compact(dir)` merges a finished day into a single file.
+
+    quote_sink.add(ts_ns, symbol, bid, ask, mid)        # schema order, hot path
+    trade_sink.append({"ts": …, "symbol": …, …})        # dict form still accepted
+    trade_sink.flush(wait=True)                         # on disk and readable
+    compact("data/2025-05-19/quotes.parquet")           # end of day
+
+Env:
+    SINK_FLUSH_ROWS   rows per flush              (default 2000)
+    SINK_FLUSH_SECS   max age of buffered rows    (default 5)
+    SINK_QUEUE        flushes queued for writing  (default 8)
+    SINK_ROW_GROUP    rows per parquet row group  (default 131072)
+    SINK_ROLL_MB      roll files at this size     (default 256)
+    SINK_ROLL_SECS    … or at this age            (default 600)
+"""
+import atexit, datetime as _dt, logging, os, pathlib as _pa, queue, threading, time
+from array import array
+import numpy as np
 import pyarrow as pa, pyarrow.dataset as ds, pyarrow.parquet as pq
 
 # ---------- CONFIG ----------
-_FLUSH_EVERY = 2_000        # rows
+_FLUSH_EVERY = int(os.getenv("SINK_FLUSH_ROWS", "2000"))     # rows
+_FLUSH_SECS  = float(os.getenv("SINK_FLUSH_SECS", "5"))      # seconds
+_QUEUE_MAX   = int(os.getenv("SINK_QUEUE", "8"))             # pending flushes
+_ROW_GROUP   = int(os.getenv("SINK_ROW_GROUP", str(128 * 1024)))
+_ROLL_BYTES  = int(float(os.getenv("SINK_ROLL_MB", "256")) * 2**20)
+_ROLL_SECS   = float(os.getenv("SINK_ROLL_SECS", "600"))
 _CODEC        = "zstd"      # fast + small
+_DICT_COLS   = ["symbol", "side"]   # low-cardinality strings
 # ----------------------------
 
+_LOG = logging.getLogger("sinks")
+
+_EPOCH = _dt.datetime(1970, 1, 1, tzinfo=_dt.timezone.utc)
+
 def _today_dir() -> _pa.Path:
     d = _dt.date.today().isoformat()              # '2025-05-21'
     path = _pa.Path(f"data/{d}")
     path.mkdir(parents=True, exist_ok=True)
     return path
 
+def _to_ns(ts) -> int:
+    """datetime (naive = UTC) or int ns → int ns since the epoch."""
+    if isinstance(ts, _dt.datetime):
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=_dt.timezone.utc)
+        return (ts - _EPOCH) // _dt.timedelta(microseconds=1) * 1_000
+    return int(ts)
+
+class _StrColumn:
+    """Strings as int32 codes into a per-sink dictionary (symbols repeat endlessly)."""
+    __slots__ = ("codes", "_ids", "_values", "_dict")
+
+    def __init__(self):
+        self.codes   = array("i")
+        self._ids:    dict[str, int] = {}
+        self._values: list[str] = []
+        self._dict    = pa.array([], pa.string())
+
+    def append(self, s: str) -> None:
+        i = self._ids.get(s)
+        if i is None:
+            i = self._ids[s] = len(self._values)
+            self._values.append(s)
+        self.codes.append(i)
+
+    def detach(self):
+        """Hand over the buffered codes (and dictionary size); start a fresh buffer."""
+        out, self.codes = (self.codes, len(self._values)), array("i")
+        return out
+
+    def to_arrow(self, part, typ: pa.DataType) -> pa.Array:
+        # writer thread only; the feed may be appending to _values meanwhile
+        codes, n = part
+        if len(self._dict) != n:                         # dictionary grew since last flush
+            self._dict = pa.array(self._values[:n], pa.string())
+        idx = pa.array(np.frombuffer(codes, np.int32), pa.int32())
+        return pa.DictionaryArray.from_arrays(idx, self._dict).dictionary_decode().cast(typ)
+
+    def truncate(self, n: int) -> None:
+        del self.codes[n:]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+class _NumColumn:
+    __slots__ = ("buf", "_np")
+
+    def __init__(self, code: str, np_type):
+        self.buf = array(code)
+        self._np = np_type
+
+    def append(self, v) -> None:
+        self.buf.append(v)
+
+    def detach(self):
+        out, self.buf = self.buf, array(self.buf.typecode)
+        return out
+
+    def to_arrow(self, part, typ: pa.DataType) -> pa.Array:
+        return pa.array(np.frombuffer(part, self._np), typ)
+
+    def truncate(self, n: int) -> None:
+        del self.buf[n:]
+
+    def __len__(self) -> int:
+        return len(self.buf)
+
+def _column(typ: pa.DataType):
+    if pa.types.is_string(typ):
+        return _StrColumn()
+    if pa.types.is_timestamp(typ) or pa.types.is_int64(typ):
+        return _NumColumn("q", np.int64)
+    if pa.types.is_int32(typ):
+        return _NumColumn("i", np.int32)
+    if pa.types.is_floating(typ):
+        return _NumColumn("d", np.float64)
+    raise TypeError(f"unsupported sink column type: {typ}")
+
+_ROLL = object()                                   # queue marker: close the current file
+
 class _ArrowSink:
-    def __init__(self, filename: str, schema: pa.schema):
+    def __init__(self, filename: str, schema: pa.schema, *,
+                 flush_rows: int = _FLUSH_EVERY, flush_secs: float = _FLUSH_SECS,
+                 queue_max: int = _QUEUE_MAX, row_group_rows: int = _ROW_GROUP,
+                 roll_bytes: int = _ROLL_BYTES, roll_secs: float = _ROLL_SECS):
         self._file   = _today_dir() / filename
         self._schema = schema
-        self._buf    = []                         # list[dict]
+        self._cols   = [_column(f.type) for f in schema]
+        self._ts     = [pa.types.is_timestamp(f.type) for f in schema]
+        self.flush_rows = flush_rows
+        self.flush_secs = flush_secs
+        self.row_group_rows = row_group_rows
+        self.roll_bytes = roll_bytes
+        self.roll_secs  = roll_secs
+        # writer-thread state: open file, batches waiting to fill a row group
+        self._out: pa.OSFile | None = None
+        self._pw:  pq.ParquetWriter | None = None
+        self._path: _pa.Path | None = None             # final name of the open file
+        self._opened = 0.0
+        self._pending: list[pa.RecordBatch] = []
+        self._pending_rows = 0
+        self._pending_t0 = 0.0
+        self._seq = 0
+        self.errors  = 0                               # failed writes (logged, rows lost)
+        self._t0     = time.monotonic()                # when the current buffer was started
+        self._lock   = threading.Lock()                # add() vs the writer's timed swap
+        self._q: queue.Queue = queue.Queue(maxsize=max(int(queue_max), 1))
+        self._closed = False
+        self._thread = threading.Thread(target=self._writer, daemon=True,
+                                        name=f"sink-{filename}")
+        self._thread.start()
 
     # public -------------
+    def add(self, *values) -> None:
+        """One row, values in schema order (timestamps as int ns)."""
+        with self._lock:
+            try:
+                for c, v in zip(self._cols, values):
+                    c.append(v)
+            except (TypeError, OverflowError):
+                n = len(self._cols[-1])                  # keep the columns aligned
+                for c in self._cols:
+                    c.truncate(n)
+                raise
+            if len(self._cols[0]) >= self.flush_rows:
+                self._flush()
+
     def append(self, row: dict) -> None:
-        self._buf.append(row)
-        if len(self._buf) >= _FLUSH_EVERY:
+        self.add(*(_to_ns(row[f.name]) if is_ts else row[f.name]
+                   for f, is_ts in zip(self._schema, self._ts)))
+
+    def flush(self, wait: bool = False) -> None:
+        """
+        Hand the buffer to the writer now.  With *wait*, also close the
+        current file and return once everything so far is on disk and readable.
+        """
+        with self._lock:
             self._flush()
+        if wait:
+            self._q.put(_ROLL)
+            self._q.join()
+
+    def close(self) -> None:
+        """Write everything buffered or queued, then stop the writer (idempotent)."""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._q.put(None)
+        self._thread.join()
+
+    def __len__(self) -> int:
+        return len(self._cols[0])
 
     # private ------------
-    def _flush(self) -> None:
-        if not self._buf:
+    def _flush(self, block: bool = True) -> None:
+        """Swap in empty buffers and queue the full ones (caller holds the lock)."""
+        if not len(self._cols[0]):
+            self._t0 = time.monotonic()
+            return
+        if not block and self._q.full():
             return
-        tbl = pa.Table.from_pylist(self._buf, schema=self._schema)
-        pq.write_to_dataset(
-            tbl,
-            root_path=str(self._file),
-            partition_cols=None, compression=_CODEC,
-            existing_data_behavior="overwrite_or_ignore",
-        )
-        self._buf.clear()
-
-    # make sure we never lose rows
-    def _atexit(self):
-        self._flush()
+        self._t0 = time.monotonic()
+        parts = [c.detach() for c in self._cols]
+        self._q.put(parts)                             # blocks only if the writer is SINK_QUEUE behind
+
+    def _batch(self, parts) -> pa.RecordBatch:
+        return pa.RecordBatch.from_arrays(
+            [c.to_arrow(p, f.type) for c, p, f in zip(self._cols, parts, self._schema)],
+            schema=self._schema)
+
+    # writer thread ------
+    def _write(self, batch: pa.RecordBatch) -> None:
+        if not self._pending:
+            self._pending_t0 = time.monotonic()
+        self._pending.append(batch)
+        self._pending_rows += batch.num_rows
+        if self._pending_rows >= self.row_group_rows:
+            self._write_group()
+        if self._roll_due():
+            self._roll()
+
+    def _roll_due(self) -> bool:
+        if self._pw is not None:
+            return (self._out.tell() >= self.roll_bytes
+                    or time.monotonic() - self._opened >= self.roll_secs)
+        return bool(self._pending) and time.monotonic() - self._pending_t0 >= self.roll_secs
+
+    def _write_group(self) -> None:
+        if not self._pending:
+            return
+        if self._pw is None:
+            self._seq += 1                             # sorts in write order
+            self._path = self._file / f"part-{time.strftime('%H%M%S')}-{self._seq:04d}.parquet"
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._out = pa.OSFile(str(_in_progress(self._path)), "wb")
+            self._pw  = pq.ParquetWriter(
+                self._out, self._schema, compression=_CODEC, write_statistics=True,
+                use_dictionary=[c for c in _DICT_COLS if c in self._schema.names])
+            self._opened = time.monotonic()
+        tbl = pa.Table.from_batches(self._pending, schema=self._schema)
+        self._pending, self._pending_rows = [], 0
+        self._pw.write_table(tbl, row_group_size=max(tbl.num_rows, 1))   # one row group
+
+    def _roll(self) -> None:
+        """Write what is pending and finish the current file (footer ⇒ readable)."""
+        self._write_group()
+        if self._pw is not None:
+            self._pw.close()
+            self._out.close()
+            self._pw = self._out = None
+            _in_progress(self._path).rename(self._path)   # only complete files are visible
+
+    def _writer(self) -> None:
+        while True:
+            try:
+                parts = self._q.get(timeout=min(self.flush_secs, 1.0))
+            except queue.Empty:
+                if len(self) and time.monotonic() - self._t0 >= self.flush_secs:
+                    with self._lock:                   # flush on time, even if the feed is idle
+                        self._flush(block=False)       # never wait on our own queue
+                elif self._roll_due():
+                    self._try(self._roll)
+                continue
+            try:
+                if parts is None:
+                    self._try(self._roll)
+                    return
+                if parts is _ROLL:
+                    self._try(self._roll)
+                else:
+                    self._try(self._write, self._batch(parts), rows=len(parts[0]))
+            finally:
+                self._q.task_done()
+
+    def _try(self, fn, *args, rows: int | None = None) -> None:
+        try:
+            fn(*args)
+        except Exception as exc:
+            self.errors += 1
+            lost = rows if rows is not None else self._pending_rows
+            _LOG.error("sink %s: write failed (%d rows lost): %s", self._file.name, lost, exc)
+            self._pending, self._pending_rows = [], 0
+
+def _in_progress(path: _pa.Path) -> _pa.Path:
+    """Name of *path* while it is being written (skipped by dataset readers)."""
+    return path.with_name(f".{path.name}.inprogress")
+
+def compact(path, *, row_group_rows: int = _ROW_GROUP) -> _pa.Path | None:
+    """
+    Merge every finished file under a sink directory (e.g. a past day's
+    `quotes.parquet/`) into one file with large row groups, streaming batch
+    by batch.  Files still being written (`.inprogress`) are left alone, as
+    are leftovers of a crashed writer.  Returns the new
+    file, or None if there was nothing to merge.
+    """
+    root  = _pa.Path(path)
+    parts = sorted(p for p in root.glob("*.parquet") if not p.name.startswith((".", "_")))
+    if len(parts) < 2:
+        return None
+    dataset = ds.dataset([str(p) for p in parts], format="parquet")
+    schema  = dataset.schema
+    tmp = root / ".compact.tmp"
+    with pq.ParquetWriter(tmp, schema, compression=_CODEC, write_statistics=True,
+                          use_dictionary=[c for c in _DICT_COLS if c in schema.names]) as w:
+        pending, n = [], 0
+        for batch in dataset.to_batches():
+            pending.append(batch)
+            n += batch.num_rows
+            if n >= row_group_rows:
+                w.write_table(pa.Table.from_batches(pending, schema), row_group_size=n)
+                pending, n = [], 0
+        if pending:
+            w.write_table(pa.Table.from_batches(pending, schema), row_group_size=n)
+    out = root / f"compacted-{parts[-1].stem}.parquet"
+    tmp.rename(out)
+    for p in parts:
+        if p != out:
+            p.unlink()
+    return out
 
 # ---- column definitions (adjust if your snapshot uses other names) ----
 _quote_schema = pa.schema(
@@ -63,6 +366,6 @@ _trade_schema = pa.schema(
 quote_sink = _ArrowSink("quotes.parquet", _quote_schema)
 trade_sink = _ArrowSink("trades.parquet", _trade_schema)
 
-# one flush at interpreter shutdown
-atexit.register(quote_sink._atexit)
-atexit.register(trade_sink._atexit)
\ No newline at end of file
+# drain both writers at interpreter shutdown
+atexit.register(quote_sink.close)
+atexit.register(trade_sink.close)
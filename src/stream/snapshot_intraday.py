@@ -2,7 +2,7 @@
 Every N minutes, build a strike-level table of dealer positions
 established *so far today* and write to Parquet.
 """
-import datetime as dt, pathlib, pandas as pd, math, os, re
+import datetime as dt, pathlib, pandas as pd, numpy as np, os
 
 # Import from websocket client or REST simulator based on environment
 if os.getenv("USE_REST", "").lower() in ("true", "1", "yes"):
@@ -12,51 +12,35 @@ else:
     # Using WebSocket client
     from src.stream.ws_client import pos_long, pos_short, quotes
 
-from src.utils.greeks import bs_greeks
+from src.dealer.array_book import dealer_gamma
+from src.utils.contracts import contracts
+from src.greeks.surface import VolSurface
+from src.stream.spot_feed import spot_cache
+
+_surface = VolSurface()          # IV cache + per-expiry smile across snapshots
 
 def get_spot():
-    """Get the current SPX spot price."""
+    """
+    Get the current SPX spot price from the in-process spot cache.
+    Only when the cache is empty do we fall back to one REST call, and the
+    result seeds the cache so later snapshots skip the round-trip.
+    """
+    spot = spot_cache.last()
+    if spot is not None:
+        return spot
     try:
         # reuse your aggregate-close call from snapshot.py
         from polygon import RESTClient
         import os, dotenv
         dotenv.load_dotenv()
-        spot = RESTClient(os.getenv("POLYGON_KEY")).get_previous_close("I:SPX").close
-        return float(spot)
+        spot = float(RESTClient(os.getenv("POLYGON_KEY")).get_previous_close("I:SPX").close)
+        spot_cache.update(spot)
+        return spot
     except Exception as e:
         print(f"Error getting spot price: {e}")
         # Fallback to a reasonable SPX value
         return 4200.0
 
-def parse_occ_ticker(ticker):
-    """
-    Parse OCC ticker format 'O:SPX240517C04200000' into components.
-    
-    Returns:
-        (expiry_date, option_type, strike_price)
-    """
-    if not ticker.startswith("O:"):
-        return None, None, None
-    
-    # Use regex pattern for OCC format
-    pattern = r"O:([A-Z]+)(\d{6})([CP])(\d+)"
-    match = re.match(pattern, ticker)
-    
-    if not match:
-        return None, None, None
-    
-    underlying, date_str, option_type, strike_str = match.groups()
-    
-    # Parse date (yymmdd)
-    try:
-        expiry = dt.datetime.strptime(date_str, "%y%m%d").date()
-        # Parse strike with decimal places (last 3 digits are decimal places)
-        strike = int(strike_str[:-3]) / 1000
-        return expiry, option_type, strike
-    except (ValueError, IndexError) as e:
-        print(f"Error parsing ticker {ticker}: {e}")
-        return None, None, None
-
 def intraday_snapshot(path="data/intraday"):
     """
     Create a snapshot of current dealer gamma positioning.
@@ -67,54 +51,67 @@ def intraday_snapshot(path="data/intraday"):
     Returns:
         Path to created file or None if no data
     """
-    rows, spot = [], get_spot()
+    spot = get_spot()
     today = dt.date.today()
     
     print(f"Creating snapshot with {len(pos_long)} long and {len(pos_short)} short positions")
     print(f"Using spot price: {spot}")
 
+    syms, net = [], []
     for tkr in set(pos_long) | set(pos_short):
         if not tkr.startswith("O:SPX"):         # skip non-SPX
             continue
-            
         net_dealer = pos_short[tkr] - pos_long[tkr]   # +ve dealer long
-        if net_dealer == 0:
-            continue
-
-        # parse OCC ticker using improved function
-        expiry, typ, strike = parse_occ_ticker(tkr)
-        
-        if None in (expiry, typ, strike):
-            print(f"Warning: Could not parse ticker {tkr}, skipping")
-            continue
-            
-        # Calculate time to expiry in years
-        tau = max((expiry - today).days, 1) / 365
-        
-        # Use placeholder IV (can be improved with historical data)
-        iv = 0.20
-        
-        # Calculate gamma
-        gamma, _, _ = bs_greeks(spot, strike, iv, tau, typ)
-        
-        # Calculate notional gamma (scaled by 10k for readability)
-        gamma_usd = -gamma * net_dealer * spot**2 / 10_000
+        if net_dealer:
+            syms.append(tkr)
+            net.append(net_dealer)
 
-        rows.append({
-            "strike": strike, 
-            "type": typ,
-            "dealer_pos": net_dealer, 
-            "gamma_usd": gamma_usd,
-            "symbol": tkr,
-            "days_to_expiry": (expiry - today).days
-        })
+    # one column per field, straight off the contract registry; the book is
+    # revalued at *spot* at once
+    cid = contracts.ids(syms, strict=False)           # -1 ⇒ malformed ticker
+    for i in np.flatnonzero(cid < 0):
+        print(f"Warning: Could not parse ticker {syms[i]}, skipping")
+    keep = cid >= 0
+    syms = [s for s, k in zip(syms, keep) if k]
+    net  = np.asarray(net)[keep]
+    cid  = cid[keep]
 
-    if not rows:
+    if not syms:
         print("No rows generated for snapshot")
         return None
-        
+
+    strikes = contracts.strike[cid]
+    is_call = contracts.is_call[cid]
+    expiry  = contracts.expiry[cid]
+    types   = np.where(is_call, "C", "P")
+    days    = (expiry - np.datetime64(today, "D")).astype(int)
+    tau     = np.maximum(days, 1) / 365
+    sigma   = np.empty(len(syms))
+
+    # IV per expiry: quoted legs are solved in one batch, the rest come off the smile
+    for e in np.unique(expiry):
+        g = np.flatnonzero(expiry == e)
+        mids = []
+        for i in g:
+            bid, ask = quotes.get(syms[i], (None, None))[:2]
+            mids.append((bid + ask) / 2 if bid and ask and ask > bid else np.nan)
+        sigma[g] = _surface.refresh_many(
+            [syms[i] for i in g], mids, spot, strikes[g], tau[g],
+            is_call=is_call[g], expiry=e.astype(dt.date))
+
+    gamma = dealer_gamma(spot, strikes, sigma, tau, is_call, net)
+
     # Create dataframe and sort by strike
-    df = pd.DataFrame(rows)
+    df = pd.DataFrame({
+        "strike": strikes,
+        "type": types,
+        "dealer_pos": net,
+        "gamma_usd": -gamma * spot**2 / 10_000,   # notional γ, scaled by 10k for readability
+        "symbol": syms,
+        "days_to_expiry": days,
+        "iv": sigma,                              # lets readers revalue at other spots
+        "spot": spot,
+    })
     df = df.sort_values("strike")
     
     # Generate timestamp and path
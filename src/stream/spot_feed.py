@@ -0,0 +1,122 @@
+# ---------- src/stream/spot_feed.py ----------
+"""
+In-process spot-price service for the underlying index (SPX).
+
+One `SpotCache` per process keeps the last value plus a short ring buffer.
+It is filled by `run()` (Polygon indices websocket) or `replay(path)`
+(local parquet/csv with `ts` and `price` columns).  The engine, the intraday
+snapshotter and the chain ingester read it with `get_spot()` instead of
+making a REST round-trip per snapshot.
+
+    from src.stream.spot_feed import spot_cache, get_spot, run as spot_run
+"""
+
+from __future__ import annotations
+import asyncio, logging, os, pathlib, threading, time
+import numpy as np
+
+from .polygon_client import iter_messages
+
+_LOG = logging.getLogger("spot_feed")
+
+WS_URL      = "wss://socket.polygon.io/indices"
+DELAYED_URL = "wss://delayed.polygon.io/indices"
+SPOT_SYMBOL = os.getenv("SPOT_SYMBOL", "I:SPX")
+
+class SpotCache:
+    """Last spot value + fixed-size ring buffer of (ts, price); single writer."""
+
+    def __init__(self, maxlen: int = 1024) -> None:
+        self._ts   = np.zeros(maxlen)          # unix seconds
+        self._px   = np.zeros(maxlen)
+        self._head = 0                         # next write slot
+        self._n    = 0
+        self._last: tuple[float, float] | None = None   # (ts, price), swapped atomically
+        self._lock = threading.Lock()          # only guards history() copies
+
+    # called by the feed ------------------------------------------------------
+    def update(self, price: float, ts: float | None = None) -> None:
+        ts = time.time() if ts is None else float(ts)
+        with self._lock:
+            self._ts[self._head] = ts
+            self._px[self._head] = price
+            self._head = (self._head + 1) % len(self._px)
+            self._n = min(self._n + 1, len(self._px))
+        self._last = (ts, float(price))
+
+    # readers -----------------------------------------------------------------
+    def last(self, default: float | None = None, *, max_age: float | None = None,
+             now: float | None = None) -> float | None:
+        """
+        Latest price, or *default* if none yet (or older than *max_age* seconds
+        relative to *now*, default wall clock).
+        """
+        last = self._last
+        if last is None or (max_age is not None and
+                            (time.time() if now is None else now) - last[0] > max_age):
+            return default
+        return last[1]
+
+    def last_ts(self) -> float | None:
+        last = self._last
+        return None if last is None else last[0]
+
+    def history(self) -> tuple[np.ndarray, np.ndarray]:
+        """(ts, price) arrays, oldest first."""
+        with self._lock:
+            idx = (np.arange(self._n) + self._head - self._n) % len(self._px)
+            return self._ts[idx].copy(), self._px[idx].copy()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._head = self._n = 0
+        self._last = None
+
+# ------------------------------------------------------------------------- #
+# **THIS** is what the other modules import
+spot_cache = SpotCache()
+
+def get_spot(default: float | None = None, *, max_age: float | None = None,
+             now: float | None = None) -> float | None:
+    return spot_cache.last(default, max_age=max_age, now=now)
+
+# ------------------------------------------------------------------------- #
+def _handle(msg: dict) -> None:
+    """Index value ("V") or per-second aggregate ("A") → spot_cache."""
+    ev = msg.get("ev")
+    if ev == "V" and "val" in msg:
+        spot_cache.update(msg["val"], msg.get("t", time.time() * 1e3) / 1e3)
+    elif ev == "A" and "c" in msg:
+        spot_cache.update(msg["c"], msg.get("e", time.time() * 1e3) / 1e3)
+
+async def run(symbol: str = SPOT_SYMBOL, *, delayed: bool = False) -> None:
+    """Stream index values into `spot_cache` forever (reconnects on failure)."""
+    url = DELAYED_URL if delayed else WS_URL
+    while True:
+        try:
+            async for msg in iter_messages(url, f"V.{symbol}"):
+                _handle(msg)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            _LOG.error("spot WS crashed: %s — reconnecting in 3 s", exc)
+        await asyncio.sleep(3)
+
+async def replay(path: str | pathlib.Path, *, speed: float = 0.0) -> None:
+    """
+    Feed `spot_cache` from a local file with `ts` (unix s, or datetime) and
+    `price` columns.  speed=0 loads everything at once; otherwise sleeps the
+    recorded gaps divided by *speed*.
+    """
+    import pandas as pd
+    path = pathlib.Path(path)
+    df = pd.read_csv(path) if path.suffix == ".csv" else pd.read_parquet(path)
+    ts = df["ts"]
+    if not np.issubdtype(ts.dtype, np.number):
+        ts = pd.to_datetime(ts).astype("int64") / 1e9
+    prev = None
+    for t, px in zip(ts.to_numpy(dtype=float), df["price"].to_numpy(dtype=float)):
+        if speed and prev is not None:
+            await asyncio.sleep(max(t - prev, 0.0) / speed)
+        spot_cache.update(px, t)
+        prev = t
@@ -0,0 +1,169 @@
+# src/stream/tick_store.py
+"""
+Partitioned, sorted tick store for quotes and trades (replay / research).
+
+Layout (hive-style, so any parquet reader sees the keys as columns):
+
+    data/ticks/{quotes,trades}/date=2025-05-19/hour=14/underlying=SPXW/expiry=2025-05-19/part-….parquet
+
+`hour` is the UTC hour of the tick.  Inside every file rows are sorted by
+(symbol, ts) and cut into row groups of ROW_GROUP rows with min/max
+statistics, so a symbol predicate skips most row groups and a time range
+skips whole date/hour directories.
+
+    build_day("2025-05-19")                        # after the session: sinks → store
+    read_ticks("quotes", symbols=["O:SPXW250519C05000000"],
+               start="2025-05-19 14:00", end="2025-05-19 14:30")
+
+`read_ticks` turns symbols into underlying/expiry partition filters and the
+time range into date/hour filters, and hands the full predicate to
+pyarrow.dataset -- only the matching files and row groups are read.
+"""
+from __future__ import annotations
+import datetime as _dt, os, pathlib as _pa, uuid
+import numpy as np
+import pyarrow as pa, pyarrow.compute as pc, pyarrow.dataset as ds
+
+from src.utils.occ import parse_many as parse_occ_many
+
+TICK_ROOT = _pa.Path(os.getenv("TICK_ROOT", "data/ticks"))
+ROW_GROUP = 64 * 1024
+_CODEC    = "zstd"
+KINDS     = ("quotes", "trades")
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("date", pa.string()), ("hour", pa.int8()),
+               ("underlying", pa.string()), ("expiry", pa.string())]),
+    flavor="hive")
+_KEYS = PARTITIONING.schema.names
+
+# --------------------------------------------------------------------------- #
+def _with_keys(tbl: pa.Table) -> pa.Table:
+    """Append the partition columns derived from ts and the OCC symbol."""
+    ts  = tbl.column("ts").cast(pa.timestamp("ns"))
+    occ = parse_occ_many(tbl.column("symbol"))
+    ns  = ts.cast(pa.int64()).to_numpy()
+    day = ns.astype("datetime64[ns]").astype("datetime64[D]")
+    hour = ((ns // 3_600_000_000_000) % 24).astype(np.int8)
+    return (tbl.append_column("date", pa.array(day.astype(str)))
+               .append_column("hour", pa.array(hour))
+               .append_column("underlying", pa.array(occ.root.astype(str)))
+               .append_column("expiry", pa.array(occ.expiry.astype(str))))
+
+def write_ticks(tbl: pa.Table, kind: str, *, root: _pa.Path | str = TICK_ROOT,
+                row_group_rows: int = ROW_GROUP, name: str | None = None) -> None:
+    """
+    Add a table of ticks (needs `ts` and `symbol`) to the store.  Files are
+    named `part-<name>-<i>.parquet` (random *name* by default); writing the
+    same *name* again replaces those files instead of adding rows.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {KINDS}, got {kind!r}")
+    if not tbl.num_rows:
+        return
+    tbl = _with_keys(tbl).sort_by([(k, "ascending") for k in _KEYS]
+                                  + [("symbol", "ascending"), ("ts", "ascending")])
+    ds.write_dataset(
+        tbl, _pa.Path(root) / kind, format="parquet", partitioning=PARTITIONING,
+        basename_template=f"part-{name or uuid.uuid4().hex[:12]}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore", preserve_order=True,
+        max_rows_per_group=row_group_rows, min_rows_per_group=min(row_group_rows, 1 << 14),
+        file_options=ds.ParquetFileFormat().make_write_options(
+            compression=_CODEC, use_dictionary=["symbol"], write_statistics=True))
+
+def build_day(day: str | _dt.date | None = None, *, src: _pa.Path | str = "data",
+              root: _pa.Path | str = TICK_ROOT) -> dict[str, int]:
+    """
+    Load a day's sink output (`data/<day>/{quotes,trades}.parquet/`) into the
+    store, streaming one input file at a time.  Returns rows written per kind.
+
+    Rebuilding is idempotent: output files are named after the source day
+    and input file (`part-<day>-<stem>-<i>.parquet`), and the day's previous
+    files are deleted first.  A local trading day can spill into the next
+    UTC `date=` partition, so only files tagged with *day* are touched --
+    other days' ticks in the same partitions stay.
+    """
+    day = str(day or _dt.date.today())
+    out = {}
+    for kind in KINDS:
+        path = _pa.Path(src) / day / f"{kind}.parquet"
+        n = 0
+        if path.exists():
+            dset = ds.dataset(path, format="parquet")
+            for d in _dates(dset) | {day}:
+                for f in (_pa.Path(root) / kind / f"date={d}").glob(f"**/part-{day}-*.parquet"):
+                    f.unlink()
+            for frag in dset.get_fragments():
+                tbl = frag.to_table()
+                write_ticks(tbl, kind, root=root, name=f"{day}-{_pa.Path(frag.path).stem}")
+                n += tbl.num_rows
+        out[kind] = n
+    return out
+
+def _dates(dset: ds.Dataset) -> set[str]:
+    """UTC dates spanned by a dataset's `ts` column."""
+    mm = pc.min_max(dset.to_table(columns=["ts"]).column("ts").cast(pa.timestamp("ns")))
+    if not mm["min"].is_valid:
+        return set()
+    lo, hi = (np.datetime64(mm[k].value, "ns").astype("datetime64[D]") for k in ("min", "max"))
+    return {str(d) for d in np.arange(lo, hi + 1)}
+
+# --------------------------------------------------------------------------- #
+def _ns(t) -> int:
+    if isinstance(t, str):
+        t = _dt.datetime.fromisoformat(t)
+    if isinstance(t, _dt.datetime):
+        if t.tzinfo is None:
+            t = t.replace(tzinfo=_dt.timezone.utc)
+        return int(t.timestamp()) * 1_000_000_000 + t.microsecond * 1_000
+    return int(t)
+
+def _day_hour(ns: int) -> tuple[str, int]:
+    t = _dt.datetime.fromtimestamp(ns // 1_000_000_000, tz=_dt.timezone.utc)
+    return t.date().isoformat(), t.hour
+
+def tick_filter(*, symbols=None, start=None, end=None) -> ds.Expression | None:
+    """
+    Dataset predicate for `symbols` and the [start, end) time window (naive
+    datetimes / ISO strings are UTC, ints are ns).  Partition keys are
+    constrained too, so whole directories are pruned before any file is opened.
+    """
+    conds = []
+    if symbols is not None:
+        symbols = list(symbols)
+        occ = parse_occ_many(symbols)
+        conds += [ds.field("symbol").isin(symbols),
+                  ds.field("underlying").isin(sorted(set(occ.root.astype(str)))),
+                  ds.field("expiry").isin(sorted(set(occ.expiry.astype(str))))]
+    if start is not None:
+        ns = _ns(start)
+        d, h = _day_hour(ns)
+        conds += [(ds.field("date") > d) | ((ds.field("date") == d) & (ds.field("hour") >= h)),
+                  ds.field("ts") >= pa.scalar(ns, pa.timestamp("ns"))]
+    if end is not None:
+        ns = _ns(end)
+        d, h = _day_hour(ns - 1)                     # end is exclusive
+        conds += [(ds.field("date") < d) | ((ds.field("date") == d) & (ds.field("hour") <= h)),
+                  ds.field("ts") < pa.scalar(ns, pa.timestamp("ns"))]
+    if not conds:
+        return None
+    expr = conds[0]
+    for c in conds[1:]:
+        expr = expr & c
+    return expr
+
+def dataset(kind: str, *, root: _pa.Path | str = TICK_ROOT) -> ds.Dataset:
+    return ds.dataset(_pa.Path(root) / kind, format="parquet", partitioning=PARTITIONING)
+
+def read_ticks(kind: str, *, symbols=None, start=None, end=None, columns=None,
+               root: _pa.Path | str = TICK_ROOT) -> pa.Table:
+    """
+    Ticks for *symbols* in [start, end), sorted by (ts, symbol).  `columns`
+    defaults to the stored tick columns (partition keys left out).
+    """
+    dset = dataset(kind, root=root)
+    if columns is None:
+        columns = [n for n in dset.schema.names if n not in _KEYS]
+    tbl = dset.to_table(columns=columns, filter=tick_filter(symbols=symbols, start=start, end=end))
+    keys = [k for k in ("ts", "symbol") if k in columns]
+    return tbl.sort_by([(k, "ascending") for k in keys]) if keys else tbl
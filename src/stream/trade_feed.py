@@ -1,84 +1,70 @@
 # ---------- src/stream/trade_feed.py ----------
 """
-Proof-of-concept trade feed.
-  • subscribes to ONE option contract (env TRADE_SUB)
+Option trades → side inference → TRADE_Q (+ parquet sink).
   • looks up latest quote in quote_cache
-  • prints side-inferred trade
+  • pushes the raw trade dict onto TRADE_Q for dealer.engine
+The socket lives in `src.stream.ingest`; `run(symbols)` is a trades-only
+convenience wrapper around it.
 Run:  TRADE_SUB='O:SPXW250521C05930000' PYTHONPATH=. python -m src.stream.trade_feed --debug
 """
 
-import os, json, logging, time, threading, websocket
+import os, asyncio, logging
 from datetime     import datetime, timezone
-from .polygon_client import make_ws            # you already have this
-from .quote_cache      import quote_cache      # filled by nbbo_feed.py
+from .quote_cache      import quote_cache, Quote   # filled by nbbo_feed.py
+from .bounded_queue    import BoundedQueue
 from .sinks import trade_sink                  # save trades to parquet
 
 _LOG = logging.getLogger("trade_feed")
-WS_URL       = "wss://socket.polygon.io/options"
-PING_SECONDS = 25
+MAX_QUOTE_AGE_MS = float(os.getenv("MAX_QUOTE_AGE_MS", "2000"))
+TRADE_Q_MAXSIZE  = int(os.getenv("TRADE_Q_MAXSIZE", "100000"))
+TRADE_Q_POLICY   = os.getenv("TRADE_Q_POLICY", "block")   # block | drop_oldest | coalesce
 
-def _infer_side(trd: dict, q: dict | None) -> str:
+def _trade_key(msg: dict):
+    # same contract AND same price ⇒ same aggressor side, so merging is lossless
+    return msg.get("sym"), msg.get("p")
+
+def _merge_trades(pending: dict, new: dict) -> None:
+    pending["s"] += new["s"]
+    pending["t"]  = new["t"]
+
+# consumed by dealer.engine in the same event loop
+TRADE_Q: BoundedQueue = BoundedQueue(TRADE_Q_MAXSIZE, policy=TRADE_Q_POLICY,
+                                     key=_trade_key, merge=_merge_trades)
+
+def _infer_side(trd: dict, q: Quote | None) -> str:
     "Return 'BUY' | 'SELL' | '?'  using last cached NBBO."
     if not q:
         return "?"
     px = trd["p"]
-    if px >= q["ask"] - 0.01:      # equity opts: ½-penny tick ok
+    if px >= q.ask - 0.01:      # equity opts: ½-penny tick ok
         return "BUY"
-    if px <= q["bid"] + 0.01:
+    if px <= q.bid + 0.01:
         return "SELL"
     return "?"
 
-def run_once():
-    sym  = os.getenv("TRADE_SUB")
-    if not sym:
-        raise RuntimeError("export TRADE_SUB='O:SPXWYYMMDDC05500000' (one OCC ticker)")
+async def _handle(msg: dict) -> None:
+    """Classify, persist and enqueue one trade (the dict is queued unchanged)."""
+    q = quote_cache.get(msg["sym"],       # None if missing or stale
+                        max_age_ms=MAX_QUOTE_AGE_MS, now_ms=msg["t"])
+    side = _infer_side(msg, q)
+    if _LOG.isEnabledFor(logging.DEBUG):
+        ts = datetime.fromtimestamp(msg["t"]/1e3, tz=timezone.utc)
+        _LOG.debug("%s  %-4s  %-22s %8.2f  x%s", ts.strftime("%H:%M:%S.%f")[:-3],
+                   side, msg["sym"], msg["p"], msg["s"])
 
-    ws = make_ws(WS_URL)
-    ws.send(json.dumps({"action":"subscribe", "params": f"T.{sym}"}))
+    # Save to parquet using the sink (ts, symbol, price, size, side "BUY"/"SELL"/"?")
+    trade_sink.add(int(msg["t"]) * 1_000_000, msg["sym"], msg["p"], msg["s"], side)
+    await TRADE_Q.put(msg)
 
-    # keep-alive pings (Polygon kills idle sockets ~60 s)
-    def _ping(ws):
-        """Background thread: send {"action":"ping"} every 2 s."""
-        while True:
-            try:
-                ws.send(json.dumps({"action": "ping"}))
-                time.sleep(2)
-            except Exception as e:          # socket closed – just exit thread, main loop will reconnect
-                logging.debug("ping thread exit: %s", e)
-                return
-    threading.Thread(target=_ping, args=(ws,), daemon=True).start()
-
-    _LOG.info("listening for trades on %s …", sym)
-    for raw in ws:
-        if not raw or raw == "heartbeat":
-            continue
-        try:
-            for msg in json.loads(raw):               # Polygon wraps in list
-                if msg.get("ev") != "T":              # just in case
-                    continue
-                q = quote_cache.get(msg["sym"])       # may be None
-                side = _infer_side(msg, q)
-                ts   = datetime.fromtimestamp(msg["t"]/1e3, tz=timezone.utc)\
-                                .strftime("%H:%M:%S.%f")[:-3]
-
-                print(f"{ts}  {side:4s}  {msg['sym']:22s} "
-                      f"{msg['p']:8.2f}  x{msg['s']}")
-                
-                # Save to parquet using the sink
-                snapshot_ts = datetime.fromtimestamp(msg["t"]/1e3, tz=timezone.utc)
-                trade_sink.append({
-                    "ts": snapshot_ts,
-                    "symbol": msg["sym"],
-                    "price": msg["p"],
-                    "size": msg["s"],
-                    "side": side,            # "BUY", "SELL", or "?"
-                })
-        except Exception:
-            _LOG.exception("bad trade msg")
+async def run(symbols=None, *, delayed: bool = False) -> None:
+    """Trades only, on their own socket (use `ingest.run` to share one with quotes)."""
+    from .ingest import run as ingest_run
+    _LOG.info("listening for trades on %s …", ", ".join(symbols) if symbols else "T.*")
+    await ingest_run(symbols, quotes=False, delayed=delayed)
 
 # --------------------------------------------------------------------------- #
 if __name__ == "__main__":
-    import argparse, logging
+    import argparse
     ap = argparse.ArgumentParser()
     ap.add_argument("--debug", action="store_true")
     args = ap.parse_args()
@@ -87,11 +73,7 @@ if __name__ == "__main__":
         level=logging.DEBUG if args.debug else logging.INFO,
         format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
     )
-    while True:
-        try:
-            run_once()          # reconnect-forever loop
-        except KeyboardInterrupt:
-            raise
-        except Exception as exc:
-            _LOG.error("WS crashed: %s — reconnecting in 3 s", exc)
-            time.sleep(3)
\ No newline at end of file
+    sym = os.getenv("TRADE_SUB")
+    if not sym:
+        raise RuntimeError("export TRADE_SUB='O:SPXWYYMMDDC05500000' (one OCC ticker)")
+    asyncio.run(run([sym]))
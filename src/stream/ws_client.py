@@ -6,6 +6,8 @@ from collections import defaultdict
 import websockets
 from dotenv import load_dotenv
 
+from src.stream.quote_cache import quotes      # shared NBBO store
+
 load_dotenv()                                   # reads .env
 
 API_KEY = os.getenv("POLYGON_KEY")
@@ -22,7 +24,6 @@ PING_MSG = json.dumps({"action": "ping"})
 
 # in-memory books ------------------------------------------------
 EPS        = 1e-4
-quotes     = {}                # ticker → (bid, ask)
 pos_long   = defaultdict(int)  # customer buy  (dealer short)
 pos_short  = defaultdict(int)  # customer sell (dealer long)
 # ----------------------------------------------------------------
@@ -30,12 +31,12 @@ pos_short  = defaultdict(int)  # customer sell (dealer long)
 
 def side_from_price(tkr: str, price: float):
     """Return 'buy' | 'sell' | None."""
-    bid, ask = quotes.get(tkr, (None, None))
-    if bid is None or ask is None:
+    q = quotes.get(tkr)
+    if q is None:
         return None
-    if price >= ask - EPS:
+    if price >= q.ask - EPS:
         return "buy"
-    if price <= bid + EPS:
+    if price <= q.bid + EPS:
         return "sell"
     return None
 
@@ -103,7 +104,7 @@ async def stream():
                 # Show a few samples if we have any
                 if quotes:
                     print("\nSample quotes:")
-                    for i, (sym, (bid, ask)) in enumerate(list(quotes.items())[:3]):
+                    for i, (sym, (bid, ask, _)) in enumerate(list(quotes.items())[:3]):
                         print(f"  {sym}: bid={bid}, ask={ask}")
                         
                 if pos_long or pos_short:
@@ -133,7 +134,9 @@ async def stream():
                     
                     # Handle quote message
                     if ev == "Q":  # Basic quote
-                        quotes[m["sym"]] = (m.get("bp", 0), m.get("ap", 0))
+                        quotes.update(symbol=m["sym"], bid=m.get("bp", 0), ask=m.get("ap", 0),
+                                      bid_size=m.get("bs", 0), ask_size=m.get("as", 0),
+                                      ts=m.get("t", 0))
                     
                     # Handle trade message and update positions
                     elif ev == "T":  # Basic trade
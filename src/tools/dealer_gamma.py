@@ -16,22 +16,28 @@ Returns
 -------
 dict(
     gamma_total : float      # total dealer γ in USD
-    gamma_flip  : float|None # strike where cum-γ crosses zero
-    df          : DataFrame  # strike-level dealer γ
+    gamma_flip  : float|None # spot where total dealer γ crosses zero
+                             # (±5 % revaluation ladder around under_px)
+    ladder      : Ladder     # spots × dealer γ behind gamma_flip
+    detail      : DataFrame  # strike-level dealer γ
 )
 """
 
 from __future__ import annotations
 import duckdb
+import numpy as np
 import pandas as pd
 
+from src.dealer.array_book import ladder
+
 
 def dealer_gamma_snapshot(db_path: str = "market.duckdb") -> dict:
     con = duckdb.connect(db_path, read_only=True)
 
     df: pd.DataFrame = con.execute("""
     WITH latest AS (
-        SELECT strike,
+        SELECT strike, type, expiry, date,
+               CAST(iv          AS DOUBLE) AS iv,
                CAST(gamma       AS DOUBLE) AS gamma,
                open_interest,
                CAST(under_px    AS DOUBLE) AS under_px
@@ -57,10 +63,17 @@ def dealer_gamma_snapshot(db_path: str = "market.duckdb") -> dict:
         raise RuntimeError("latest snapshot returned no non-zero gamma rows")
 
     total_gamma_usd = df["gamma_usd"].sum()
-    gamma_flip      = 200.0      # placeholder for now
+
+    # dealer sign as above: +γ calls, –γ puts; τ from the snapshot's date
+    tau = np.maximum((pd.to_datetime(df["expiry"]) - pd.to_datetime(df["date"])).dt.days,
+                     1) / 365
+    net = np.where(df["type"] == "C", 1, -1) * df["open_interest"]
+    lad = ladder(float(df["under_px"].iloc[0]), df["strike"], df["iv"], tau,
+                 df["type"] == "C", net)
 
     return {
         "gamma_total": total_gamma_usd,
-        "gamma_flip":  gamma_flip,
+        "gamma_flip":  lad.flip,
+        "ladder":      lad,
         "detail":      df.sort_values("gamma_usd", ascending=False)
     }
\ No newline at end of file
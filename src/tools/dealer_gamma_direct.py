@@ -7,6 +7,10 @@ import numpy as np
 import os
 import glob
 
+from src.dealer.array_book import ladder
+from src.greeks.smile import fit_svi, svi_sigma
+from src.utils.greeks import estimate_vol_from_moneyness
+
 MULTIPLIER = 100  # SPX contract size
 
 def get_latest_snapshot():
@@ -19,7 +23,23 @@ def get_latest_snapshot():
     # Sort by modification time (most recent first)
     latest = max(files, key=os.path.getmtime)
     print(f"Loading latest snapshot: {latest}")
-    return pd.read_parquet(latest)
+    df = pd.read_parquet(latest)
+    # the snapshot's own day (hive partition), as the DuckDB view exposes it
+    df["date"] = pd.Timestamp(os.path.basename(os.path.dirname(latest)).split("=", 1)[1])
+    return df
+
+
+def _smile_iv(strike, iv, spot, tau) -> np.ndarray:
+    """*iv* with missing/non-positive entries read off an SVI smile fitted per expiry."""
+    sigma = np.asarray(iv, dtype=float).copy()
+    strike, tau = np.asarray(strike, dtype=float), np.asarray(tau, dtype=float)
+    miss = ~(sigma > 0)
+    for t in np.unique(tau[miss]):
+        g, fill = tau == t, miss & (tau == t)
+        params = fit_svi(np.log(strike[g & ~miss] / spot), sigma[g & ~miss] ** 2 * t)
+        sigma[fill] = (svi_sigma(params, strike[fill], spot, t) if params is not None
+                       else estimate_vol_from_moneyness(np.abs(strike[fill] / spot - 1)))
+    return sigma
 
 
 def dealer_gamma_snapshot(contract_multiplier=MULTIPLIER) -> dict:
@@ -31,7 +51,10 @@ def dealer_gamma_snapshot(contract_multiplier=MULTIPLIER) -> dict:
         dict: Contains dealer gamma metrics including:
             - total_gamma: Total dealer gamma across all strikes
             - gamma_by_strike: Dictionary of gamma values by strike
-            - gamma_flip: Strike where cumulative gamma crosses zero
+            - gamma_flip: Spot level where total dealer gamma crosses zero
+              (revalued on a ±5% ladder around spot; None if it doesn't)
+            - ladder: the underlying Ladder(spots, gamma, flip)
+            - iv_filled: rows whose iv was missing and taken from the smile
     """
     # Get latest snapshot directly from the file system
     df = get_latest_snapshot()
@@ -67,17 +90,24 @@ def dealer_gamma_snapshot(contract_multiplier=MULTIPLIER) -> dict:
     
     total_gamma = float(df["dealer_gamma"].sum())
     
-    # Calculate gamma flip point
     df_sorted = df.sort_values("strike").reset_index(drop=True)
     df_sorted["cum_gamma"] = df_sorted["dealer_gamma"].cumsum()
-    
-    # Find row where cumulative gamma crosses zero
-    # (row with smallest absolute cum_gamma)
-    flip_row = df_sorted.loc[df_sorted["cum_gamma"].abs().idxmin()]
-    gamma_flip = float(flip_row["strike"]) if np.isfinite(flip_row["cum_gamma"]) else None
-    
+
+    # Gamma flip: revalue every contract across a grid of spots, same dealer sign;
+    # τ from the snapshot's date, missing iv from the smile of the rest
+    tau = np.maximum((pd.to_datetime(df_sorted["expiry"]) - pd.to_datetime(df_sorted["date"]))
+                     .dt.days, 1) / 365
+    iv_filled = int((~(df_sorted["iv"] > 0)).sum())
+    if iv_filled:
+        print(f"Warning: {iv_filled} of {len(df_sorted)} rows have no iv; using the fitted smile")
+    sigma = _smile_iv(df_sorted["strike"], df_sorted["iv"], spot, tau)
+    net = np.where(df_sorted["type"] == "C", 1, -1) * df_sorted["contract_size"]
+    lad = ladder(spot, df_sorted["strike"], sigma, tau, df_sorted["type"] == "C", net)
+
     return {
         "gamma_total": total_gamma,
-        "gamma_flip": gamma_flip,
+        "gamma_flip": lad.flip,
+        "ladder": lad,
+        "iv_filled": iv_filled,
         "df": df_sorted[["strike", "dealer_gamma"]]
     }
\ No newline at end of file
@@ -1,7 +1,12 @@
 """
 Read latest intraday snapshot and return live dealer gamma summary.
+
+gamma_flip is the spot level where the snapshot's positions, revalued on a
+±5 % ladder around the snapshot spot, change from net long to net short γ
+(None if they don't, or if the snapshot predates the iv/spot columns).
 """
 import glob, pandas as pd, numpy as np, datetime as dt
+from src.dealer.array_book import ladder
 
 def dealer_gamma_live(path="data/intraday"):
     files = sorted(glob.glob(f"{path}/*.parquet"))
@@ -9,10 +14,15 @@ def dealer_gamma_live(path="data/intraday"):
         raise RuntimeError("no intraday snapshot yet")
     df = pd.read_parquet(files[-1])
     total = df.gamma_usd.sum()
-    flip  = abs(total) / (df.gamma_usd.abs().sum()/df.shape[0])  # crude flip est
+    lad = None
+    if {"iv", "spot"} <= set(df.columns) and not df.empty:
+        lad = ladder(float(df.spot.iloc[0]), df.strike, df.iv,
+                     np.maximum(df.days_to_expiry, 1) / 365, df.type == "C", df.dealer_pos)
+    flip = None if lad is None or lad.flip is None else round(lad.flip, 1)
     return dict(ts=files[-1][-15:-7],
                 gamma_total = np.float64(total),
-                gamma_flip  = round(flip, 1),
+                gamma_flip  = flip,
+                ladder = lad,
                 detail = df)
 
 if __name__ == "__main__":
@@ -0,0 +1,144 @@
+"""
+Session-wide registry of option contracts: OCC symbol ↔ dense integer id.
+
+Ids are handed out once per session, in first-seen order, and never reused,
+so any layer can key arrays or dicts by them.  Strike / expiry / call-put
+are decoded when a contract is registered and kept in NumPy columns indexed
+by id -- hot paths look up one int and index arrays instead of re-parsing
+strings.
+
+    from src.utils.contracts import contracts
+    contracts.seed_snapshot(Path("data/snapshots"))   # today's chain, in one decode
+    ids = contracts.ids(["O:SPXW250519P05000000", …])  # unknown symbols are added
+    K, call = contracts.strike[ids], contracts.is_call[ids]
+
+One writer interns at a time (a lock is taken only for brand-new symbols);
+lookups of known symbols are lock-free dict reads.
+"""
+
+from __future__ import annotations
+import datetime as _dt
+import threading
+from pathlib import Path
+import numpy as np
+
+from src.utils.occ import parse_many as parse_occ_many
+
+class ContractRegistry:
+    def __init__(self, capacity: int = 4096) -> None:
+        self._ids:  dict[str, int] = {}
+        self._syms: list[str] = []
+        self._alloc(max(int(capacity), 1))
+        self._lock = threading.Lock()
+
+    def _alloc(self, cap: int) -> None:
+        n = len(self._syms)
+        for name, dtype in (("_strike", np.float64), ("_expiry", "datetime64[D]"),
+                            ("_is_call", np.bool_)):
+            col = np.zeros(cap, dtype)
+            if n:
+                col[:n] = getattr(self, name)[:n]
+            setattr(self, name, col)
+
+    def _add(self, symbols: list[str]) -> None:
+        """Register *symbols* (all new, distinct); caller holds the lock."""
+        occ = parse_occ_many(symbols)                # validates before anything is stored
+        n, m = len(self._syms), len(symbols)
+        if n + m > len(self._strike):
+            self._alloc(max(2 * len(self._strike), n + m))
+        self._strike[n:n + m]  = occ.strike
+        self._expiry[n:n + m]  = occ.expiry
+        self._is_call[n:n + m] = occ.is_call
+        self._syms.extend(symbols)
+        self._ids.update(zip(symbols, range(n, n + m)))
+
+    # --------------------------------------------------------------------- #
+    def id(self, symbol: str) -> int:
+        """Id of *symbol*, registering it if new (ValueError if it is not OCC)."""
+        i = self._ids.get(symbol)
+        if i is None:
+            with self._lock:
+                if symbol not in self._ids:
+                    self._add([symbol])
+            i = self._ids[symbol]
+        return i
+
+    def ids(self, symbols, *, strict: bool = True) -> np.ndarray:
+        """
+        Ids for a sequence of symbols; all new ones are decoded in one batch.
+        A malformed symbol raises ValueError, or gets id -1 with strict=False.
+        """
+        symbols = symbols if isinstance(symbols, list) else list(symbols)
+        get = self._ids.get
+        out = np.fromiter((get(s, -1) for s in symbols), dtype=np.intp, count=len(symbols))
+        new = np.flatnonzero(out < 0)
+        if new.size:
+            with self._lock:
+                fresh = list(dict.fromkeys(s for s in (symbols[i] for i in new)
+                                           if s not in self._ids))
+                if fresh:
+                    try:
+                        self._add(fresh)
+                    except ValueError:
+                        if strict:
+                            raise
+                        for s in fresh:              # keep the good ones
+                            try:
+                                self._add([s])
+                            except ValueError:
+                                pass
+            out[new] = [get(symbols[i], -1) for i in new]
+        return out
+
+    seed = ids
+
+    def seed_snapshot(self, snapshot_dir: Path, day: _dt.date | None = None) -> int:
+        """
+        Register every contract in `spx_contracts_YYYYMMDD.parquet` (the file
+        `contract_loader` reads); returns how many were new.
+        """
+        import pyarrow.parquet as pq
+        day  = day or _dt.date.today()
+        snap = Path(snapshot_dir) / f"spx_contracts_{day:%Y%m%d}.parquet"
+        if not snap.exists():
+            return 0
+        before = len(self)
+        self.ids(pq.read_table(snap, columns=["symbol"]).column("symbol").to_pylist())
+        return len(self) - before
+
+    def get(self, symbol: str) -> int | None:
+        """Id of *symbol* if registered (never registers)."""
+        return self._ids.get(symbol)
+
+    def symbol(self, cid: int) -> str:
+        return self._syms[cid]
+
+    def symbols(self, ids) -> list[str]:
+        s = self._syms
+        return [s[i] for i in np.asarray(ids).tolist()]
+
+    # ---------- metadata columns, indexed by id ----------
+    def _view(self, col: np.ndarray) -> np.ndarray:
+        v = col[:len(self._syms)]
+        v.flags.writeable = False
+        return v
+
+    @property
+    def strike(self) -> np.ndarray:
+        return self._view(self._strike)
+
+    @property
+    def expiry(self) -> np.ndarray:
+        return self._view(self._expiry)
+
+    @property
+    def is_call(self) -> np.ndarray:
+        return self._view(self._is_call)
+
+    def __len__(self) -> int:
+        return len(self._syms)
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self._ids
+
+contracts = ContractRegistry()
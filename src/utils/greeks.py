@@ -3,9 +3,173 @@ Option Greeks calculation utilities using Black-Scholes model.
 Includes functions for calculating implied volatility and option Greeks.
 """
 import math
-from scipy.stats import norm
-from scipy.optimize import brentq
+import numpy as np
+from scipy.special import erf
 
+_SQRT2       = math.sqrt(2.0)
+_INV_SQRT2PI = 1.0 / math.sqrt(2.0 * math.pi)
+_MIN_TAU     = 1 / 365
+
+# ---------------------------------------------------------------------------
+# Vectorized kernel
+# ---------------------------------------------------------------------------
+def _norm_cdf(x):
+    """Standard normal CDF via erf (works on scalars and arrays)."""
+    return 0.5 * (1.0 + erf(x / _SQRT2))
+
+def _norm_pdf(x):
+    """Standard normal PDF (works on scalars and arrays)."""
+    return _INV_SQRT2PI * np.exp(-0.5 * x * x)
+
+def _as_is_call(cp):
+    """Accept 'C'/'P' strings, booleans, or arrays of either; return a bool array."""
+    cp = np.asarray(cp)
+    if cp.dtype.kind in ("U", "S", "O"):
+        return np.char.upper(cp.astype(str)) == "C"
+    return cp.astype(bool)
+
+def bs_price_vec(s, k, iv, tau, is_call):
+    """
+    Black-Scholes price for whole arrays of contracts in one pass.
+
+    Parameters:
+    s: spot price(s)
+    k: strike price(s)
+    iv: implied volatility(ies)
+    tau: time(s) to maturity in years
+    is_call: bool array, or 'C'/'P' array
+
+    Returns:
+    NumPy array of option prices (broadcast shape of the inputs)
+    """
+    s, k, iv, tau = (np.asarray(x, dtype=float) for x in (s, k, iv, tau))
+    is_call = _as_is_call(is_call)
+    sqrt_t = np.sqrt(tau)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d1 = (np.log(s / k) + 0.5 * iv**2 * tau) / (iv * sqrt_t)
+    d2 = d1 - iv * sqrt_t
+    call = s * _norm_cdf(d1) - k * _norm_cdf(d2)
+    put  = k * _norm_cdf(-d2) - s * _norm_cdf(-d1)
+    return np.where(is_call, call, put)
+
+def bs_greeks_vec(s, k, iv, tau, is_call, r=0.0):
+    """
+    Black-Scholes Greeks for whole arrays of contracts in one pass.
+
+    Parameters:
+    s: spot price(s)
+    k: strike price(s)
+    iv: implied volatility(ies); NaN or <= 0 yields NaN Greeks
+    tau: time(s) to maturity in years (clamped to at least one day)
+    is_call: bool array, or 'C'/'P' array
+    r: risk-free rate (default 0)
+
+    Returns:
+    delta, gamma, vega, theta as NumPy arrays
+    (vega per 1 vol-pt, theta per calendar day)
+    """
+    s, k, iv, tau = (np.asarray(x, dtype=float) for x in (s, k, iv, tau))
+    is_call = _as_is_call(is_call)
+    tau = np.maximum(tau, _MIN_TAU)
+    iv  = np.where(iv > 0, iv, np.nan)            # NaN propagates for bad IVs
+
+    sqrt_t = np.sqrt(tau)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d1 = (np.log(s / k) + (r + 0.5 * iv**2) * tau) / (iv * sqrt_t)
+    phi = _norm_pdf(d1)
+    n1  = _norm_cdf(d1)
+
+    delta = np.where(is_call, n1, n1 - 1.0)
+    gamma = phi / (s * iv * sqrt_t)
+    vega  = s * phi * sqrt_t / 100                # per 1 vol-pt
+    theta = (-(s * phi * iv) / (2 * sqrt_t)) / 365  # daily theta
+    return delta, gamma, vega, theta
+
+_IV_LO, _IV_HI = 1e-4, 3.0      # solver bracket (same as the old brentq call)
+
+def _iv_guess(price, s, k, tau, is_call):
+    """Corrado-Miller rational initial guess, applied to the call-equivalent price."""
+    call = np.where(is_call, price, price + s - k)       # put-call parity (r = 0)
+    x    = call - 0.5 * (s - k)
+    disc = np.maximum(x * x - (s - k) ** 2 / math.pi, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        guess = math.sqrt(2 * math.pi) / (s + k) * (x + np.sqrt(disc)) / np.sqrt(tau)
+    guess = np.where(np.isfinite(guess) & (guess > 0), guess, 0.2)
+    return np.clip(guess, _IV_LO, _IV_HI)
+
+def implied_vol_vec(price, s, k, tau, is_call, *, tol=1e-8, max_iter=50):
+    """
+    Solve implied volatility for whole arrays of contracts at once.
+
+    Starts from a rational initial guess, then takes vectorized Newton
+    steps; any step that leaves the current [lo, hi] bracket (or meets a
+    vanishing vega) falls back to bisection, so every element converges
+    whenever a root exists in [1e-4, 3.0].
+
+    Parameters:
+    price: market price(s) of the options
+    s: spot price(s)
+    k: strike price(s)
+    tau: time(s) to maturity in years (clamped to at least one day)
+    is_call: bool array, or 'C'/'P' array
+    tol: implied-vol tolerance (Newton step or bracket width)
+    max_iter: maximum solver iterations
+
+    Returns:
+    sigma, converged  --  float array (NaN where unsolved) and bool mask
+    """
+    price, s, k, tau = np.broadcast_arrays(*(np.asarray(x, dtype=float)
+                                             for x in (price, s, k, tau)))
+    shape   = price.shape
+    is_call = np.broadcast_to(_as_is_call(is_call), shape)
+    price, s, k, is_call = (a.ravel() for a in (price, s, k, is_call))
+    tau = np.maximum(tau.ravel(), _MIN_TAU)
+
+    n     = price.size
+    sigma = np.full(n, np.nan)
+    done  = np.zeros(n, dtype=bool)
+
+    # a root exists only if the price lies between the bracket-end prices
+    lo = np.full(n, _IV_LO)
+    hi = np.full(n, _IV_HI)
+    with np.errstate(all="ignore"):
+        ok = ((bs_price_vec(s, k, lo, tau, is_call) <= price)
+              & (price <= bs_price_vec(s, k, hi, tau, is_call))
+              & (s > 0) & (k > 0))
+    idx = np.flatnonzero(ok)
+    x   = _iv_guess(price[idx], s[idx], k[idx], tau[idx], is_call[idx])
+    lo, hi = lo[idx], hi[idx]
+
+    for _ in range(max_iter):
+        if idx.size == 0:
+            break
+        p, S, K, T, C = price[idx], s[idx], k[idx], tau[idx], is_call[idx]
+        sqrt_t = np.sqrt(T)
+        with np.errstate(all="ignore"):
+            diff = bs_price_vec(S, K, x, T, C) - p
+            d1   = (np.log(S / K) + 0.5 * x * x * T) / (x * sqrt_t)
+        vega = S * _norm_pdf(d1) * sqrt_t
+
+        conv = (np.abs(diff) <= tol * vega) | (hi - lo <= tol)
+        sigma[idx[conv]] = x[conv]
+        done[idx[conv]]  = True
+
+        # shrink bracket, then Newton step with bisection fallback
+        hi = np.where(diff > 0, x, hi)
+        lo = np.where(diff > 0, lo, x)
+        with np.errstate(all="ignore"):
+            step = x - diff / vega
+        bad  = ~np.isfinite(step) | (step <= lo) | (step >= hi)
+        x    = np.where(bad, 0.5 * (lo + hi), step)
+
+        keep = ~conv
+        idx, x, lo, hi = idx[keep], x[keep], lo[keep], hi[keep]
+
+    return sigma.reshape(shape), done.reshape(shape)
+
+# ---------------------------------------------------------------------------
+# Scalar API (thin wrappers over the kernel)
+# ---------------------------------------------------------------------------
 def bs_price(s, k, iv, tau, cp):
     """
     Calculate option price using Black-Scholes formula.
@@ -20,16 +184,11 @@ def bs_price(s, k, iv, tau, cp):
     Returns:
     Option price
     """
-    d1 = (math.log(s / k) + 0.5 * iv**2 * tau) / (iv * math.sqrt(tau))
-    d2 = d1 - iv * math.sqrt(tau)
-    if cp == "C":
-        return s * norm.cdf(d1) - k * norm.cdf(d2)
-    else:  # Put via put-call parity
-        return k * norm.cdf(-d2) - s * norm.cdf(-d1)
+    return float(bs_price_vec(s, k, iv, tau, cp == "C"))
 
 def implied_vol(price, s, k, tau, cp):
     """
-    Calculate implied volatility using Brent's method.
+    Calculate implied volatility (single-element call to implied_vol_vec).
     Return sigma or None if root-find fails.
     
     Parameters:
@@ -42,14 +201,11 @@ def implied_vol(price, s, k, tau, cp):
     Returns:
     Implied volatility as a float or None if calculation fails
     """
-    # Ensure minimum time to maturity to avoid numerical issues
-    tau = max(tau, 1/365)
-    
     try:
-        f = lambda sigma: bs_price(s, k, sigma, tau, cp) - price
-        return brentq(f, 1e-4, 3.0, maxiter=100, rtol=1e-6)
+        sigma, ok = implied_vol_vec(price, s, k, tau, cp == "C")
     except Exception:
         return None
+    return float(sigma) if ok else None
 
 def bs_greeks(s, k, iv, tau, cp):
     """
@@ -65,21 +221,11 @@ def bs_greeks(s, k, iv, tau, cp):
     Returns:
     gamma, vega, theta as a tuple
     """
-    # Ensure minimum time to maturity and valid IV
-    tau = max(tau, 1/365)
     if iv is None or math.isnan(iv) or iv <= 0:
         return float('nan'), float('nan'), float('nan')
-    
-    d1 = (math.log(s / k) + 0.5 * iv**2 * tau) / (iv * math.sqrt(tau))
-    d2 = d1 - iv * math.sqrt(tau)
-    phi = norm.pdf(d1)
-    
-    # Greek calculations
-    gamma = phi / (s * iv * math.sqrt(tau))
-    vega = s * phi * math.sqrt(tau) / 100  # per 1 vol-pt
-    theta = (- (s * phi * iv) / (2 * math.sqrt(tau))) / 365  # daily theta
-    
-    return gamma, vega, theta
+
+    _, gamma, vega, theta = bs_greeks_vec(s, k, iv, tau, cp == "C")
+    return float(gamma), float(vega), float(theta)
 
 # Backward compatibility for older code
 def bs_greeks_dict(option_type, S, K, T, r, sigma):
@@ -108,24 +254,15 @@ def bs_greeks_dict(option_type, S, K, T, r, sigma):
             'vega': float('nan')
         }
     
-    # Ensure minimum time to maturity to avoid numerical issues
-    T = max(T, 1/365)
-    
-    # Convert option_type to cp format
-    cp = "C" if option_type.lower() == 'call' else "P"
-    
-    # Calculate Greeks using new function
-    gamma, vega, theta = bs_greeks(S, K, sigma, T, cp)
-    
-    # Calculate delta separately since it's not in the new function
-    d1 = (math.log(S/K) + (r + 0.5 * sigma**2) * T) / (sigma * math.sqrt(T))
-    delta = norm.cdf(d1) if cp == "C" else norm.cdf(d1) - 1
+    # Calculate all Greeks in one kernel call
+    is_call = option_type.lower() == 'call'
+    delta, gamma, vega, theta = bs_greeks_vec(S, K, sigma, T, is_call, r)
     
     return {
-        'delta': delta,
-        'gamma': gamma,
-        'theta': theta,
-        'vega': vega
+        'delta': float(delta),
+        'gamma': float(gamma),
+        'theta': float(theta),
+        'vega': float(vega)
     }
 
 # For backward compatibility
@@ -134,8 +271,11 @@ def estimate_vol_from_moneyness(moneyness, base_vol=0.20):
     Estimate implied volatility based on option moneyness when market data isn't available.
     Uses the volatility smile approximation.
     
+    This is the single ad-hoc fallback shared by VolSurface, the snapshot
+    ingester and the intraday snapshot when no fitted smile is available.
+    
     Parameters:
-    moneyness: Absolute value of (K/S - 1)
+    moneyness: Absolute value of (K/S - 1) (scalar or array)
     base_vol: Base ATM volatility (default 20%)
     
     Returns:
@@ -143,8 +283,8 @@ def estimate_vol_from_moneyness(moneyness, base_vol=0.20):
     """
     # Simple volatility smile approximation
     # ATM options have lowest vol, vol increases as you move away from ATM
-    vol = base_vol + 0.5 * moneyness**2
-    return min(vol, 1.5)  # Cap at 150% to avoid extreme values
+    vol = base_vol + 0.5 * np.asarray(moneyness, dtype=float)**2
+    return np.minimum(vol, 1.5)  # Cap at 150% to avoid extreme values
 
 # Functions required by the engine test
 def gamma(s, k, iv, tau, cp=None):
@@ -3,25 +3,115 @@ Minimal OCC-ticker utilities for SPX/SPXW index options.
 
 OCC sym format:  O:{root}{YY}{MM}{DD}{C/P}{strike*1000:08d}
 Example:         O:SPXW250519P05000000
+
+parse(sym)        one symbol → ParsedOCC, memoized (a symbol is decoded once
+                  per session, however often it trades)
+parse_many(syms)  whole column (list, NumPy, pandas or Arrow) → OCCArrays,
+                  decoded as a byte matrix with no per-symbol Python work
 """
 
 from __future__ import annotations
 import datetime as _dt
+from functools import lru_cache
 from typing import NamedTuple
+import numpy as np
+
+CACHE_SIZE = 1 << 16          # distinct contracts kept by parse()
 
 class ParsedOCC(NamedTuple):
     root: str         # 'SPXW'
     expiry: _dt.date  # YYYY-MM-DD
-    strike: int       # 5250 = 5250.00
+    strike: float     # 5250.0; fractional strikes kept (4200.5)
     is_call: bool
 
+class OCCArrays(NamedTuple):
+    root:    np.ndarray   # |S   b'SPXW' (bytes: no per-row str objects)
+    expiry:  np.ndarray   # datetime64[D]
+    strike:  np.ndarray   # float64, 5250.0 (fractional strikes kept)
+    is_call: np.ndarray   # bool
+
+@lru_cache(maxsize=CACHE_SIZE)
 def parse(symbol: str) -> ParsedOCC:
-    if not symbol.startswith("O:"):
+    if not symbol.startswith("O:") or len(symbol) < 18:     # 'O:' + root + 15
         raise ValueError(f"not an OCC symbol: {symbol}")
     body = symbol[2:]          # strip 'O:'
     root      = body[:-15]     # 'SPX' or 'SPXW'
     yy, mm, dd = body[-15:-9][:2], body[-13:-11], body[-11:-9]
     cp        = body[-9]       # 'C' or 'P'
-    strike_x1000 = int(body[-8:])
-    expiry = _dt.date(int("20" + yy), int(mm), int(dd))
-    return ParsedOCC(root, expiry, strike_x1000 // 1000, cp == "C")
\ No newline at end of file
+    try:
+        strike_x1000 = int(body[-8:])
+        expiry = _dt.date(int("20" + yy), int(mm), int(dd))   # rejects 2025-02-31
+    except ValueError:
+        raise ValueError(f"not an OCC symbol: {symbol}") from None
+    if cp not in ("C", "P") or not body[-8:].isdigit():
+        raise ValueError(f"not an OCC symbol: {symbol}")
+    return ParsedOCC(root, expiry, strike_x1000 / 1000, cp == "C")
+
+# --------------------------------------------------------------------------- #
+_STRIKE_W = 10 ** np.arange(7, -1, -1)
+_windows  = np.lib.stride_tricks.sliding_window_view
+
+def _buffers(symbols) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(bytes, start offsets, end offsets) of a string column, without copying Arrow data."""
+    if "pyarrow" in type(symbols).__module__:
+        import pyarrow as pa
+        if isinstance(symbols, pa.ChunkedArray):
+            symbols = symbols.combine_chunks()
+        if symbols.null_count:
+            raise ValueError("OCC symbol column has nulls")
+        off_t = np.int64 if pa.types.is_large_string(symbols.type) else np.int32
+        _, offs, data = symbols.buffers()
+        offs = np.frombuffer(offs, off_t)[symbols.offset:symbols.offset + len(symbols) + 1]
+        data = np.frombuffer(data, np.uint8) if data is not None else np.zeros(1, np.uint8)
+        return data, offs[:-1].astype(np.int64), offs[1:].astype(np.int64)
+    if hasattr(symbols, "to_numpy"):               # pandas Series / Index
+        symbols = symbols.to_numpy()
+    s = np.asarray(symbols)
+    if s.dtype.kind != "S":
+        s = s.astype("S")                          # ASCII; non-ASCII raises here
+    s = np.ascontiguousarray(s.ravel())
+    w = s.dtype.itemsize
+    b = s.view(np.uint8).reshape(s.size, w)
+    starts = np.arange(s.size, dtype=np.int64) * w
+    return b.ravel(), starts, starts + (b != 0).sum(axis=1)   # tickers hold no NULs
+
+def parse_many(symbols) -> OCCArrays:
+    """
+    Decode a column of OCC symbols at once (list, NumPy, pandas or Arrow).
+    The fixed-width tail is gathered right-aligned out of the raw string
+    bytes -- Arrow's data buffer is read in place -- so roots of any length
+    mix freely.  Raises ValueError naming the first malformed symbol.
+    """
+    data, starts, ends = _buffers(symbols)
+    n = starts.size
+    if n == 0:
+        return OCCArrays(np.empty(0, "S1"), np.empty(0, "datetime64[D]"),
+                         np.empty(0), np.empty(0, bool))
+    rlen  = ends - starts - 17                     # root length ('O:' + root + 15)
+    width = max(int(rlen.max()), 1)
+    # windows over the (padded) bytes: gathering one row copies a whole field
+    pad  = np.concatenate([data, np.zeros(width + 17, np.uint8)])
+    ok   = rlen > 0
+    tail = _windows(pad, 15)[np.where(ok, ends - 15, 0)]
+    head = pad[starts], pad[starts + 1]
+    digits = np.delete(tail, 6, axis=1) - np.uint8(48)    # wraps: non-digits become > 9
+    cp = tail[:, 6]
+    d  = digits.astype(np.int32)
+    yy = d[:, 0] * 10 + d[:, 1]
+    mm = d[:, 2] * 10 + d[:, 3]
+    dd = d[:, 4] * 10 + d[:, 5]
+    month  = ((yy + 30) * 12 + mm - 1).astype("datetime64[M]")     # 2000 = 1970 + 30
+    expiry = month.astype("datetime64[D]") + (dd - 1).astype("timedelta64[D]")
+    bad = (~ok | (head[0] != ord("O")) | (head[1] != ord(":"))
+           | ((cp != ord("C")) & (cp != ord("P"))) | (digits > 9).any(axis=1)
+           | (mm < 1) | (mm > 12) | (dd < 1)
+           | (expiry.astype("datetime64[M]") != month))    # day past month end, as parse()
+    if bad.any():
+        i = int(np.argmax(bad))
+        raise ValueError(f"not an OCC symbol: {bytes(data[starts[i]:ends[i]]).decode(errors='replace')}")
+    strike = (d[:, 6:].astype(np.int64) @ _STRIKE_W) / 1000.0
+
+    root = _windows(pad, width)[starts + 2]
+    root[np.arange(width) >= rlen[:, None]] = 0
+    root = np.ascontiguousarray(root).view(f"S{width}").ravel()
+    return OCCArrays(root, expiry, strike, cp == ord("C"))
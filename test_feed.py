@@ -18,7 +18,7 @@ async def main():
         # List a few quotes if we have any
         if len(w.quotes) > 0:
             print("\nSample quotes:")
-            for i, (symbol, (bid, ask)) in enumerate(list(w.quotes.items())[:3]):
+            for i, (symbol, (bid, ask, _)) in enumerate(list(w.quotes.items())[:3]):
                 print(f"  {symbol}: bid={bid}, ask={ask}")
                 
         # List some buy/sell positions if we have any
@@ -0,0 +1,66 @@
+import datetime as dt, math, random
+import numpy as np
+from src.dealer.array_book import ArrayStrikeBook
+from src.dealer.strike_book import StrikeBook, Side
+
+D1, D2 = dt.date(2025, 5, 19), dt.date(2025, 5, 20)
+
+def test_matches_dict_book_and_grows():
+    arr = ArrayStrikeBook.from_contracts(["O:SPXW250519C05000000", "O:SPXW250519P04990000"])
+    ref = StrikeBook()
+    rng = random.Random(1)
+    for _ in range(400):                                  # most strikes are new ⇒ growth
+        key = (rng.choice(range(4900, 5100, 5)), rng.random() < 0.5)
+        args = (key, rng.choice([Side.BUY, Side.SELL]), rng.randint(1, 9), rng.random() * 1e-3)
+        e = rng.choice([D1, D2])
+        arr.update(*args, expiry=e)
+        ref.update(*args, expiry=e)
+    arr.update_many([(5000, True), (5000, True)], [2, 1], [0, 4], [-1e-3, 5e-4], [D1, D1])
+    ref.update_many([(5000, True), (5000, True)], [2, 1], [0, 4], [-1e-3, 5e-4], [D1, D1])
+
+    for key in [(5000, True), (4990, False), (5095, True)]:
+        a, r = arr.row(key), ref.row(key)
+        assert a[:2] == r[:2] and math.isclose(a.net_gamma, r.net_gamma, abs_tol=1e-12)
+    assert math.isclose(arr.total_gamma(), ref.total_gamma(), rel_tol=1e-9)
+    assert arr.net_contracts() == ref.net_contracts()
+    assert math.isclose(arr.expiry_gamma(D2), ref.expiry_gamma(D2), rel_tol=1e-9)
+
+    strikes, g = arr.strike_profile()
+    assert np.all(np.diff(strikes) > 0) and math.isclose(g.sum(), arr.total_gamma(), rel_tol=1e-9)
+
+def test_gamma_flip_interpolates_zero_crossing():
+    book = ArrayStrikeBook()
+    book.update((4900, False), Side.SELL, 10, 1.0)        # +10 dealer γ
+    book.update((5000, True), Side.BUY, 30, 1.0)          # -30 ⇒ cum: 10, -20
+    assert math.isclose(book.gamma_flip(), 4900 + 100 * 10 / 30)
+    assert ArrayStrikeBook().gamma_flip() is None
+
+def test_revalue_at_spot_uses_booked_sigma():
+    from src.utils.greeks import bs_greeks_vec
+    book = ArrayStrikeBook()
+    book.update((5000, True), Side.SELL, 4, 1e-3, expiry=D2, sigma=0.15)    # dealer +4
+    book.update((4900, False), Side.BUY, 6, 1e-3, expiry=D2, sigma=0.25)    # dealer -6
+    book.update((5100, True), Side.BUY, 2, 1e-3, expiry=D2, sigma=0.12)
+    book.update((5100, True), Side.SELL, 2, 1e-3, expiry=D2, sigma=0.12)    # flat ⇒ ignored
+
+    pos, g = book.revalue(5050.0, asof=D1)
+    assert len(pos.net) == 2 and np.allclose(pos.tau, 1 / 365)
+    _, ref, _, _ = bs_greeks_vec(5050.0, pos.strike, pos.sigma, pos.tau, pos.is_call)
+    assert np.allclose(g, pos.net * ref)
+
+    strikes, prof = book.revalued_profile(5050.0, asof=D1)
+    assert list(strikes) == [4900, 5000]
+    assert math.isclose(prof.sum(), book.revalued_gamma(5050.0, asof=D1), rel_tol=1e-12)
+    assert book.revalued_gamma(5000.0, asof=D1) != book.revalued_gamma(5100.0, asof=D1)
+
+def test_ladder_matches_pointwise_revaluation_and_finds_flip():
+    book = ArrayStrikeBook()
+    book.update((4900, False), Side.SELL, 50, 1e-3, expiry=D2, sigma=0.2)   # dealer long γ below
+    book.update((5100, True), Side.BUY, 50, 1e-3, expiry=D2, sigma=0.2)     # dealer short γ above
+    lad = book.ladder(5000.0, asof=D1, steps=41)
+    assert lad.spots[0] == 4750.0 and lad.spots[-1] == 5250.0 and len(lad.spots) == 41
+    for s, g in zip(lad.spots[::10], lad.gamma[::10]):
+        assert math.isclose(g, book.revalued_gamma(s, asof=D1), rel_tol=1e-9, abs_tol=1e-15)
+    assert lad.gamma[0] > 0 > lad.gamma[-1]
+    assert 4990 < lad.flip < 5010                                           # ~symmetric book
+    assert ArrayStrikeBook().ladder(5000.0).flip is None
@@ -0,0 +1,42 @@
+import asyncio, pytest
+from src.stream.bounded_queue import BoundedQueue
+
+pytestmark = pytest.mark.asyncio
+
+async def test_drop_oldest_keeps_newest_and_counts():
+    q = BoundedQueue(2, policy="drop_oldest")
+    for i in range(5):
+        await q.put(i)                                # never blocks
+    assert [q.get_nowait(), q.get_nowait()] == [3, 4]
+    st = q.stats()
+    assert (st.depth, st.dropped, st.high_water, st.put, st.got) == (0, 3, 2, 5, 2)
+
+async def test_coalesce_merges_same_key_then_falls_back():
+    def merge(old, new):
+        old["s"] += new["s"]
+
+    q = BoundedQueue(2, policy="coalesce", key=lambda m: m["sym"], merge=merge)
+    q.put_nowait({"sym": "A", "s": 1})
+    q.put_nowait({"sym": "B", "s": 1})
+    q.put_nowait({"sym": "A", "s": 4})                # full → merged into pending A
+    q.put_nowait({"sym": "C", "s": 1})                # no pending C → drops oldest (A)
+    assert [q.get_nowait(), q.get_nowait()] == [{"sym": "B", "s": 1}, {"sym": "C", "s": 1}]
+    assert (q.stats().coalesced, q.stats().dropped) == (1, 1)
+
+async def test_block_policy_waits_and_reports_lag():
+    q = BoundedQueue(1)
+    q.put_nowait("x")
+    with pytest.raises(asyncio.QueueFull):
+        q.put_nowait("y")
+    putter = asyncio.create_task(q.put("y"))
+    await asyncio.sleep(0.02)
+    assert not putter.done() and q.stats().lag_ms >= 10
+    assert await q.get() == "x"
+    await putter
+    assert q.stats().max_lag_ms >= 10
+
+async def test_bad_config_rejected():
+    with pytest.raises(ValueError):
+        BoundedQueue(10, policy="spill")
+    with pytest.raises(ValueError):
+        BoundedQueue(10, policy="coalesce")
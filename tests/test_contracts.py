@@ -0,0 +1,36 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+import pytest
+from src.utils.contracts import ContractRegistry
+from src.utils.occ import parse
+
+SYMS = ["O:SPXW250519P05000000", "O:SPXW250519C05010000", "O:SPX250620C04800000"]
+
+def test_ids_are_dense_stable_and_carry_metadata():
+    reg = ContractRegistry(capacity=2)                     # forces growth
+    ids = reg.ids(SYMS + SYMS[:1])
+    assert ids.tolist() == [0, 1, 2, 0]
+    assert reg.id("O:SPXW250519C05010000") == 1 and reg.get("O:SPX") is None
+    assert reg.ids(["O:SPXW250519P04990000", SYMS[2]]).tolist() == [3, 2]
+    for s in SYMS:
+        p, i = parse(s), reg.id(s)
+        assert (reg.strike[i], reg.is_call[i], reg.expiry[i].astype(dt.date)) == \
+               (p.strike, p.is_call, p.expiry)
+    assert reg.symbols([2, 0]) == [SYMS[2], SYMS[0]]
+    assert len(reg) == 4 and SYMS[1] in reg
+
+    with pytest.raises(ValueError):
+        reg.ids(["O:SPXW250519P05020000", "garbage"])
+    assert len(reg) == 4                                   # nothing half-registered
+    assert reg.ids(["garbage", "O:SPXW250519P05020000"], strict=False).tolist() == [-1, 4]
+
+def test_seed_snapshot(tmp_path):
+    day = dt.date(2025, 5, 19)
+    pd.DataFrame({"symbol": SYMS, "expiration": "20250519"}).to_parquet(
+        tmp_path / "spx_contracts_20250519.parquet")
+    reg = ContractRegistry()
+    assert reg.seed_snapshot(tmp_path, day) == 3
+    assert reg.seed_snapshot(tmp_path, day) == 0
+    assert reg.seed_snapshot(tmp_path, dt.date(2025, 5, 20)) == 0
+    assert np.array_equal(reg.ids(SYMS), [0, 1, 2])
@@ -19,4 +19,40 @@ def test_dealer_gamma_nonzero():
         if res["gamma_flip"] is not None:
             assert 0 < res["gamma_flip"] < 10000, f"Gamma flip point outside reasonable range: {res['gamma_flip']}"
     except Exception as e:
-        pytest.skip(f"Could not test dealer gamma: {str(e)}")
\ No newline at end of file
+        pytest.skip(f"Could not test dealer gamma: {str(e)}")
+
+def _write_snapshot(root, iv):
+    import numpy as np, pandas as pd
+    strikes = np.arange(4900, 5101, 10, dtype=float)
+    df = pd.DataFrame({
+        "type": ["C"] * len(strikes) + ["P"] * len(strikes),
+        "strike": np.concatenate([strikes, strikes]),
+        "expiry": "2025-05-23",
+        "open_interest": 100,
+        "iv": iv,
+        "gamma": 1e-3,
+        "under_px": 5000.0,
+    })
+    path = root / "data/parquet/spx/date=2025-05-19/10_00_00.parquet"
+    path.parent.mkdir(parents=True)
+    df.to_parquet(path)
+    return df
+
+
+def test_flip_uses_snapshot_date_and_smile_for_missing_iv(tmp_path, monkeypatch):
+    import math, numpy as np
+    from src.dealer.array_book import ladder
+    from src.utils.greeks import estimate_vol_from_moneyness
+    monkeypatch.chdir(tmp_path)
+    df = _write_snapshot(tmp_path, iv=np.nan)
+
+    res = dealer_gamma_snapshot()
+    assert res["iv_filled"] == len(df)
+    assert res["gamma_flip"] is not None
+
+    # τ is expiry minus the snapshot's day (4 days), not minus today's date
+    d = df.sort_values("strike")
+    sigma = estimate_vol_from_moneyness(np.abs(d["strike"].to_numpy() / 5000.0 - 1))
+    net = np.where(d["type"] == "C", 1, -1) * 100
+    ref = ladder(5000.0, d["strike"], sigma, np.full(len(d), 4 / 365), d["type"] == "C", net)
+    assert math.isclose(res["gamma_flip"], ref.flip, rel_tol=1e-9)
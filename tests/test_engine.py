@@ -1,4 +1,5 @@
 import asyncio, math, time, types, pytest
+import numpy as np
 from src.dealer.engine import run as engine_run, _book
 from src.stream.trade_feed import TRADE_Q
 from src.stream.quote_cache import quotes
@@ -14,9 +15,7 @@ async def test_engine_updates(monkeypatch):
     monkeypatch.setattr("src.dealer.engine._surface.get_sigma", lambda *a, **k: 0.20)
 
     # Clear book to ensure clean test state
-    _book._long.clear()
-    _book._short.clear()
-    _book._gamma.clear()
+    _book.reset()
 
     # Clear queue to ensure clean test state
     while not TRADE_Q.empty():
@@ -49,4 +48,110 @@ async def test_engine_updates(monkeypatch):
     # one trade, BUY => dealer short γ (-)
     assert math.isclose(_book.total_gamma(), -0.01 * 2, rel_tol=1e-9)
     # snapshot callback fired at least once
-    assert snapshots and math.isclose(snapshots[-1], _book.total_gamma(), rel_tol=1e-9)
\ No newline at end of file
+    assert snapshots and math.isclose(snapshots[-1], _book.total_gamma(), rel_tol=1e-9)
+
+def test_batch_matches_per_trade_book(monkeypatch):
+    """Micro-batch path: one aggregated update per strike, same γ as the scalar path."""
+    from src.dealer import engine
+
+    monkeypatch.setattr(engine, "get_spot", lambda default=None: 5000.0)
+    monkeypatch.setattr(engine._surface, "refresh_many",
+                        lambda syms, *a, **k: np.full(len(syms), 0.20))
+    _book.reset()
+
+    t_ns = 1_747_612_800 * 10**9                     # 2025-05-19, trade stamps in ns
+    call, put, stale = ("O:SPXW250519C05000000", "O:SPXW250519P04900000",
+                        "O:SPXW250519C05100000")
+    quotes.update(symbol=call, bid=10.0, ask=10.5, ts=t_ns // 10**6)
+    quotes.update(symbol=put,  bid=2.0,  ask=2.2,  ts=t_ns // 10**6)
+    quotes.update(symbol=stale, bid=1.0, ask=1.1, ts=t_ns // 10**6 - 60_000)
+    msgs = [
+        {"ev": "T", "sym": call, "p": 10.5, "s": 2, "t": t_ns},   # BUY
+        {"ev": "T", "sym": call, "p": 10.5, "s": 3, "t": t_ns},   # BUY
+        {"ev": "T", "sym": call, "p": 10.25, "s": 9, "t": t_ns},  # mid ⇒ ignored
+        {"ev": "T", "sym": put,  "p": 2.0,  "s": 4, "t": t_ns},   # SELL
+        {"ev": "T", "sym": stale, "p": 1.1, "s": 1, "t": t_ns},   # stale NBBO ⇒ ignored
+        {"status": "connected"},
+    ]
+    assert engine._process_batch(msgs, eps=0.05) == 3
+
+    tau = 1 / 365
+    g_call = engine.bs_gamma(5000.0, 5000, 0.20, tau, "C")
+    g_put  = engine.bs_gamma(5000.0, 4900, 0.20, tau, "P")
+    assert _book.row((5000, True)).open_long == 5
+    assert _book.row((4900, False)).open_short == 4
+    assert math.isclose(_book.total_gamma(), -5 * g_call + 4 * g_put, rel_tol=1e-9)
+
+def test_batch_dates_ms_stamped_trades(monkeypatch):
+    """Live websocket trades are stamped in ms: τ comes from the trade's date, not 1970."""
+    from src.dealer import engine
+
+    monkeypatch.setattr(engine, "get_spot", lambda default=None: 5000.0)
+    monkeypatch.setattr(engine._surface, "refresh_many",
+                        lambda syms, *a, **k: np.full(len(syms), 0.20))
+    _book.reset()
+
+    t_ms = 1_747_656_000_000                         # 2025-05-19 12:00 UTC, in ms
+    sym = "O:SPXW250523C05000000"                    # expires 4 days later
+    quotes.update(symbol=sym, bid=10.0, ask=10.5, ts=t_ms)
+    assert engine._process_batch([{"ev": "T", "sym": sym, "p": 10.5, "s": 2, "t": t_ms}],
+                                 eps=0.05) == 1
+    g = engine.bs_gamma(5000.0, 5000, 0.20, 4 / 365, "C")
+    assert math.isclose(_book.total_gamma(), -2 * g, rel_tol=1e-9)
+
+@pytest.mark.parametrize("scale", [1, 10**6])        # ws ms, REST ns
+def test_scalar_path_dates_ms_and_ns_trades(monkeypatch, scale):
+    from src.dealer import engine
+
+    monkeypatch.setattr(engine, "get_spot", lambda default=None: 5000.0)
+    monkeypatch.setattr(engine._surface, "get_sigma", lambda *a, **k: 0.20)
+    _book.reset()
+
+    t_ms = 1_747_656_000_000                         # 2025-05-19 12:00 UTC
+    sym = "O:SPXW250523P05000000"                    # expires 4 days later
+    quotes.update(symbol=sym, bid=10.0, ask=10.5, ts=t_ms)
+    asyncio.run(engine._process_trade({"sym": sym, "p": 10.0, "s": 3, "t": t_ms * scale},
+                                      eps=0.05))
+    g = engine.bs_gamma(5000.0, 5000, 0.20, 4 / 365, "P")
+    assert math.isclose(_book.total_gamma(), 3 * g, rel_tol=1e-9)   # SELL ⇒ dealer long
+
+def test_batch_keeps_half_point_strikes_apart(monkeypatch):
+    from src.dealer import engine
+
+    monkeypatch.setattr(engine, "get_spot", lambda default=None: 4200.0)
+    monkeypatch.setattr(engine._surface, "refresh_many",
+                        lambda syms, *a, **k: np.full(len(syms), 0.20))
+    _book.reset()
+    t_ms = 1_747_656_000_000
+    whole, half = "O:SPXW250523C04200000", "O:SPXW250523C04200500"
+    for sym in (whole, half):
+        quotes.update(symbol=sym, bid=10.0, ask=10.5, ts=t_ms)
+    msgs = [{"ev": "T", "sym": whole, "p": 10.5, "s": 2, "t": t_ms},
+            {"ev": "T", "sym": half,  "p": 10.5, "s": 3, "t": t_ms}]
+    assert engine._process_batch(msgs, eps=0.05) == 2
+    assert _book.row((4200, True)).open_long == 2
+    assert _book.row((4200.5, True)).open_long == 3
+    g = engine.bs_gamma(4200.0, 4200.5, 0.20, 4 / 365, "C")
+    assert math.isclose(_book.row((4200.5, True)).net_gamma, -3 * g, rel_tol=1e-9)
+
+def test_replayed_spot_is_aged_by_the_trade_clock(monkeypatch):
+    from src.dealer import engine
+    from src.stream import spot_feed
+
+    monkeypatch.setattr(spot_feed, "spot_cache", spot_feed.SpotCache())
+    monkeypatch.setattr(engine, "_last_trade_ms", None)
+    monkeypatch.setattr(engine._positions, "revalued_gamma", lambda spot: ("revalued", spot))
+    _book.reset()
+    t_ms = 1_747_656_000_000                              # 2025-05-19, far behind the wall clock
+    spot_feed.spot_cache.update(5010.0, t_ms / 1e3 - 1.0)
+    assert engine._snapshot_gamma() == _book.total_gamma()   # no trade yet: wall clock, stale
+
+    sym = "O:SPXW250523C05000000"
+    quotes.update(symbol=sym, bid=10.0, ask=10.5, ts=t_ms)
+    monkeypatch.setattr(engine._surface, "refresh_many",
+                        lambda syms, *a, **k: np.full(len(syms), 0.20))
+    engine._process_batch([{"ev": "T", "sym": sym, "p": 10.5, "s": 1, "t": t_ms}], eps=0.05)
+    assert engine._snapshot_gamma() == ("revalued", 5010.0)  # 1 s old at the trade's time
+
+    engine._advance_clock(t_ms + (engine.SPOT_MAX_AGE + 1) * 1e3)
+    assert engine._snapshot_gamma() == _book.total_gamma()
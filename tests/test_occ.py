@@ -0,0 +1,28 @@
+import datetime as dt
+import numpy as np
+import pyarrow as pa
+import pytest
+from src.utils.occ import parse, parse_many
+
+SYMS = ["O:SPXW250519P05000000", "O:SPX240517C04200500", "O:SPXW251231C06125000"]
+
+def test_batch_decode_matches_scalar_parser():
+    for col in (SYMS, np.array(SYMS), pa.array(SYMS), pa.chunked_array([SYMS[:1], SYMS[1:]])):
+        occ = parse_many(col)
+        assert occ.root.tolist() == [b"SPXW", b"SPX", b"SPXW"]
+        assert occ.strike.tolist() == [5000.0, 4200.5, 6125.0]
+        for s, e, k, c in zip(SYMS, occ.expiry.astype(object), occ.strike, occ.is_call):
+            p = parse(s)
+            assert (p.expiry, p.strike, p.is_call) == (e, k, c)
+    assert parse_many(pa.array(SYMS)[1:]).expiry[0] == np.datetime64("2024-05-17")
+    assert parse("O:SPXW250519P05000000") is parse("O:SPXW250519P05000000")   # memoized
+    assert parse("O:SPXW250519P05000000").expiry == dt.date(2025, 5, 19)
+
+@pytest.mark.parametrize("bad", ["SPXW250519P05000000", "O:SPXW250519X05000000",
+                                 "O:SPXW251319P05000000", "O:SPXW250231C05000000",
+                                 "O:SPXW250431C05000000", "O:SPX", ""])
+def test_both_decoders_reject_malformed(bad):
+    with pytest.raises(ValueError, match="not an OCC symbol"):
+        parse_many([SYMS[0], bad])
+    with pytest.raises(ValueError, match="not an OCC symbol"):
+        parse(bad)
@@ -0,0 +1,158 @@
+import datetime as dt, threading, time
+import duckdb
+from src import persistence
+
+def _db(tmp_path):
+    conn = duckdb.connect(str(tmp_path / "g.db"))
+    persistence._init_schema(conn)
+    return conn
+
+def test_writer_commits_in_bulk_off_the_caller(tmp_path):
+    conn = _db(tmp_path)
+    w = persistence.GammaWriter(conn, commit_rows=250, commit_secs=0.05)
+    t0 = time.perf_counter()
+    for i in range(2_000):
+        w.add(1_700_000_000 + i * 0.01, float(i))
+    per_add = (time.perf_counter() - t0) / 2_000
+    assert per_add < 1e-4                         # a buffer append, not an INSERT
+    assert w.flush(timeout=5)
+    n, s = conn.execute("SELECT count(*), sum(dealer_gamma) FROM intraday_gamma").fetchone()
+    assert (n, s) == (2_000, sum(range(2_000)))
+    w.add(1_800_000_000, -1.0)
+    w.close()                                     # drains what is still buffered
+    assert conn.execute("SELECT max(ts) FROM intraday_gamma").fetchone()[0] == 1_800_000_000
+    assert w.errors == w.dropped == 0
+
+def test_full_buffer_drops_instead_of_blocking(tmp_path):
+    conn = _db(tmp_path)
+    w = persistence.GammaWriter(conn, commit_rows=1_000, commit_secs=60, buffer_rows=10)
+    assert all(w.add(float(i), 1.0) for i in range(10))
+    assert not w.add(10.0, 1.0) and w.dropped == 1
+    w.close()
+    assert conn.execute("SELECT count(*) FROM intraday_gamma").fetchone()[0] == 10
+
+def test_book_history_stores_deltas_and_answers_asof(tmp_path, monkeypatch):
+    import datetime as dt
+    from src.dealer.array_book import ArrayStrikeBook
+    from src.dealer.strike_book import Side
+    conn = _db(tmp_path)
+    r = persistence.Reader(conn)
+    monkeypatch.setattr(persistence, "_READER", r)
+    w = persistence.GammaWriter(conn, commit_secs=60, keyframe_secs=100, on_commit=r.invalidate)
+    e1, e2 = dt.date(2025, 5, 19), dt.date(2025, 5, 20)
+    book = ArrayStrikeBook()
+    book.update((5000, True), Side.BUY, 2, 0.01, expiry=e1)
+    book.update((5010, False), Side.SELL, 1, 0.02, expiry=e1)
+    w.add_book(10.0, book.state())                         # keyframe: 2 rows
+    w.add_book(11.0, book.state())                         # unchanged: 0 rows
+    book.update((5000, True), Side.SELL, 2, 0.01, expiry=e1)  # 5000C net flat, counts stay
+    book.update((5020, True), Side.BUY, 3, 0.01, expiry=e2)   # new strike and expiry
+    w.add_book(12.0, book.state())                         # 2 rows
+    w.add_book(200.0, book.state())                        # keyframe: all 3 non-empty cells
+    assert w.flush(timeout=5)
+
+    per_ts = dict(conn.execute("SELECT ts, count(*) FROM intraday_strike_gamma GROUP BY ts").fetchall())
+    assert per_ts == {10.0: 2, 12.0: 2, 200.0: 3}
+    assert [r[0] for r in conn.execute("SELECT ts FROM intraday_book_keyframes ORDER BY ts").fetchall()] == [10.0, 200.0]
+
+    at11 = persistence.get_book_asof(11.0)
+    assert list(zip(at11.strike, at11.is_call)) == [(5000, True), (5010, False)]
+    at12 = persistence.get_book_asof(150.0)
+    assert list(zip(at12.strike, at12.is_call, at12.long, at12.short)) == [
+        (5000, True, 2, 2), (5010, False, 0, 1), (5020, True, 3, 0)]
+    assert at12.dealer_gamma.iloc[0] == 0 and at12.expiry.iloc[2].date() == e2
+    assert persistence.get_book_asof(5.0).empty
+    assert persistence.get_book_asof(250.0).shape[0] == 3
+
+    h = persistence.get_strike_history(5000, is_call=True, end=150.0)   # 200 is a keyframe repeat
+    assert list(zip(h.ts, h.long, h.short)) == [(10.0, 2, 0), (12.0, 2, 2)]
+    assert persistence.get_strike_history(5000, start=11.0).ts.tolist() == [12.0, 200.0]
+    w.close()
+
+def test_reader_pool_caches_until_commit(tmp_path, monkeypatch):
+    conn = _db(tmp_path)
+    r = persistence.Reader(conn, size=2, ttl=60)
+    monkeypatch.setattr(persistence, "_READER", r)
+    w = persistence.GammaWriter(conn, commit_secs=60, on_commit=r.invalidate)
+    for i in range(5):
+        w.add(1_700_000_000.0 + i, float(i))
+    w.flush(timeout=5)
+
+    h = persistence.get_gamma_history(limit=3)
+    assert h.dealer_gamma.tolist() == [4.0, 3.0, 2.0]
+    assert h.time.tolist() == [dt.datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S")
+                               for t in h.ts]
+    h["dealer_gamma"] = 0                               # callers get their own copy
+    assert persistence.get_gamma_history(limit=3).dealer_gamma.tolist() == [4.0, 3.0, 2.0]
+    assert (r.hits, r.misses) == (1, 1)
+    assert persistence.get_latest_gamma()["gamma"] == 4.0
+
+    w.add(1_700_000_010.0, 10.0)
+    assert persistence.get_latest_gamma()["gamma"] == 4.0       # cached, not committed yet
+    w.flush(timeout=5)                                  # commit clears the cache
+    assert persistence.get_latest_gamma()["gamma"] == 10.0
+
+    # concurrent readers share the two cursors while the writer keeps committing
+    errors = []
+    def poll():
+        try:
+            for _ in range(50):
+                persistence.get_gamma_history(limit=10)
+        except Exception as e:                          # pragma: no cover
+            errors.append(e)
+    threads = [threading.Thread(target=poll) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for i in range(200):
+        w.add(1_700_001_000.0 + i, 1.0)
+    for t in threads:
+        t.join()
+    w.close()
+    assert not errors
+
+def test_failed_book_commit_forces_a_keyframe(tmp_path, monkeypatch):
+    from src.dealer.array_book import ArrayStrikeBook
+    from src.dealer.strike_book import Side
+    conn = _db(tmp_path)
+    w = persistence.GammaWriter(conn, commit_secs=60, keyframe_secs=1e9)
+    book = ArrayStrikeBook()
+    book.update((5000, True), Side.BUY, 2, 0.01)
+    w.add_book(1.0, book.state())
+    w.flush(timeout=5)
+
+    class _FailOnce:                                 # the next INSERT fails
+        def __init__(self, cur):
+            self._cur, self.failed = cur, False
+        def execute(self, sql, *a):
+            if sql.startswith("INSERT") and not self.failed:
+                self.failed = True
+                raise duckdb.IOException("disk full")
+            return self._cur.execute(sql, *a)
+        def __getattr__(self, name):
+            return getattr(self._cur, name)
+    w._cur = _FailOnce(w._cur)
+    book.update((5010, True), Side.BUY, 1, 0.01)
+    w.add_book(2.0, book.state())
+    w.flush(timeout=5)
+    assert w.errors == 1
+
+    w.add_book(3.0, book.state())                    # nothing changed since ts=2 ...
+    w.close()
+    rows = conn.execute("SELECT strike FROM intraday_strike_gamma WHERE ts = 3 ORDER BY strike").fetchall()
+    assert rows == [(5000,), (5010,)]                # ... but ts=2 was lost: full keyframe
+    assert conn.execute("SELECT max(ts) FROM intraday_book_keyframes").fetchone()[0] == 3.0
+
+def test_strike_history_is_a_zone_mapped_scan_without_an_index(tmp_path):
+    conn = duckdb.connect(str(tmp_path / "g.db"))
+    conn.execute("CREATE TABLE intraday_strike_gamma (ts DOUBLE, expiry DATE, strike DOUBLE,"
+                 " is_call BOOLEAN, long BIGINT, short BIGINT, dealer_gamma DOUBLE)")
+    conn.execute("CREATE INDEX strike_gamma_by_strike ON intraday_strike_gamma (strike, is_call, ts)")
+    persistence._init_schema(conn)                # drops the index older files carry
+    assert conn.execute("SELECT count(*) FROM duckdb_indexes()").fetchone()[0] == 0
+    conn.execute("INSERT INTO intraday_strike_gamma SELECT i, DATE '2025-05-19',"
+                 " 4900 + i % 200, i % 2 = 0, 1, 0, -1.0 FROM range(10000) t(i)")
+    plan = conn.execute("EXPLAIN SELECT ts, dealer_gamma FROM intraday_strike_gamma"
+                        " WHERE strike = 5000 AND is_call AND ts BETWEEN 1 AND 2").fetchall()
+    text = "\n".join(r[1] for r in plan)
+    assert "SEQ_SCAN" in text and "INDEX_SCAN" not in text
+    assert "ts>=1.0" in text.replace(" ", "") and "strike=5000.0" in text.replace(" ", "")
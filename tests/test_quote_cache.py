@@ -14,4 +14,61 @@ async def test_quote_cache_populates():
     assert qc.quotes, "no quotes captured"
     # pick one sample and sanity-check bid < ask
     bid, ask, _ = next(iter(qc.quotes.values()))
-    assert bid < ask
\ No newline at end of file
+    assert bid < ask
+
+async def test_columnar_cache_get_snapshot_arrays():
+    from src.stream.quote_cache import QuoteCache
+
+    qc = QuoteCache(capacity=1)                       # forces two growths
+    for i, sym in enumerate(["A", "B", "C"]):
+        qc.update(symbol=sym, bid=1.0 + i, bid_size=10, ask=1.1 + i, ask_size=20, ts=1000 + i)
+
+    assert qc.get("B") == (2.0, 2.1, 1001)
+    assert qc.depth("B") == {"bid": 2.0, "bid_size": 10, "ask": 2.1, "ask_size": 20, "ts": 1001}
+    assert qc.get("missing") is None
+    assert set(qc.snapshot()) == {"A", "B", "C"}
+
+    arr = qc.arrays()
+    assert arr.symbols == ["A", "B", "C"]
+    assert list(arr.ask) == [1.1, 2.1, 3.1] and list(arr.seq) == [2, 2, 2]
+    qc.update(symbol="A", bid=9.0, bid_size=1, ask=9.5, ask_size=1, ts=2000)
+    assert arr.bid[0] == 9.0                          # zero-copy view sees the write
+    assert not arr.bid.flags.writeable
+
+async def test_one_store_behind_every_quotes_name():
+    from src.stream import quote_cache as qc, ws_client
+
+    assert ws_client.quotes is qc.quote_cache is qc.quotes
+    store = qc.QuoteCache()
+    store["X"] = (9.90, 10.10)                        # legacy (bid, ask) write
+    store["Y"] = (1.0, 1.2, 5)
+    bid, ask, ts = store.get("X")
+    assert (bid, ask, ts) == (9.90, 10.10, 0)
+    assert store["Y"].ask == 1.2 and "Y" in store and "Z" not in store
+    assert store.get("Z", (None, None, None)) == (None, None, None)
+    assert sorted(store) == ["X", "Y"]
+    store.clear()
+    assert len(store) == 0 and not store.snapshot()
+
+async def test_stale_lookup_sweep_and_histogram():
+    from src.stream.quote_cache import QuoteCache
+
+    qc = QuoteCache(capacity=4)
+    qc.update(symbol="OLD", bid=1.0, ask=1.1, ts=1_000)
+    qc.update(symbol="MID", bid=2.0, ask=2.1, ts=4_000)
+    qc.update(symbol="NEW", bid=3.0, ask=3.1, ts=9_900)
+    qc["NOTS"] = (4.0, 4.1)                           # no timestamp ⇒ never stale
+
+    assert qc.get("OLD", max_age_ms=500, now_ms=10_000) is None
+    assert qc.get("NEW", max_age_ms=500, now_ms=10_000).bid == 3.0
+    assert qc.fresh("NOTS", 1, now_ms=10_000)
+
+    edges, counts = qc.age_histogram(edges_ms=(0, 1_000, 10_000), now_ms=10_000)
+    assert list(counts) == [1, 2]
+
+    assert qc.sweep(5_000, now_ms=10_000) == ["OLD", "MID"]        # oldest first
+    assert qc.sweep(5_000, now_ms=10_000, evict=True) == ["OLD", "MID"]
+    assert "OLD" not in qc and qc.get("MID") is None and len(qc) == 2
+
+    qc.update(symbol="REUSE", bid=5.0, ask=5.1, ts=10_000)         # takes a freed row
+    assert qc.id_of("REUSE") in (0, 1) and len(qc.arrays().symbols) == 4
@@ -0,0 +1,82 @@
+import datetime as dt
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from src.stream import sinks
+
+def _sink(tmp_path, schema=sinks._trade_schema):
+    s = sinks._ArrowSink("trades.parquet", schema)
+    s._file = tmp_path / "trades.parquet"
+    return s
+
+def test_column_buffers_round_trip(tmp_path):
+    s = _sink(tmp_path)
+    s.add(1_716_000_000_000 * 1_000_000, "O:SPXW250519C05000000", 2.5, 3, "BUY")
+    s.append({"ts": dt.datetime(2024, 5, 18, 2, 40, 0, 1000, tzinfo=dt.timezone.utc),
+              "symbol": "O:SPXW250519P05000000", "price": 1.25, "size": 7, "side": "?"})
+    s.add(1_716_000_000_002 * 1_000_000, "O:SPXW250519C05000000", 2.55, 1, "SELL")
+    with pytest.raises(TypeError):
+        s.add(0, "O:SPXW250519C05000000", "bad", 1, "BUY")   # rejected whole
+    assert len(s) == 3
+    s.flush(wait=True)
+    assert len(s) == 0
+
+    rows = pq.read_table(tmp_path / "trades.parquet").to_pylist()
+    assert [r["symbol"][-9:] for r in rows] == ["C05000000", "P05000000", "C05000000"]
+    assert [r["side"] for r in rows] == ["BUY", "?", "SELL"]
+    assert [r["size"] for r in rows] == [3, 7, 1]
+    assert rows[1]["ts"] == dt.datetime(2024, 5, 18, 2, 40, 0, 1000)
+
+def test_writer_thread_keeps_feed_off_disk(tmp_path):
+    import threading, time
+    s = sinks._ArrowSink("trades.parquet", sinks._trade_schema, flush_rows=100,
+                         flush_secs=0.05, queue_max=64)
+    written, gate = [], threading.Event()
+    def slow_write(batch):                                   # a disk that stalls
+        gate.wait(5)
+        written.append(batch.num_rows)
+    s._write = slow_write
+
+    t0 = time.perf_counter()
+    for i in range(1_050):
+        s.add(i, "O:SPXW250519C05000000", 1.0, 1, "BUY")
+    assert time.perf_counter() - t0 < 1.0 and not written  # never waited on the writer
+    gate.set()
+    deadline = time.monotonic() + 3                          # the 50-row tail goes out on time
+    while sum(written) < 1_050 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sum(written) == 1_050 and written[-1] == 50
+
+    s.add(2_000, "O:SPXW250519C05000000", 1.0, 1, "SELL")
+    s.close()                                                # drains on shutdown
+    assert sum(written) == 1_051 and not s._thread.is_alive()
+
+def test_rolling_files_row_groups_and_compaction(tmp_path):
+    s = sinks._ArrowSink("quotes.parquet", sinks._quote_schema, flush_rows=1_000,
+                         row_group_rows=4_000, roll_bytes=1 << 40, roll_secs=3600)
+    s._file = tmp_path / "quotes.parquet"
+    for i in range(10_000):
+        s.add(i, f"O:SPXW250519C0{5000 + 5 * (i % 7)}000", 1.0, 1.1, 1.05)
+    s.flush(wait=True)                                       # roll ⇒ first file readable
+    for i in range(10_000, 12_000):
+        s.add(i, "O:SPXW250519P05000000", 2.0, 2.1, 2.05)
+    s.flush()
+    s._q.join()
+    # a row group is on disk but its file has no footer yet: readers must not see it
+    s._write_group()
+    assert [p.name for p in (tmp_path / "quotes.parquet").iterdir() if p.name.startswith(".")]
+    assert pd.read_parquet(tmp_path / "quotes.parquet").shape[0] == 10_000
+    s.close()
+
+    parts = sorted((tmp_path / "quotes.parquet").glob("*.parquet"))
+    assert len(parts) == 2                                   # not one file per flush
+    md = pq.ParquetFile(parts[0]).metadata
+    assert md.num_rows == 10_000 and md.num_row_groups == 3  # 4k + 4k + 2k tail
+    col = md.row_group(0).column(1)
+    assert col.statistics.has_min_max and "DICTIONARY" in str(col.encodings)
+
+    out = sinks.compact(tmp_path / "quotes.parquet", row_group_rows=8_000)
+    assert list((tmp_path / "quotes.parquet").glob("*.parquet")) == [out]
+    t = pq.read_table(out)
+    assert t.num_rows == 12_000 and t.column("ts").to_pylist()[-1].value == 11_999
+    assert pq.ParquetFile(out).metadata.num_row_groups == 2
@@ -12,7 +12,7 @@ from unittest import mock
 # Add project root to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.utils.greeks import bs_greeks, implied_vol
+from src.utils.greeks import bs_greeks, bs_greeks_vec, bs_price_vec, implied_vol, implied_vol_vec
 
 
 def test_greeks_calculation():
@@ -51,7 +51,47 @@ def test_implied_vol_calculation():
     assert abs(iv - true_vol) < 0.001, "Implied volatility should match true volatility"
 
 
+def test_vectorized_greeks_match_closed_form():
+    """The batched kernel against Black-Scholes written out with scipy.stats.norm."""
+    from scipy.stats import norm
+    s, tau = 5000.0, 0.01
+    strikes = np.array([4900.0, 5000.0, 5100.0, 5000.0])
+    cp      = np.array(["C", "P", "C", "P"])
+    ivs     = np.array([0.25, 0.20, 0.18, -1.0])       # last one is invalid
+    delta, gamma, vega, theta = bs_greeks_vec(s, strikes, ivs, tau, cp)
+
+    for i in range(3):
+        k, v = strikes[i], ivs[i]
+        d1 = (np.log(s / k) + 0.5 * v**2 * tau) / (v * np.sqrt(tau))
+        ref_delta = norm.cdf(d1) if cp[i] == "C" else norm.cdf(d1) - 1
+        assert abs(delta[i] - ref_delta) < 1e-12
+        assert abs(gamma[i] - norm.pdf(d1) / (s * v * np.sqrt(tau))) < 1e-12
+        assert abs(vega[i] - s * norm.pdf(d1) * np.sqrt(tau) / 100) < 1e-10
+        assert abs(theta[i] + s * norm.pdf(d1) * v / (2 * np.sqrt(tau)) / 365) < 1e-10
+    assert np.isnan(gamma[3]), "Invalid IV should give NaN gamma"
+
+    # textbook value: ATM, σ = 20 %, one year ⇒ γ = φ(0.1) / 20
+    _, g, _, _ = bs_greeks_vec(100.0, 100.0, 0.2, 1.0, "C")
+    assert abs(float(g) - 0.0198476) < 1e-6
+
+
+def test_vectorized_implied_vol_round_trip():
+    """Batched solver recovers known vols and flags unsolvable prices."""
+    strikes  = np.linspace(4900, 5100, 41)
+    is_call  = np.arange(41) % 2 == 0
+    true_vol = np.linspace(0.10, 0.60, 41)
+    prices   = bs_price_vec(5000.0, strikes, true_vol, 5 / 365, is_call)
+    prices[-1] = -1.0                                  # below any model price
+
+    iv, ok = implied_vol_vec(prices, 5000.0, strikes, 5 / 365, is_call)
+    assert ok[:-1].all() and not ok[-1]
+    assert np.isnan(iv[-1])
+    assert np.max(np.abs(iv[:-1] - true_vol[:-1])) < 1e-6
+
+
 if __name__ == "__main__":
     test_greeks_calculation()
     test_implied_vol_calculation()
+    test_vectorized_greeks_match_closed_form()
+    test_vectorized_implied_vol_round_trip()
     print("All tests passed!")
\ No newline at end of file
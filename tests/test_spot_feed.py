@@ -0,0 +1,38 @@
+import pytest
+from src.stream import spot_feed
+from src.stream.spot_feed import SpotCache, replay, get_spot, _handle
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """A fresh SpotCache in place of the module-global one, restored afterwards."""
+    c = SpotCache()
+    monkeypatch.setattr(spot_feed, "spot_cache", c)
+    return c
+
+
+def test_ring_buffer_keeps_latest():
+    c = SpotCache(maxlen=3)
+    assert c.last() is None and c.last(4200.0) == 4200.0
+    for i, px in enumerate([5000.0, 5001.0, 5002.0, 5003.0]):
+        c.update(px, ts=100.0 + i)
+    ts, px = c.history()
+    assert list(px) == [5001.0, 5002.0, 5003.0]          # oldest dropped
+    assert list(ts) == [101.0, 102.0, 103.0]
+    assert c.last() == 5003.0 and c.last_ts() == 103.0
+    assert c.last(max_age=1.0) is None                   # ts=103 is ancient
+    assert c.last(max_age=1.0, now=103.5) == 5003.0      # ...but not at replay time
+
+
+def test_index_message_updates_shared_cache(cache):
+    _handle({"ev": "V", "val": 5123.5, "T": "I:SPX", "t": 1_700_000_000_000})
+    assert get_spot() == 5123.5
+
+
+@pytest.mark.asyncio
+async def test_replay_from_csv(tmp_path, cache):
+    f = tmp_path / "spot.csv"
+    f.write_text("ts,price\n1,5000\n2,5010.5\n")
+    await replay(f)
+    assert get_spot() == 5010.5
+    assert len(cache.history()[1]) == 2
@@ -11,4 +11,34 @@ def test_updates():
     assert row.open_short == 5
     # net γ = –0.002*10 + 0.001*5 = –0.015
     assert math.isclose(row.net_gamma, -0.015, rel_tol=1e-12)
-    assert math.isclose(b.total_gamma(), -0.015, rel_tol=1e-12)
\ No newline at end of file
+    assert math.isclose(b.total_gamma(), -0.015, rel_tol=1e-12)
+def test_running_totals_match_full_recompute():
+    import datetime as dt, random
+    b = StrikeBook()
+    d1, d2 = dt.date(2025, 5, 19), dt.date(2025, 5, 20)
+    rng = random.Random(0)
+    for _ in range(500):
+        key = (rng.choice(range(4900, 5100, 5)), rng.random() < 0.5)
+        b.update(key, rng.choice([Side.BUY, Side.SELL]), rng.randint(1, 20),
+                 rng.random() * 1e-3, expiry=rng.choice([d1, d2]))
+    b.update_many([(5000, False)], [3], [1], [-2e-3], [d1])
+
+    assert math.isclose(b.total_gamma(), sum(b._gamma.values()), rel_tol=1e-9)
+    calls = sum(g for (k, c), g in b._gamma.items() if c)
+    assert math.isclose(b.call_gamma(), calls, rel_tol=1e-9)
+    assert math.isclose(b.call_gamma() + b.put_gamma(), b.total_gamma(), rel_tol=1e-9)
+    assert b.net_contracts() == sum(b._long.values()) - sum(b._short.values())
+    assert math.isclose(b.expiry_gamma(d1) + b.expiry_gamma(d2), b.total_gamma(), rel_tol=1e-9)
+
+    b.reset()
+    assert b.totals() == (0.0, 0.0, 0.0, 0, 0) and b.gamma_by_expiry() == {}
+
+def test_row_lookup_does_not_disturb_totals():
+    b = StrikeBook()
+    b.update((5000, True), Side.BUY, 2, gamma=0.01)
+    b.reset()
+    assert b.row((4000, False)) == (0, 0, 0.0)       # unknown key: no entry created
+    assert b.total_gamma() == 0.0 and not b._gamma
+    b.update((5010, False), Side.SELL, 1, gamma=0.02)
+    assert math.isclose(b.total_gamma(), sum(b._gamma.values()), rel_tol=1e-12)
+    assert b.totals() == (b.total_gamma(), 0.0, b.total_gamma(), 0, 1)
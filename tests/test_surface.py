@@ -34,4 +34,67 @@ def test_surface_reuses_and_expires(monkeypatch):
     # wait for TTL expiry
     time.sleep(0.6)
     s4 = vs.get_sigma(sym, mid * 1.051, S, K, tau)
-    assert fake_iv.calls == 3
\ No newline at end of file
+    assert fake_iv.calls == 3
+
+def test_refresh_many_batches_only_stale_rows(monkeypatch):
+    import numpy as np
+
+    batches = []
+    def fake_batch(mid, S, K, tau, is_call):
+        batches.append(len(mid))
+        return np.full(len(mid), 0.3), np.ones(len(mid), dtype=bool)
+    monkeypatch.setattr("src.greeks.surface.iv_batch", fake_batch)
+
+    vs = VolSurface(eps=0.02, ttl=60.0, capacity=2)    # forces growth
+    syms = ["A", "B", "C"]
+    out = vs.refresh_many(syms, [10.0, 5.0, 2.0], 5000, [5000, 5010, 5020], 0.003)
+    assert np.allclose(out, 0.3) and batches == [3]
+
+    # only "B" moved more than eps → one-element batch
+    out = vs.refresh_many(syms, [10.0, 5.5, 2.01], 5000, [5000, 5010, 5020], 0.003)
+    assert batches == [3, 1]
+    assert vs.get_sigma("C", 2.0, 5000, 5020, 0.003) == 0.3
+
+
+def test_svi_fit_recovers_smile():
+    import numpy as np
+    from src.greeks.smile import SVIParams, fit_svi, svi_sigma, svi_variance
+
+    true = SVIParams(a=1e-4, b=0.01, rho=-0.5, m=0.002, s=0.01)
+    k = np.linspace(-0.04, 0.03, 40)
+    fit = fit_svi(k, svi_variance(true, k))
+    K, tau = 5000 * np.exp(k), 1 / 365
+    assert np.max(np.abs(svi_sigma(fit, K, 5000, tau) - svi_sigma(true, K, 5000, tau))) < 0.01
+    assert fit_svi(k[:3], svi_variance(true, k[:3])) is None      # too few points
+
+
+def test_failed_solve_reads_fitted_smile(monkeypatch):
+    import numpy as np
+
+    vs = VolSurface()
+    strikes = np.linspace(4900, 5100, 9)
+    sigmas  = 0.2 + 0.5 * (strikes / 5000 - 1) ** 2
+    monkeypatch.setattr("src.greeks.surface.iv_batch",
+                        lambda mid, S, K, tau, c: (np.interp(K, strikes, sigmas),
+                                                   np.ones(len(mid), dtype=bool)))
+    vs.refresh_many([f"S{i}" for i in range(9)], 1.0, 5000, strikes, 0.01, expiry="E")
+
+    # solver fails → no default 0.2, the smile value is used instead
+    monkeypatch.setattr("src.greeks.surface.iv_call", lambda *a: None)
+    got = vs.get_sigma("NEW", 1.0, 5000, 5050, 0.01, expiry="E")
+    assert abs(got - (0.2 + 0.5 * 0.01 ** 2)) < 5e-3
+    assert got == vs.smile_sigma(5000, 5050, 0.01, expiry="E")
+
+def test_put_mid_is_solved_as_a_put():
+    import numpy as np
+    from src.utils.greeks import bs_price
+
+    vs = VolSurface()
+    S, K, tau = 5000.0, 4950.0, 5 / 365
+    put_mid = bs_price(S, K, 0.25, tau, "P")
+    assert math.isclose(vs.get_sigma("P4950", put_mid, S, K, tau, expiry="E", is_call=False),
+                        0.25, rel_tol=1e-6)
+    # the smile slice was fed the put's own vol, not a call solve of its price
+    sl = vs._slice("E")
+    w = sl._w[sl._slot["P4950"]]
+    assert math.isclose(np.sqrt(w / tau), 0.25, rel_tol=1e-6)
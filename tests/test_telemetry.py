@@ -0,0 +1,26 @@
+import logging
+from src.dealer.telemetry import Telemetry, EventLog
+
+class _Boom:
+    def __str__(self):
+        raise AssertionError("formatted although the event was disabled")
+
+def test_events_are_level_gated_sampled_and_lazy(caplog):
+    tm = Telemetry("telemetry_test", sample=3)
+    with caplog.at_level(logging.INFO, logger="telemetry_test"):
+        tm.event(logging.DEBUG, "trade", obj=_Boom())          # below level: never formatted
+        for i in range(7):
+            tm.event(logging.INFO, "trade", i=i)
+        tm.event(logging.INFO, "status", sampled=False, status="ok")
+    msgs = [r.getMessage() for r in caplog.records]
+    assert msgs == ["trade i=0", "trade i=3", "trade i=6", "status status=ok"]
+
+def test_binary_event_log_round_trip(tmp_path):
+    log = EventLog(tmp_path / "ev.bin")
+    log.write(EventLog.TRADE_CALL, 123, 1, 5, 5000.0, 10.5, 0.01)
+    log.write(EventLog.SNAPSHOT, 456, a=-0.05)
+    log.close()
+    ev = EventLog.read(tmp_path / "ev.bin")
+    assert ev.dtype.itemsize == 40 and len(ev) == 2
+    assert (ev["ts"][0], ev["code"][0], ev["flag"][0], ev["n"][0]) == (123, 1, 1, 5)
+    assert ev["c"][0] == 0.01 and ev["a"][1] == -0.05
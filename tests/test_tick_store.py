@@ -0,0 +1,85 @@
+import datetime as dt
+import numpy as np
+import pyarrow as pa
+from src.stream import tick_store as ts_store
+from src.stream.sinks import _quote_schema
+
+SYMS = ["O:SPXW250519C05000000", "O:SPXW250519P05000000", "O:SPXW250520C05000000"]
+T0 = int(dt.datetime(2025, 5, 19, 13, 30, tzinfo=dt.timezone.utc).timestamp()) * 10**9
+
+def _quotes(n=30_000):
+    rng = np.random.default_rng(0)
+    ts = T0 + np.sort(rng.integers(0, 3 * 3600 * 10**9, n))          # 13:30–16:30 UTC
+    sym = np.array(SYMS)[rng.integers(0, len(SYMS), n)]
+    bid = rng.random(n)
+    return pa.Table.from_arrays([pa.array(ts).cast(pa.timestamp("ns")), pa.array(sym),
+                                 pa.array(bid), pa.array(bid + 0.1), pa.array(bid + 0.05)],
+                                schema=_quote_schema)
+
+def test_partitioned_store_prunes_and_filters(tmp_path):
+    tbl = _quotes()
+    ts_store.write_ticks(tbl, "quotes", root=tmp_path, row_group_rows=2_000)
+    day = tmp_path / "quotes" / "date=2025-05-19"
+    assert sorted(p.name for p in day.iterdir()) == ["hour=13", "hour=14", "hour=15", "hour=16"]
+    assert (day / "hour=14" / "underlying=SPXW" / "expiry=2025-05-20").is_dir()
+
+    start, end = "2025-05-19 14:00", "2025-05-19 14:30"
+    got = ts_store.read_ticks("quotes", symbols=SYMS[:1], start=start, end=end, root=tmp_path)
+    lo = int(dt.datetime(2025, 5, 19, 14, tzinfo=dt.timezone.utc).timestamp()) * 10**9
+    ref = tbl.to_pandas()
+    ns = ref.ts.astype("int64")
+    ref = ref[(ref.symbol == SYMS[0]) & (ns >= lo) & (ns < lo + 1800 * 10**9)]
+    assert got.column_names == _quote_schema.names
+    assert got.num_rows == len(ref) > 0
+    assert got.column("bid").to_pylist() == ref.bid.tolist()
+
+    # only one hour × one expiry directory survives the partition filter
+    f = ts_store.tick_filter(symbols=SYMS[:1], start=start, end=end)
+    frags = list(ts_store.dataset("quotes", root=tmp_path).get_fragments(filter=f))
+    assert len(frags) == 1 and "hour=14" in frags[0].path and "expiry=2025-05-19" in frags[0].path
+    # rows inside a file are sorted by (symbol, ts)
+    part = frags[0].to_table().to_pandas()
+    assert part.equals(part.sort_values(["symbol", "ts"]).reset_index(drop=True))
+
+
+def test_build_day_is_idempotent(tmp_path):
+    import pyarrow.parquet as pq
+    src = tmp_path / "data" / "2025-05-19" / "quotes.parquet"
+    src.mkdir(parents=True)
+    tbl = _quotes(5_000)
+    pq.write_table(tbl.slice(0, 3_000), src / "part-133000-0000.parquet")
+    pq.write_table(tbl.slice(3_000), src / "part-150000-0001.parquet")
+    root = tmp_path / "ticks"
+
+    for _ in range(2):
+        assert ts_store.build_day("2025-05-19", src=tmp_path / "data", root=root)["quotes"] == 5_000
+        assert ts_store.read_ticks("quotes", root=root).num_rows == 5_000
+
+    # the day's input is compacted into one file: a rebuild still holds each tick once
+    for f in src.iterdir():
+        f.unlink()
+    pq.write_table(tbl, src / "compacted-quotes.parquet")
+    ts_store.build_day("2025-05-19", src=tmp_path / "data", root=root)
+    assert ts_store.read_ticks("quotes", root=root).num_rows == 5_000
+
+def test_rebuild_keeps_other_days_ticks_in_shared_partitions(tmp_path):
+    """A local day's evening ticks land in the next UTC date partition."""
+    import pyarrow.parquet as pq
+    utc = dt.timezone.utc
+    def ns(*a):
+        return int(dt.datetime(*a, tzinfo=utc).timestamp()) * 10**9
+    days = {"2025-05-19": [ns(2025, 5, 19, 15), ns(2025, 5, 20, 0, 30)],   # 20:30 ET
+            "2025-05-20": [ns(2025, 5, 20, 15)]}
+    for day, stamps in days.items():
+        d = tmp_path / "data" / day / "quotes.parquet"
+        d.mkdir(parents=True)
+        n = len(stamps)
+        pq.write_table(pa.Table.from_arrays(
+            [pa.array(stamps, pa.timestamp("ns")), pa.array([SYMS[1]] * n),
+             pa.array([1.0] * n), pa.array([1.1] * n), pa.array([1.05] * n)],
+            schema=_quote_schema), d / "part-130000-0001.parquet")
+
+    root = tmp_path / "ticks"
+    for day, rows in (("2025-05-19", 2), ("2025-05-20", 3), ("2025-05-19", 3), ("2025-05-20", 3)):
+        ts_store.build_day(day, src=tmp_path / "data", root=root)
+        assert ts_store.read_ticks("quotes", root=root).num_rows == rows
@@ -73,4 +73,87 @@ async def test_trade_feed_pushes(monkeypatch):
     # Check that we received the trade
     assert not TRADE_Q.empty(), "Queue is empty, no message was received"
     trade = TRADE_Q.get_nowait()
-    assert trade == fake_trade
\ No newline at end of file
+    assert trade == fake_trade
+
+class _ListSink:
+    def __init__(self):
+        self.rows = []
+
+    def add(self, *values):
+        self.rows.append(values)
+
+def _fake_sinks(monkeypatch):
+    """Keep feed output in memory instead of data/<today>/."""
+    from src.stream import nbbo_feed, trade_feed
+    sinks = _ListSink(), _ListSink()
+    monkeypatch.setattr(nbbo_feed, "quote_sink", sinks[0])
+    monkeypatch.setattr(trade_feed, "trade_sink", sinks[1])
+    return sinks
+
+@pytest.mark.asyncio
+async def test_ingest_multiplexes_quotes_and_trades(monkeypatch):
+    """One socket: Q frames land in quote_cache, T frames on TRADE_Q."""
+    from src.stream import ingest
+    from src.stream.quote_cache import quote_cache
+
+    _fake_sinks(monkeypatch)
+    while not TRADE_Q.empty():
+        TRADE_Q.get_nowait()
+
+    sym = "O:SPXW250519C05100000"
+    frames = [
+        {"ev": "Q", "sym": sym, "bp": 2.0, "bs": 5, "ap": 2.2, "as": 7, "t": 1_000},
+        {"ev": "T", "sym": sym, "p": 2.2, "s": 3, "t": 1_100},
+    ]
+
+    async def fake_iter(url, params, **kw):
+        assert params == f"Q.{sym},T.{sym}"
+        for f in frames:
+            yield f
+        await asyncio.sleep(10)                       # hold the "socket" open
+
+    monkeypatch.setattr(ingest, "iter_messages", fake_iter)
+    task = asyncio.create_task(ingest.run([sym]))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert quote_cache.depth(sym) == {"bid": 2.0, "bid_size": 5, "ask": 2.2,
+                                      "ask_size": 7, "ts": 1_000}
+    assert TRADE_Q.get_nowait() == frames[1]
+
+@pytest.mark.asyncio
+async def test_ingest_skips_bad_frames_without_reconnecting(monkeypatch):
+    from src.stream import ingest
+
+    quote_rows, trade_rows = _fake_sinks(monkeypatch)
+    while not TRADE_Q.empty():
+        TRADE_Q.get_nowait()
+
+    sym = "O:SPXW250519C05200000"
+    good = {"ev": "T", "sym": sym, "p": 2.2, "s": 3, "t": 1_100}
+    frames = [
+        {"ev": "T", "sym": sym, "s": 3, "t": 1_000},                 # no price
+        {"ev": "Q", "sym": sym, "bp": 2.0, "ap": 2.2, "t": "soon"},  # bad stamp
+        good,
+    ]
+    connects = []
+
+    async def fake_iter(url, params, **kw):
+        connects.append(url)
+        for f in frames:
+            yield f
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(ingest, "iter_messages", fake_iter)
+    monkeypatch.setattr(ingest, "errors", 0)
+    task = asyncio.create_task(ingest.run([sym]))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert len(connects) == 1 and ingest.errors == 2
+    assert TRADE_Q.get_nowait() == good
+    assert len(trade_rows.rows) == 1 and not quote_rows.rows
@@ -149,4 +149,23 @@ async def test_snapshot_intraday():
     
     # Verify results
     assert was_called  # to_parquet was called
-    assert path is not None  # path is returned
\ No newline at end of file
+    assert path is not None  # path is returned
+
+def test_snapshot_intraday_skips_malformed_tickers():
+    """One bad O:SPX… ticker is skipped; the rest of the snapshot is written."""
+    import pandas as pd
+    from src.stream.ws_client import pos_long, pos_short
+
+    pos_long.clear()
+    pos_short.clear()
+    pos_short["O:SPX240517C04200000"] = 5
+    pos_short["O:SPXBROKEN"] = 2
+
+    written = []
+    with patch('src.stream.snapshot_intraday.get_spot', return_value=4200.0), \
+         patch.object(pd.DataFrame, 'to_parquet', lambda self, *a, **k: written.append(self)):
+        from src.stream.snapshot_intraday import intraday_snapshot
+        assert intraday_snapshot("/tmp/test_intraday") is not None
+
+    assert written[0]["symbol"].tolist() == ["O:SPX240517C04200000"]
+    pos_short.clear()